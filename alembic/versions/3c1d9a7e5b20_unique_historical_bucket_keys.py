@@ -0,0 +1,48 @@
+"""unique historical bucket keys
+
+Revision ID: 3c1d9a7e5b20
+Revises: 215f7bf02074
+Create Date: 2025-10-20 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1d9a7e5b20'
+down_revision: Union[str, Sequence[str], None] = '215f7bf02074'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep one row per bucket key before the unique indexes go on
+    op.execute("""
+        DELETE FROM historical_oc_snapshots a
+        USING historical_oc_snapshots b
+        WHERE a.instrument = b.instrument
+          AND a.expiry = b.expiry
+          AND a.strike = b.strike
+          AND a.ist_minute = b.ist_minute
+          AND a.ctid < b.ctid
+    """)
+    op.execute("""
+        DELETE FROM historical_oc_summary a
+        USING historical_oc_summary b
+        WHERE a.instrument = b.instrument
+          AND a.expiry = b.expiry
+          AND a.ist_minute = b.ist_minute
+          AND a.ctid < b.ctid
+    """)
+    op.create_index('ux_hist_snapshots_key', 'historical_oc_snapshots', ['instrument', 'expiry', 'strike', 'ist_minute'], unique=True)
+    op.create_index('ux_hist_summary_key', 'historical_oc_summary', ['instrument', 'expiry', 'ist_minute'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ux_hist_summary_key', table_name='historical_oc_summary')
+    op.drop_index('ux_hist_snapshots_key', table_name='historical_oc_snapshots')
@@ -0,0 +1,128 @@
+"""partition intraday tables by day
+
+Revision ID: 8f2b6c4d1a93
+Revises: 3c1d9a7e5b20
+Create Date: 2025-10-21 18:47:05.552913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2b6c4d1a93'
+down_revision: Union[str, Sequence[str], None] = '3c1d9a7e5b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITION_DAYS_AHEAD = 7
+
+SNAPSHOT_VALUE_COLUMNS = [
+    'call_delta', 'call_theta', 'call_gamma', 'call_vega', 'call_iv',
+    'call_oi', 'call_volume', 'call_last_price',
+    'put_delta', 'put_theta', 'put_gamma', 'put_vega', 'put_iv',
+    'put_oi', 'put_volume', 'put_last_price',
+    'call_gex', 'put_gex', 'net_gex', 'abs_gex',
+]
+SUMMARY_VALUE_COLUMNS = [
+    'total_net_gex', 'gamma_flip_level',
+    'otm_call_vega', 'otm_put_vega', 'otm_call_theta', 'otm_put_theta', 'otm_call_delta', 'otm_put_delta',
+]
+BIGINT_COLUMNS = {'call_oi', 'call_volume', 'put_oi', 'put_volume'}
+
+TABLES = {
+    'oc_minute_snapshots': {
+        'columns': ['id', 'timestamp', 'ist_minute', 'instrument', 'expiry', 'underlying_price', 'strike', *SNAPSHOT_VALUE_COLUMNS],
+        'indexes': {
+            'ix_oc_minute_snapshots_ist_minute': ['ist_minute'],
+            'ix_oc_minute_snapshots_instrument': ['instrument'],
+            'ix_oc_minute_snapshots_expiry': ['expiry'],
+            'ix_snapshots_minute_instrument': ['ist_minute', 'instrument'],
+            'ix_snapshots_netgex': ['ist_minute', 'instrument', 'net_gex'],
+            'ix_snapshots_absgex': ['ist_minute', 'instrument', 'abs_gex'],
+        },
+    },
+    'oc_summary': {
+        'columns': ['id', 'timestamp', 'ist_minute', 'instrument', 'expiry', 'underlying_price', *SUMMARY_VALUE_COLUMNS],
+        'indexes': {
+            'ix_oc_summary_ist_minute': ['ist_minute'],
+            'ix_oc_summary_instrument': ['instrument'],
+            'ix_oc_summary_expiry': ['expiry'],
+            'ix_summary_minute_instrument': ['ist_minute', 'instrument'],
+        },
+    },
+}
+
+
+def column_defs(table, partitioned):
+    columns = [
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=True),
+        sa.Column('ist_minute', sa.DateTime(), nullable=False),
+        sa.Column('instrument', sa.String(), nullable=True),
+        sa.Column('expiry', sa.Date(), nullable=True),
+        sa.Column('underlying_price', sa.Float(), nullable=True),
+    ]
+    values = SUMMARY_VALUE_COLUMNS
+    if table == 'oc_minute_snapshots':
+        columns.append(sa.Column('strike', sa.Float(), nullable=True))
+        values = SNAPSHOT_VALUE_COLUMNS
+    columns += [sa.Column(name, sa.BigInteger() if name in BIGINT_COLUMNS else sa.Float(), nullable=True) for name in values]
+
+    if partitioned:
+        columns.append(sa.PrimaryKeyConstraint('id', 'ist_minute'))
+    else:
+        columns.append(sa.PrimaryKeyConstraint('id'))
+    return columns
+
+
+def swap_table(table, partitioned):
+    spec = TABLES[table]
+    old = f'{table}_old'
+
+    op.rename_table(table, old)
+    op.execute(f'ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey')
+    for index in spec['indexes']:
+        op.execute(f'DROP INDEX IF EXISTS {index}')
+
+    kwargs = {'postgresql_partition_by': 'RANGE (ist_minute)'} if partitioned else {}
+    op.create_table(table, *column_defs(table, partitioned), **kwargs)
+    for index, columns in spec['indexes'].items():
+        op.create_index(index, table, columns, unique=False)
+
+    if partitioned:
+        # One partition for every IST date already stored, plus the days ahead
+        op.execute(f"""
+            DO $$
+            DECLARE d date;
+            BEGIN
+                FOR d IN
+                    SELECT DISTINCT ist_minute::date FROM {old}
+                    UNION
+                    SELECT generate_series(current_date, current_date + {PARTITION_DAYS_AHEAD - 1}, interval '1 day')::date
+                LOOP
+                    EXECUTE format(
+                        'CREATE TABLE IF NOT EXISTS %I PARTITION OF {table} FOR VALUES FROM (%L) TO (%L)',
+                        '{table}_p' || to_char(d, 'YYYYMMDD'), d, d + 1
+                    );
+                END LOOP;
+            END $$;
+        """)
+
+    columns = ', '.join(spec['columns'])
+    op.execute(f'INSERT INTO {table} ({columns}) SELECT {columns} FROM {old}')
+    op.drop_table(old)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        swap_table(table, partitioned=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        swap_table(table, partitioned=False)
@@ -0,0 +1,36 @@
+"""add rollup_watermarks
+
+Revision ID: a93d5f0c7e28
+Revises: f4b8e2a61c07
+Create Date: 2025-10-28 10:12:46.518309
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a93d5f0c7e28'
+down_revision: Union[str, Sequence[str], None] = 'f4b8e2a61c07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('rollup_watermarks',
+    sa.Column('instrument', sa.String(), nullable=False),
+    sa.Column('expiry', sa.Date(), nullable=False),
+    sa.Column('ist_date', sa.Date(), nullable=False),
+    sa.Column('sealed_until', sa.DateTime(), nullable=False),
+    sa.Column('dirty_from', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('instrument', 'expiry', 'ist_date')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rollup_watermarks')
@@ -0,0 +1,49 @@
+"""add historical_oc_frames
+
+Revision ID: b47e0f3a9c61
+Revises: 8f2b6c4d1a93
+Create Date: 2025-10-23 11:05:27.904116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b47e0f3a9c61'
+down_revision: Union[str, Sequence[str], None] = '8f2b6c4d1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ARRAY_COLUMNS = [
+    'call_delta', 'call_theta', 'call_gamma', 'call_vega', 'call_iv',
+    'call_oi', 'call_volume', 'call_last_price',
+    'put_delta', 'put_theta', 'put_gamma', 'put_vega', 'put_iv',
+    'put_oi', 'put_volume', 'put_last_price',
+    'call_gex', 'put_gex', 'net_gex', 'abs_gex',
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('historical_oc_frames',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.Column('ist_minute', sa.DateTime(), nullable=False),
+    sa.Column('instrument', sa.String(), nullable=False),
+    sa.Column('expiry', sa.Date(), nullable=False),
+    sa.Column('underlying_price', sa.Float(), nullable=True),
+    sa.Column('strike_count', sa.Integer(), nullable=False),
+    sa.Column('strike', sa.LargeBinary(), nullable=False),
+    *[sa.Column(name, sa.LargeBinary(), nullable=True) for name in ARRAY_COLUMNS],
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ux_hist_frames_key', 'historical_oc_frames', ['instrument', 'expiry', 'ist_minute'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ux_hist_frames_key', table_name='historical_oc_frames')
+    op.drop_table('historical_oc_frames')
@@ -0,0 +1,43 @@
+"""add iv_surfaces
+
+Revision ID: c2f7a9e4b183
+Revises: a93d5f0c7e28
+Create Date: 2025-10-29 09:27:03.640158
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2f7a9e4b183'
+down_revision: Union[str, Sequence[str], None] = 'a93d5f0c7e28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('iv_surfaces',
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.Column('ist_minute', sa.DateTime(), nullable=False),
+    sa.Column('instrument', sa.String(), nullable=False),
+    sa.Column('underlying_price', sa.Float(), nullable=True),
+    sa.Column('expiries', postgresql.ARRAY(sa.Date()), nullable=False),
+    sa.Column('expiry_minutes', postgresql.ARRAY(sa.DateTime()), nullable=False),
+    sa.Column('atm_iv', postgresql.ARRAY(sa.Float()), nullable=True),
+    sa.Column('rr_25d', postgresql.ARRAY(sa.Float()), nullable=True),
+    sa.Column('bf_25d', postgresql.ARRAY(sa.Float()), nullable=True),
+    sa.Column('strike_count', sa.Integer(), nullable=False),
+    sa.Column('strike', sa.LargeBinary(), nullable=False),
+    sa.Column('iv_grid', sa.LargeBinary(), nullable=False),
+    sa.PrimaryKeyConstraint('instrument', 'ist_minute')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('iv_surfaces')
@@ -0,0 +1,29 @@
+"""add oc_summary keyframe flag
+
+Revision ID: d5a8c3f1e702
+Revises: b47e0f3a9c61
+Create Date: 2025-10-24 10:12:41.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a8c3f1e702'
+down_revision: Union[str, Sequence[str], None] = 'b47e0f3a9c61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Every minute written so far holds the full chain
+    op.add_column('oc_summary', sa.Column('keyframe', sa.Boolean(), server_default=sa.true(), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('oc_summary', 'keyframe')
@@ -0,0 +1,45 @@
+"""add historical_oc_summary_tiers
+
+Revision ID: e61b94d07c3f
+Revises: d5a8c3f1e702
+Create Date: 2025-10-25 09:41:12.336018
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e61b94d07c3f'
+down_revision: Union[str, Sequence[str], None] = 'd5a8c3f1e702'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TIER_METRICS = [
+    'underlying_price', 'total_net_gex', 'gamma_flip_level',
+    'otm_call_vega', 'otm_put_vega', 'otm_call_theta', 'otm_put_theta', 'otm_call_delta', 'otm_put_delta',
+]
+TIER_AGGREGATES = ['last', 'min', 'max', 'mean']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('historical_oc_summary_tiers',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('tier', sa.String(), nullable=False),
+    sa.Column('ist_minute', sa.DateTime(), nullable=False),
+    sa.Column('instrument', sa.String(), nullable=False),
+    sa.Column('expiry', sa.Date(), nullable=False),
+    sa.Column('samples', sa.Integer(), nullable=False),
+    *[sa.Column(f'{metric}_{aggregate}', sa.Float(), nullable=True) for metric in TIER_METRICS for aggregate in TIER_AGGREGATES],
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ux_hist_summary_tiers_key', 'historical_oc_summary_tiers', ['tier', 'instrument', 'expiry', 'ist_minute'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ux_hist_summary_tiers_key', table_name='historical_oc_summary_tiers')
+    op.drop_table('historical_oc_summary_tiers')
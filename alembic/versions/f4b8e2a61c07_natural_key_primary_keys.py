@@ -0,0 +1,82 @@
+"""natural key primary keys
+
+Revision ID: f4b8e2a61c07
+Revises: e61b94d07c3f
+Create Date: 2025-10-27 11:05:37.904215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4b8e2a61c07'
+down_revision: Union[str, Sequence[str], None] = 'e61b94d07c3f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table -> (natural key, unique index it replaces, whether it is partitioned by ist_minute)
+TABLES = {
+    'oc_minute_snapshots': (['instrument', 'expiry', 'strike', 'ist_minute'], None, True),
+    'oc_summary': (['instrument', 'expiry', 'ist_minute'], None, True),
+    'historical_oc_snapshots': (['instrument', 'expiry', 'strike', 'ist_minute'], 'ux_hist_snapshots_key', False),
+    'historical_oc_summary': (['instrument', 'expiry', 'ist_minute'], 'ux_hist_summary_key', False),
+    'historical_oc_frames': (['instrument', 'expiry', 'ist_minute'], 'ux_hist_frames_key', False),
+    'historical_oc_summary_tiers': (['tier', 'instrument', 'expiry', 'ist_minute'], 'ux_hist_summary_tiers_key', False),
+}
+GEX_INDEXES = {
+    'ix_snapshots_netgex': ['ist_minute', 'instrument', 'net_gex'],
+    'ix_snapshots_absgex': ['ist_minute', 'instrument', 'abs_gex'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # No query reads these; they only slow down intraday writes (benchmarks/bench_snapshot_indexes.py)
+    for index in GEX_INDEXES:
+        op.drop_index(index, table_name='oc_minute_snapshots')
+
+    for table, (key, unique_index, partitioned) in TABLES.items():
+        nullable = [column for column in key if column != 'ist_minute']
+
+        # Rows without a full key can't be addressed by it; duplicates keep the physically latest row
+        op.execute(f"DELETE FROM {table} WHERE {' OR '.join(f'{column} IS NULL' for column in nullable)}")
+        if not unique_index:
+            op.execute(f"""
+                DELETE FROM {table} a
+                USING {table} b
+                WHERE {' AND '.join(f'a.{column} = b.{column}' for column in key)}
+                  AND a.ctid < b.ctid
+            """)
+
+        for column in nullable:
+            op.alter_column(table, column, nullable=False)
+
+        op.drop_constraint(f'{table}_pkey', table, type_='primary')
+        op.drop_column(table, 'id')
+        if unique_index:
+            # The unique index already holds the key, so promote it instead of building another
+            op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY USING INDEX {unique_index}')
+        else:
+            op.create_primary_key(f'{table}_pkey', table, key)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, (key, unique_index, partitioned) in TABLES.items():
+        op.add_column(table, sa.Column('id', sa.UUID(), nullable=False, server_default=sa.text('gen_random_uuid()')))
+        op.alter_column(table, 'id', server_default=None)
+
+        op.drop_constraint(f'{table}_pkey', table, type_='primary')
+        op.create_primary_key(f'{table}_pkey', table, ['id', 'ist_minute'] if partitioned else ['id'])
+        if unique_index:
+            op.create_index(unique_index, table, key, unique=True)
+
+        for column in key:
+            if column != 'ist_minute':
+                op.alter_column(table, column, nullable=True)
+
+    for index, columns in GEX_INDEXES.items():
+        op.create_index(index, 'oc_minute_snapshots', columns, unique=False)
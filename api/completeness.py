@@ -0,0 +1,19 @@
+from typing import Optional
+from datetime import date, datetime
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db import get_async_db
+from config import IST_OFFSET
+from processors.gap_scanner import completeness_report
+
+router = APIRouter()
+
+@router.get("/completeness")
+async def completeness(ist_date: Optional[date] = None, db: AsyncSession = Depends(get_async_db)):
+    """Minute-slot completeness of an IST day (default today) for every stored (instrument, expiry)."""
+    now_ist = datetime.utcnow() + IST_OFFSET
+    report = await completeness_report(db, ist_date or now_ist.date(), now_ist)
+    for key in report["keys"]:
+        del key["missing_slots"]
+    return report
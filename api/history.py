@@ -0,0 +1,57 @@
+from typing import Optional
+from datetime import date, datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db import get_async_db
+from config import IST_OFFSET
+from models import TIER_METRICS, TIER_AGGREGATES
+from processors.history_tiers import TIERS, choose_tier, history_query
+
+router = APIRouter()
+
+DEFAULT_METRICS = "underlying_price,total_net_gex,gamma_flip_level"
+
+@router.get("/history/{instrument}")
+async def summary_history(
+    instrument: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    expiry: Optional[date] = None,
+    metrics: str = DEFAULT_METRICS,
+    max_points: int = 500,
+    tier: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Summary metrics over an IST range from the coarsest-needed tier, as columns of last/min/max/mean.
+
+    The tier is the finest one that fits `max_points` buckets unless given. Without `expiry` the
+    series follows the front expiry.
+    """
+    end = end or datetime.utcnow() + IST_OFFSET
+    start = start or end - timedelta(days=30)
+    metrics = [metric.strip() for metric in metrics.split(",") if metric.strip()]
+
+    unknown = [metric for metric in metrics if metric not in TIER_METRICS]
+    if unknown or not metrics:
+        raise HTTPException(status_code=400, detail=f"Unknown metrics {unknown}; choose from {TIER_METRICS}")
+    if tier and tier not in TIERS:
+        raise HTTPException(status_code=400, detail=f"Unknown tier {tier}; choose from {list(TIERS)}")
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+
+    tier = tier or choose_tier(start, end, max_points)
+    rows = (await db.execute(history_query(instrument, tier, start, end, metrics, expiry))).all()
+
+    return {
+        "instrument": instrument,
+        "tier": tier,
+        "ist_minute": [row.ist_minute for row in rows],
+        "expiry": [row.expiry for row in rows],
+        "metrics": {
+            metric: {
+                aggregate: [getattr(row, f"{metric}_{aggregate}") for row in rows] for aggregate in TIER_AGGREGATES
+            }
+            for metric in metrics
+        },
+    }
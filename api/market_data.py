@@ -0,0 +1,42 @@
+import hashlib
+from fastapi import APIRouter, HTTPException, Request, Response
+
+from processors.hot_cache import hot_cache
+
+router = APIRouter()
+
+def cached_response(request, etag, body):
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+def latest_entry(instrument, expiry):
+    entry = hot_cache.get(instrument, expiry)
+    if not entry:
+        raise HTTPException(status_code=404, detail=f"No data for {instrument} ({expiry})")
+    return entry
+
+@router.get("/chain/{instrument}/{expiry}")
+def latest_chain(instrument: str, expiry: str, request: Request):
+    entry = latest_entry(instrument, expiry)
+    return cached_response(request, entry["etag"], entry["chain"])
+
+@router.get("/gex/{instrument}/{expiry}")
+def latest_gex(instrument: str, expiry: str, request: Request):
+    entry = latest_entry(instrument, expiry)
+    return cached_response(request, entry["etag"], entry["gex"])
+
+@router.get("/summary/{instrument}/{expiry}")
+def latest_summary(instrument: str, expiry: str, request: Request):
+    entry = latest_entry(instrument, expiry)
+    return cached_response(request, entry["etag"], entry["summary"])
+
+@router.get("/summary/{instrument}")
+def latest_summaries(instrument: str, request: Request):
+    entries = hot_cache.instrument_entries(instrument)
+    if not entries:
+        raise HTTPException(status_code=404, detail=f"No data for {instrument}")
+
+    etag = '"' + hashlib.blake2b("".join(e["etag"] for e in entries).encode(), digest_size=12).hexdigest() + '"'
+    body = b"[" + b",".join(e["summary"] for e in entries) + b"]"
+    return cached_response(request, etag, body)
@@ -0,0 +1,51 @@
+import json
+import asyncio
+from typing import Optional
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+
+from config import STREAM_QUEUE_SIZE, STREAM_HEARTBEAT_SEC
+from processors.hot_cache import hot_cache, minute_delta
+from processors.broadcaster import Broadcaster, RESYNC
+
+router = APIRouter()
+
+broadcaster = Broadcaster(STREAM_QUEUE_SIZE)
+hot_cache.listeners.append(broadcaster.publish)
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def snapshots(subscriber):
+    """Full current state for everything the subscriber filters on."""
+    return [
+        sse("snapshot", minute_delta(None, entry["message"]))
+        for entry in list(hot_cache.entries.values()) if subscriber.wants(entry)
+    ]
+
+@router.get("/stream")
+async def stream(instrument: Optional[str] = None, expiry: Optional[str] = None):
+    """Server-sent events: a snapshot per matching (instrument, expiry), then one delta event per new minute."""
+    subscriber = broadcaster.subscribe(instrument, expiry)
+
+    async def events():
+        try:
+            for event in snapshots(subscriber):
+                yield event
+
+            while True:
+                try:
+                    entry = await asyncio.wait_for(subscriber.queue.get(), timeout=STREAM_HEARTBEAT_SEC)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+
+                if entry is RESYNC:
+                    for event in snapshots(subscriber):
+                        yield event
+                else:
+                    yield sse("delta", entry["delta"])
+        finally:
+            broadcaster.unsubscribe(subscriber)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -0,0 +1,26 @@
+from typing import Optional
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db import get_async_db
+from models import IVSurface
+from processors.iv_surface import decode_surface
+
+router = APIRouter()
+
+@router.get("/surface/{instrument}")
+async def iv_surface(instrument: str, ist_minute: Optional[datetime] = None, db: AsyncSession = Depends(get_async_db)):
+    """The stored IV surface of an instrument at `ist_minute`, or the latest one at or before it (default latest).
+
+    Per-expiry ATM IV, 25-delta risk reversal and butterfly come with a strike x expiry IV grid.
+    """
+    query = select(IVSurface).where(IVSurface.instrument == instrument)
+    if ist_minute:
+        query = query.where(IVSurface.ist_minute <= ist_minute)
+
+    surface = (await db.execute(query.order_by(IVSurface.ist_minute.desc()).limit(1))).scalar_one_or_none()
+    if surface is None:
+        raise HTTPException(status_code=404, detail=f"No IV surface stored for {instrument}")
+    return decode_surface(surface)
@@ -0,0 +1,100 @@
+"""Research scan of a few snapshot columns over a month, Postgres vs the Parquet archive.
+
+Usage: python -m benchmarks.bench_archive [--days 20] [--expiries 3] [--strikes 100]
+
+Seeds 5-minute historical_oc_snapshots rows for a throwaway BENCH instrument on far-future dates in
+the configured DATABASE_URL, exports them to a temporary ARCHIVE_DIR and deletes the rows afterwards.
+Needs the `archive` extra (pyarrow).
+"""
+import os
+import random
+import shutil
+import argparse
+import tempfile
+import statistics
+import time as timer
+from sqlalchemy import insert, select
+from datetime import date, datetime, time, timedelta
+
+from db import SessionLocal
+from models import HistoricalOCSnapshot
+from processors.archive import export_day, read_archive
+from utils import is_trading_day
+
+START_DAY = date(2099, 1, 5)
+COLUMNS = ["ist_minute", "strike", "call_oi", "put_oi"]
+
+def seed(db, days, expiries, strikes):
+    rng = random.Random(5)
+    trading_days = [d for d in (START_DAY + timedelta(days=i) for i in range(days)) if is_trading_day(d)]
+    for ist_date in trading_days:
+        first_expiry = ist_date + timedelta(days=(3 - ist_date.weekday()) % 7)
+        rows = []
+        for bucket in range(75):
+            ist_minute = datetime.combine(ist_date, time(9, 15)) + timedelta(minutes=5 * bucket)
+            for e in range(expiries):
+                for k in range(strikes):
+                    rows.append({
+                        "timestamp": ist_minute,
+                        "ist_minute": ist_minute,
+                        "instrument": "BENCH",
+                        "expiry": first_expiry + timedelta(weeks=e),
+                        "underlying_price": 25000.0,
+                        "strike": 24000.0 + 50 * k,
+                        **{f"{side}_{field}": rng.random() for side in ("call", "put") for field in ("delta", "theta", "gamma", "vega", "iv", "last_price")},
+                        **{f"{side}_{field}": rng.randint(0, 10 ** 6) for side in ("call", "put") for field in ("oi", "volume")},
+                    })
+        db.execute(insert(HistoricalOCSnapshot.__table__), rows)
+    db.commit()
+    return trading_days
+
+def timed(read, repeats=5):
+    durations, rows = [], 0
+    for _ in range(repeats):
+        started = timer.perf_counter()
+        rows = read()
+        durations.append(timer.perf_counter() - started)
+    return rows, statistics.median(durations) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=20)
+    parser.add_argument("--expiries", type=int, default=3)
+    parser.add_argument("--strikes", type=int, default=100)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="oc-archive-")
+    db = SessionLocal()
+    try:
+        trading_days = seed(db, args.days, args.expiries, args.strikes)
+        for ist_date in trading_days:
+            export_day(db, HistoricalOCSnapshot, ist_date, root)
+
+        start, end = datetime.combine(trading_days[0], time.min), datetime.combine(trading_days[-1], time.max)
+        expiry = trading_days[-1] + timedelta(days=(3 - trading_days[-1].weekday()) % 7)
+        table = HistoricalOCSnapshot.__table__
+
+        def postgres():
+            return len(db.execute(select(*(table.c[c] for c in COLUMNS)).where(
+                table.c.instrument == "BENCH", table.c.expiry == expiry,
+                table.c.ist_minute >= start, table.c.ist_minute <= end
+            )).all())
+
+        def archive():
+            return read_archive("historical_oc_snapshots", COLUMNS, "BENCH", expiry, start, end, root).num_rows
+
+        archive_bytes = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(root) for f in files)
+        print(f"{len(trading_days)} trading days, archive {archive_bytes / 1024 / 1024:.1f} MiB, "
+              f"scanning {', '.join(COLUMNS)} for expiry {expiry}")
+        for name, read in (("postgres", postgres), ("parquet", archive)):
+            rows, ms = timed(read)
+            print(f"{name:<8} {rows:>8} rows in {ms:8.2f} ms")
+    finally:
+        db.rollback()
+        db.query(HistoricalOCSnapshot).filter(HistoricalOCSnapshot.instrument == "BENCH").delete()
+        db.commit()
+        db.close()
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Rows written, table growth and read-back parity of full vs delta (change-only) snapshot storage.
+
+Usage:
+    python -m benchmarks.bench_delta_storage [--minutes 375] [--change-rate 0.2]
+    python -m benchmarks.bench_delta_storage --recorded-date 2025-10-20 --instrument NIFTY
+
+With --recorded-date, every stored minute of that instrument's IST day is replayed (through the
+carry-forward view, so the source day may itself be delta-encoded). Otherwise a synthetic day is
+generated in which each strike changes in a given minute with probability --change-rate.
+
+Both modes write through save_oc_snapshot_task into a throwaway BENCH instrument on a far-future
+date in the configured DATABASE_URL and REDIS_URL; that date's partitions are dropped afterwards.
+"""
+import uuid
+import random
+import argparse
+import importlib
+import statistics
+import time as timer
+import numpy as np
+from sqlalchemy import text
+from datetime import date, datetime, time, timedelta
+
+from db import SessionLocal
+from config import IST_OFFSET, INSTRUMENTS
+from models import OCSummary, HistoricalOCSnapshot
+from processors.oc_chain import CHAIN_FIELDS, parse_oc_chain, chain_from_rows
+from processors.carry_forward import carry_forward_rows
+from processors.payload_store import pack_chain
+from processors.redis_clients import sync_redis
+from processors.snapshot_delta import state_key
+from processors.partitions import ensure_partitions, drop_partitions, partition_name
+from tasks.rollup_historical import carry_forward_bucket_insert
+from benchmarks.synthetic_chain import synthetic_oc_response
+
+save_module = importlib.import_module("tasks.save_oc_snapshot")
+ingest_module = importlib.import_module("processors.ingest")
+
+BENCH_DATE = date(2099, 1, 5)
+BENCH_EXPIRY = "2099-12-31"
+
+def synthetic_day(minutes, change_rate, seed=7):
+    """Yield (ist_minute, underlying_price, chain) for a drifting day where only some strikes tick."""
+    rng = random.Random(seed)
+    instrument = {"SECURITY_ID": "BENCH", "STRIKE_RANGE": 50}
+    underlying_price = 25000.0
+    oc_response = synthetic_oc_response(underlying_price, strikes_each_side=60, seed=seed)
+
+    for m in range(minutes):
+        underlying_price = round(underlying_price + rng.gauss(0, 6), 2)
+        oc_response["last_price"] = underlying_price
+        for legs in oc_response["oc"].values():
+            if rng.random() >= change_rate:
+                continue
+            for leg in legs.values():
+                leg["oi"] += rng.randint(-5000, 5000)
+                leg["volume"] += rng.randint(0, 20000)
+                leg["last_price"] = round(leg["last_price"] * (1 + rng.gauss(0, 0.01)), 2)
+                leg["implied_volatility"] = round(leg["implied_volatility"] + rng.gauss(0, 0.05), 3)
+
+        _, chain = parse_oc_chain(instrument, oc_response)
+        yield datetime.combine(BENCH_DATE, time(9, 15)) + timedelta(minutes=m), underlying_price, chain
+
+def recorded_day(instrument_id, ist_date):
+    """Yield (ist_minute, underlying_price, chain) for the current expiry of a stored IST day."""
+    db = SessionLocal()
+    try:
+        day_start, day_end = datetime.combine(ist_date, time.min), datetime.combine(ist_date, time.max)
+        summaries = db.query(OCSummary).filter(
+            OCSummary.instrument == instrument_id,
+            OCSummary.ist_minute >= day_start,
+            OCSummary.ist_minute <= day_end
+        ).order_by(OCSummary.expiry, OCSummary.ist_minute).all()
+        if not summaries:
+            raise SystemExit(f"No stored minutes for {instrument_id} on {ist_date}")
+
+        current_expiry = summaries[0].expiry
+        for summary in summaries:
+            if summary.expiry != current_expiry:
+                break
+            rows = carry_forward_rows(db, instrument_id, summary.expiry, summary.ist_minute)
+            ist_minute = datetime.combine(BENCH_DATE, summary.ist_minute.time())
+            yield ist_minute, summary.underlying_price, chain_from_rows(rows)
+    finally:
+        db.close()
+
+def chains_equal(stored, source):
+    if not np.array_equal(stored["strike"], source["strike"]):
+        return False
+    return all(np.array_equal(stored[field], source[field], equal_nan=True) for field in CHAIN_FIELDS)
+
+def run(mode, day, strike_range):
+    instrument = {"SECURITY_ID": "BENCH", "STRIKE_RANGE": strike_range}
+    ingest_module.SNAPSHOT_STORAGE = mode
+    sync_redis().delete(state_key("BENCH", BENCH_EXPIRY))
+
+    db = SessionLocal()
+    try:
+        ensure_partitions(db, BENCH_DATE, 1)
+        db.commit()
+
+        durations, rows_written = [], 0
+        for ist_minute, underlying_price, chain in day:
+            payload_key = f"oc:payload:BENCH:{BENCH_EXPIRY}:{uuid.uuid4().hex}"
+            sync_redis().set(payload_key, pack_chain(underlying_price, chain))
+
+            start = timer.perf_counter()
+            rows_written += save_module.save_oc_snapshot_task(
+                instrument, BENCH_EXPIRY, None, None, ist_minute - IST_OFFSET, payload_key
+            )
+            durations.append(timer.perf_counter() - start)
+
+        heap_bytes, total_bytes = db.execute(text(
+            "SELECT pg_relation_size(:name), pg_total_relation_size(:name)"
+        ), {"name": partition_name("oc_minute_snapshots", BENCH_DATE)}).one()
+
+        mismatches = sum(
+            not chains_equal(chain_from_rows(carry_forward_rows(db, "BENCH", BENCH_EXPIRY, ist_minute)), chain)
+            for ist_minute, _, chain in day
+        )
+
+        day_start, day_end = datetime.combine(BENCH_DATE, time.min), datetime.combine(BENCH_DATE + timedelta(days=1), time.min)
+        start = timer.perf_counter()
+        buckets = db.execute(carry_forward_bucket_insert("BENCH", BENCH_EXPIRY, day_start, day_end)).rowcount
+        rollup_sec = timer.perf_counter() - start
+        fingerprint = db.execute(text(
+            f"SELECT md5(string_agg(concat_ws(',', ist_minute, strike, underlying_price, {', '.join(CHAIN_FIELDS)}), ';' "
+            f"ORDER BY ist_minute, strike)) FROM historical_oc_snapshots WHERE instrument = 'BENCH'"
+        )).scalar()
+
+        durations_ms = [d * 1000 for d in durations]
+        print(
+            f"{mode:<6} {rows_written:>7} rows   heap {heap_bytes / 1024:8.0f} KiB   total {total_bytes / 1024:8.0f} KiB   "
+            f"save p50 {statistics.median(durations_ms):6.2f} ms   mismatched minutes {mismatches}   "
+            f"rollup {buckets} rows in {rollup_sec * 1000:.0f} ms ({fingerprint[:8]})"
+        )
+    finally:
+        db.rollback()
+        db.query(HistoricalOCSnapshot).filter(HistoricalOCSnapshot.instrument == "BENCH").delete()
+        drop_partitions(db, BENCH_DATE)
+        db.commit()
+        db.close()
+        sync_redis().delete(state_key("BENCH", BENCH_EXPIRY))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=int, default=375)
+    parser.add_argument("--change-rate", type=float, default=0.2, help="Per-minute probability that a synthetic strike ticks")
+    parser.add_argument("--recorded-date", type=date.fromisoformat, help="Replay this stored IST day instead of a synthetic one")
+    parser.add_argument("--instrument", default="NIFTY")
+    args = parser.parse_args()
+
+    if args.recorded_date:
+        strike_range = next(i["STRIKE_RANGE"] for i in INSTRUMENTS if i["SECURITY_ID"] == args.instrument)
+        day = list(recorded_day(args.instrument, args.recorded_date))
+    else:
+        strike_range = 50
+        day = list(synthetic_day(args.minutes, args.change_rate))
+
+    print(f"{len(day)} minutes")
+    run("full", day, strike_range)
+    run("delta", day, strike_range)
+
+if __name__ == "__main__":
+    main()
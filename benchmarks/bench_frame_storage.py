@@ -0,0 +1,86 @@
+"""Storage size and range-scan speed of row-per-strike history vs packed per-minute frames.
+
+Usage: python -m benchmarks.bench_frame_storage [--days 5]
+
+Seeds 5-minute history for a throwaway BENCH instrument in the configured DATABASE_URL,
+encodes it into historical_oc_frames and deletes both afterwards.
+"""
+import argparse
+import time as timer
+import numpy as np
+from sqlalchemy import insert, text
+from datetime import date, datetime, time, timedelta
+
+from db import SessionLocal
+from models import HistoricalOCSnapshot, HistoricalOCFrame
+from processors.oc_chain import parse_oc_chain, chain_rows, chain_from_rows
+from processors.chain_frame import frames_from_historical, read_frames
+from benchmarks.synthetic_chain import synthetic_oc_response
+
+BENCH_INSTRUMENT = {"SECURITY_ID": "BENCH", "STRIKE_RANGE": 50}
+BENCH_EXPIRY = date(2099, 12, 31)
+# Per-tuple overhead pg_column_size() does not see: heap tuple header plus line pointer
+HEAP_TUPLE_OVERHEAD = 28
+
+def seed(db, days):
+    start_day = date(2099, 1, 5)
+    for d in range(days):
+        for bucket in range(75):
+            ist_minute = datetime.combine(start_day + timedelta(days=d), time(9, 15)) + timedelta(minutes=5 * bucket)
+            underlying_price, chain = parse_oc_chain(BENCH_INSTRUMENT, synthetic_oc_response(25000 + bucket, seed=bucket))
+            rows = chain_rows(chain, "BENCH", BENCH_EXPIRY, underlying_price, ist_minute, ist_minute)
+            db.execute(insert(HistoricalOCSnapshot.__table__).values(rows))
+        db.commit()
+    return datetime.combine(start_day, time.min), datetime.combine(start_day + timedelta(days=days - 1), time.max)
+
+def table_bytes(db, table):
+    count, size = db.execute(text(
+        f"SELECT count(*), coalesce(sum(pg_column_size(t.*)), 0) FROM {table} t WHERE instrument = 'BENCH'"
+    )).one()
+    return count, size + count * HEAP_TUPLE_OVERHEAD
+
+def scan_rows(db, start, end):
+    rows = db.query(HistoricalOCSnapshot).filter(
+        HistoricalOCSnapshot.instrument == "BENCH",
+        HistoricalOCSnapshot.expiry == BENCH_EXPIRY,
+        HistoricalOCSnapshot.ist_minute >= start,
+        HistoricalOCSnapshot.ist_minute <= end
+    ).order_by(HistoricalOCSnapshot.ist_minute).all()
+
+    by_minute = {}
+    for row in rows:
+        by_minute.setdefault(row.ist_minute, []).append(row)
+    return np.stack([chain_from_rows(minute_rows)["net_gex"] for minute_rows in by_minute.values()])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=5)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        start, end = seed(db, args.days)
+        frames_from_historical(db, "BENCH", start, end)
+        db.commit()
+
+        for name, table in (("rows", "historical_oc_snapshots"), ("frames", "historical_oc_frames")):
+            count, size = table_bytes(db, table)
+            print(f"{name:<7} {count:8d} tuples  {size / 1024:10.1f} KiB (heap, excluding indexes)")
+
+        started = timer.perf_counter()
+        row_grid = scan_rows(db, start, end)
+        rows_elapsed = timer.perf_counter() - started
+
+        started = timer.perf_counter()
+        frame_grid = read_frames(db, "BENCH", BENCH_EXPIRY, start, end, fields=["net_gex"])["net_gex"]
+        frames_elapsed = timer.perf_counter() - started
+
+        print(f"range scan of net_gex {row_grid.shape}: rows {rows_elapsed * 1000:.1f} ms, frames {frames_elapsed * 1000:.1f} ms {frame_grid.shape}")
+    finally:
+        db.query(HistoricalOCFrame).filter(HistoricalOCFrame.instrument == "BENCH").delete()
+        db.query(HistoricalOCSnapshot).filter(HistoricalOCSnapshot.instrument == "BENCH").delete()
+        db.commit()
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Latency and accuracy of the Black-Scholes IV/greeks fill on whole synthetic chains.
+
+Usage: python -m benchmarks.bench_greeks [--repeats 500] [--missing 0.3]
+
+Prices every strike of a ±40 and a ±150 strike chain from a known volatility smile, blanks the vendor IV and
+greeks on a random `--missing` share of legs, and times fill_greeks over the chain. The filled IVs
+and greeks are checked against the smile they were priced from. No database is needed.
+"""
+import argparse
+import statistics
+import numpy as np
+import time as timer
+from datetime import datetime
+
+from config import RISK_FREE_RATE
+from processors.oc_chain import compute_gex
+from processors.greeks import SIDES, bs_price, bs_greeks, years_to_expiry, fill_greeks
+
+EXPIRY = "2099-01-08"
+IST_MINUTE = datetime(2099, 1, 5, 11, 0)
+
+def priced_chain(strikes_each_side, missing, seed):
+    """A chain whose last prices and vendor greeks are consistent with a smile, and that smile."""
+    rng = np.random.default_rng(seed)
+    underlying_price = 25000.0
+    strikes = underlying_price + 50.0 * np.arange(-strikes_each_side, strikes_each_side + 1)
+    t = years_to_expiry(EXPIRY, IST_MINUTE)
+    smile = 0.12 + 0.8 * (strikes / underlying_price - 1) ** 2
+
+    chain = {"strike": strikes}
+    for side, is_call in SIDES:
+        chain[f"{side}_last_price"] = np.round(bs_price(underlying_price, strikes, t, RISK_FREE_RATE, smile, is_call), 2)
+        chain[f"{side}_iv"] = smile * 100
+        chain[f"{side}_oi"] = rng.integers(0, 5_000_000, len(strikes)).astype(np.float64)
+        chain[f"{side}_volume"] = rng.integers(0, 50_000_000, len(strikes)).astype(np.float64)
+        for greek, values in bs_greeks(underlying_price, strikes, t, RISK_FREE_RATE, smile, is_call).items():
+            chain[f"{side}_{greek}"] = values
+
+        blank = rng.random(len(strikes)) < missing
+        for field in ("iv", "delta", "theta", "gamma", "vega"):
+            chain[f"{side}_{field}"] = np.where(blank, np.nan, chain[f"{side}_{field}"])
+
+    return underlying_price, compute_gex(chain), smile
+
+def run(strikes_each_side, args):
+    underlying_price, template, smile = priced_chain(strikes_each_side, args.missing, seed=strikes_each_side)
+    durations = []
+    for _ in range(args.repeats):
+        chain = {field: column.copy() for field, column in template.items()}
+        start = timer.perf_counter()
+        report = fill_greeks(chain, underlying_price, EXPIRY, IST_MINUTE)
+        durations.append(timer.perf_counter() - start)
+
+    t = years_to_expiry(EXPIRY, IST_MINUTE)
+    # Strikes whose out-of-the-money premium rounds to a few ticks carry no volatility information
+    priced = np.minimum(template["call_last_price"], template["put_last_price"]) >= 0.5
+    iv_error = max(np.nanmax(np.abs(chain[f"{side}_iv"] - smile * 100)[priced]) for side, _ in SIDES)
+    gamma_error = max(
+        np.nanmax(np.abs(chain[f"{side}_gamma"] / bs_greeks(underlying_price, chain["strike"], t, RISK_FREE_RATE, smile, is_call)["gamma"] - 1)[priced])
+        for side, is_call in SIDES
+    )
+    unfilled = sum(int(np.isnan(chain[f"{side}_gamma"]).sum()) for side, _ in SIDES)
+
+    us = [d * 1e6 for d in durations]
+    print(f"{len(template['strike']):>4} strikes  p50 {statistics.median(us):8.1f} us   p99 {np.percentile(us, 99):8.1f} us   "
+          f"filled {sum(report['filled'].values()):>5}   unfilled legs {unfilled:>3}   "
+          f"max IV error {iv_error:.3f} vol pts   max gamma error {gamma_error * 100:.2f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=500)
+    parser.add_argument("--missing", type=float, default=0.3)
+    args = parser.parse_args()
+
+    for strikes_each_side in (40, 150):
+        run(strikes_each_side, args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Rows read and query time for a long-range summary chart, 5-minute history vs the auto-picked tier.
+
+Usage: python -m benchmarks.bench_history_tiers [--days 90] [--expiries 3] [--max-points 500]
+
+Seeds 5-minute historical_oc_summary rows for a throwaway BENCH instrument on far-future dates in
+the configured DATABASE_URL, builds the coarser tiers with the backfill task and deletes both afterwards.
+"""
+import random
+import argparse
+import statistics
+import time as timer
+from sqlalchemy import insert
+from datetime import date, datetime, time, timedelta
+
+from db import SessionLocal
+from models import HistoricalOCSummary, HistoricalOCSummaryTier, TIER_METRICS
+from processors.history_tiers import choose_tier, history_query
+from tasks.backfill_tiers import backfill_summary_tiers_task
+from utils import is_trading_day
+
+START_DAY = date(2099, 1, 5)
+
+def seed(db, days, expiries):
+    rng = random.Random(3)
+    trading_days = [d for d in (START_DAY + timedelta(days=i) for i in range(days)) if is_trading_day(d)]
+    for ist_date in trading_days:
+        # Weekly expiries, the nearest one at least today
+        first_expiry = ist_date + timedelta(days=(3 - ist_date.weekday()) % 7)
+        rows = []
+        for bucket in range(75):
+            ist_minute = datetime.combine(ist_date, time(9, 15)) + timedelta(minutes=5 * bucket)
+            for e in range(expiries):
+                rows.append({
+                    "ist_minute": ist_minute,
+                    "instrument": "BENCH",
+                    "expiry": first_expiry + timedelta(weeks=e),
+                    **{metric: rng.uniform(-1e5, 1e5) for metric in TIER_METRICS},
+                })
+        db.execute(insert(HistoricalOCSummary.__table__), rows)
+    db.commit()
+    return trading_days
+
+def timed_read(db, tier, start, end, repeats=5):
+    durations, rows = [], []
+    for _ in range(repeats):
+        started = timer.perf_counter()
+        rows = db.execute(history_query("BENCH", tier, start, end, ["total_net_gex", "gamma_flip_level"])).all()
+        durations.append(timer.perf_counter() - started)
+    return len(rows), statistics.median(durations) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--expiries", type=int, default=3)
+    parser.add_argument("--max-points", type=int, default=500)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        trading_days = seed(db, args.days, args.expiries)
+        backfill_summary_tiers_task.run(trading_days[0].isoformat(), trading_days[-1].isoformat())
+
+        start, end = datetime.combine(trading_days[0], time.min), datetime.combine(trading_days[-1], time.max)
+        auto_tier = choose_tier(start, end, args.max_points)
+        print(f"{len(trading_days)} trading days, front-expiry series of total_net_gex and gamma_flip_level")
+        for tier in dict.fromkeys(["5m", auto_tier]):
+            rows, ms = timed_read(db, tier, start, end)
+            print(f"{tier:<4} {rows:>7} points in {ms:8.2f} ms")
+    finally:
+        db.rollback()
+        db.query(HistoricalOCSummaryTier).filter(HistoricalOCSummaryTier.instrument == "BENCH").delete()
+        db.query(HistoricalOCSummary).filter(HistoricalOCSummary.instrument == "BENCH").delete()
+        db.commit()
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""IV surface build cost, and reading it back versus pivoting the snapshot rows it is built from.
+
+Usage: python -m benchmarks.bench_iv_surface [--expiries 7] [--repeats 50]
+
+Writes one minute of a throwaway BENCH instrument on a far-future date to the configured
+DATABASE_URL through persist_minute, then times write_surface and compares one iv_surfaces read
+with selecting every expiry's strike IVs from oc_minute_snapshots and pivoting them client-side.
+The date's partitions and the surface rows are dropped afterwards.
+"""
+import argparse
+import statistics
+import numpy as np
+import time as timer
+from sqlalchemy import select
+from datetime import date, datetime, time, timedelta
+
+from db import SessionLocal
+from models import OCMinuteSnapshot, IVSurface
+from processors.oc_chain import parse_oc_chain
+from processors.ingest import persist_minute
+from processors.partitions import ensure_partitions, drop_partitions
+from processors.iv_surface import write_surface, decode_surface
+from benchmarks.synthetic_chain import synthetic_oc_response
+
+BENCH_INSTRUMENT = {"SECURITY_ID": "BENCH", "STRIKE_RANGE": 50}
+BENCH_MINUTE = datetime.combine(date(2099, 1, 5), time(11, 0))
+
+def timed(run, repeats):
+    durations = []
+    for _ in range(repeats):
+        start = timer.perf_counter()
+        result = run()
+        durations.append(timer.perf_counter() - start)
+    return result, statistics.median(durations) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--expiries", type=int, default=7)
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        ensure_partitions(db, BENCH_MINUTE.date(), 1)
+        for e in range(args.expiries):
+            expiry = (date(2099, 1, 8) + timedelta(weeks=e)).isoformat()
+            underlying_price, chain = parse_oc_chain(BENCH_INSTRUMENT, synthetic_oc_response(25000, seed=e))
+            persist_minute(db, BENCH_INSTRUMENT, expiry, underlying_price, chain, BENCH_MINUTE, BENCH_MINUTE)
+        db.commit()
+
+        def build():
+            surface = write_surface(db, "BENCH", BENCH_MINUTE)
+            db.commit()
+            return surface
+
+        def read_surface():
+            return decode_surface(db.execute(select(IVSurface).where(
+                IVSurface.instrument == "BENCH", IVSurface.ist_minute == BENCH_MINUTE
+            )).scalar_one())
+
+        def pivot_rows():
+            table = OCMinuteSnapshot.__table__
+            rows = db.execute(select(table.c.expiry, table.c.strike, table.c.call_iv, table.c.put_iv).where(
+                table.c.instrument == "BENCH", table.c.ist_minute == BENCH_MINUTE
+            )).all()
+            expiries = sorted({row.expiry for row in rows})
+            strikes = np.unique([row.strike for row in rows])
+            grid = np.full((len(expiries), len(strikes)), np.nan)
+            for row in rows:
+                iv = row.call_iv if row.strike >= 25000 else row.put_iv
+                grid[expiries.index(row.expiry), np.searchsorted(strikes, row.strike)] = np.nan if iv is None else iv
+            return grid
+
+        surface, build_ms = timed(build, args.repeats)
+        _, read_ms = timed(read_surface, args.repeats)
+        grid, pivot_ms = timed(pivot_rows, args.repeats)
+
+        print(f"{len(surface['expiries'])} expiries x {surface['strike_count']} strikes, "
+              f"grid {len(surface['iv_grid']) / 1024:.1f} KiB")
+        print(f"build + upsert surface   {build_ms:8.2f} ms")
+        print(f"read stored surface      {read_ms:8.2f} ms")
+        print(f"select + pivot rows      {pivot_ms:8.2f} ms  ({grid.size} cells)")
+    finally:
+        db.rollback()
+        db.query(IVSurface).filter(IVSurface.instrument == "BENCH").delete()
+        drop_partitions(db, BENCH_MINUTE.date())
+        db.commit()
+        db.close()
+
+if __name__ == "__main__":
+    main()
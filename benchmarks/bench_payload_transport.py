@@ -0,0 +1,71 @@
+"""Broker bytes and transport latency of the inline JSON payload vs the claim-check binary payload.
+
+Usage: python -m benchmarks.bench_payload_transport [--iterations 200] [--strikes-each-side 150] [--redis]
+
+Without --redis only serialization cost is measured; with it the blob round-trips through REDIS_URL.
+"""
+import argparse
+import statistics
+import time as timer
+from datetime import datetime
+
+from kombu.utils.json import dumps, loads
+
+from config import INSTRUMENTS
+from processors.oc_chain import parse_oc_chain
+from processors.payload_store import pack_chain, unpack_chain
+from processors.redis_clients import sync_redis
+from benchmarks.synthetic_chain import synthetic_oc_response
+
+def task_message(*args):
+    """Approximate the body Celery puts on the broker for save_oc_snapshot_task.delay(*args)."""
+    return dumps([list(args), {}, {"callbacks": None, "errbacks": None, "chain": None, "chord": None}])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--strikes-each-side", type=int, default=150)
+    parser.add_argument("--redis", action="store_true")
+    args = parser.parse_args()
+
+    instrument = INSTRUMENTS[0]
+    expiry = "2099-12-31"
+    redis = sync_redis() if args.redis else None
+    inline_bytes, claim_bytes = [], []
+    inline_ms, claim_ms = [], []
+
+    for i in range(args.iterations):
+        oc_response = synthetic_oc_response(25000, instrument["STRIKE_RANGE"], args.strikes_each_side, seed=i)
+        now = datetime.utcnow()
+
+        # Inline: the raw chain is serialized on enqueue and parsed by the worker
+        start = timer.perf_counter()
+        message = task_message(instrument, expiry, oc_response, None, now)
+        received = loads(message)
+        parse_oc_chain(instrument, received[0][2])
+        inline_ms.append((timer.perf_counter() - start) * 1000)
+        inline_bytes.append(len(message))
+
+        # Claim check: the fetcher trims and packs, the worker unpacks
+        start = timer.perf_counter()
+        blob = pack_chain(*parse_oc_chain(instrument, oc_response))
+        key = f"bench:payload:{i}"
+        message = task_message(instrument, expiry, None, None, now, key)
+        if redis:
+            redis.set(key, blob, ex=60)
+        received = loads(message)
+        if redis:
+            blob = redis.get(received[0][5])
+            redis.delete(key)
+        unpack_chain(blob)
+        claim_ms.append((timer.perf_counter() - start) * 1000)
+        claim_bytes.append(len(message) + len(blob))
+
+    for name, sizes, latencies in (("inline", inline_bytes, inline_ms), ("claim_check", claim_bytes, claim_ms)):
+        print(
+            f"{name:<12} broker+store bytes {statistics.mean(sizes):10.0f}   "
+            f"p50 {statistics.median(latencies):7.3f} ms   max {max(latencies):7.3f} ms"
+        )
+
+if __name__ == "__main__":
+    main()
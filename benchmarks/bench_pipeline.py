@@ -0,0 +1,169 @@
+"""End-to-end benchmark of fetch -> save_oc_snapshot_task -> oc_summary_task -> rollup against a local Dhan stub.
+
+Usage: python -m benchmarks.bench_pipeline [--cycles 5] [--strikes-each-side 150] [--latency-ms 150] [--broker] [--rollup]
+                                           [--ingest-mode celery|inprocess]
+
+Run it against a scratch local Postgres and Redis: it captures the configured INSTRUMENTS for
+today's IST date, and --rollup rolls today's rows into the historical tables.
+
+By default Celery tasks run eagerly in-process; with --broker they go through REDIS_URL to a
+running worker and the save stage measures enqueue-to-commit via the result backend. With
+--ingest-mode inprocess, chains go to the batched in-process writer instead and the same stage
+measures queue-to-commit.
+"""
+import os
+import sys
+import time as timer
+import asyncio
+import argparse
+import threading
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--strikes-each-side", type=int, default=150)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--expiries", type=int, default=7)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--broker", action="store_true", help="Send tasks to a running Celery worker instead of running them eagerly")
+    parser.add_argument("--rollup", action="store_true", help="Also time rollup_day for today's data")
+    parser.add_argument("--ingest-mode", choices=["celery", "inprocess"], default="celery")
+    return parser.parse_args()
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+def report(stages, elapsed, rows_written, chains):
+    print(f"\n{chains} chains in {elapsed:.2f}s ({chains / elapsed:.2f} chains/s), {rows_written} rows ({rows_written / elapsed:.0f} rows/s)")
+    print(f"{'stage':<22}{'count':>7}{'p50 ms':>11}{'p99 ms':>11}{'max ms':>11}")
+    for name, durations in stages.items():
+        if not durations:
+            continue
+        ms = [d * 1000 for d in durations]
+        print(f"{name:<22}{len(ms):>7}{statistics.median(ms):>11.1f}{percentile(ms, 0.99):>11.1f}{max(ms):>11.1f}")
+
+def main():
+    args = parse_args()
+
+    # Point the pipeline at the stub before any project module reads config
+    os.environ["DHAN_API_URL"] = f"http://127.0.0.1:{args.port}"
+    os.environ.setdefault("DHAN_ACCESS_TOKEN", "bench")
+    os.environ.setdefault("DHAN_CLIENT_ID", "bench")
+    os.environ["INGEST_MODE"] = args.ingest_mode
+    sys.argv = sys.argv[:1]
+
+    import uvicorn
+    from datetime import datetime, time
+
+    from config import IST_OFFSET, INSTRUMENTS
+    from db import SessionLocal
+    from celery_config import celery_app
+    from processors.partitions import ensure_partitions
+    from processors.ingest import ingest_writer, minute_stamp
+    from tasks.compute_summary import oc_summary_task
+    from tasks.rollup_historical import rollup_day
+    import processors.fetch_oc_snapshot as fetch_module
+    from benchmarks.dhan_stub import create_app
+
+    celery_app.conf.task_always_eager = not args.broker
+
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(args.strikes_each_side, args.latency_ms, args.expiries), host="127.0.0.1", port=args.port, log_level="warning"
+    ))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        timer.sleep(0.05)
+
+    stages = {"fetch chain": [], "cycle": [], "enqueue -> commit": [], "summary recompute": [], "rollup": []}
+    saved = []
+    pending = []
+    waiter = ThreadPoolExecutor(max_workers=32)
+
+    fetch_chain = fetch_module.fetch_chain_for_expiry
+    async def timed_fetch_chain(*fargs):
+        start = timer.perf_counter()
+        try:
+            return await fetch_chain(*fargs)
+        finally:
+            stages["fetch chain"].append(timer.perf_counter() - start)
+    fetch_module.fetch_chain_for_expiry = timed_fetch_chain
+
+    save_task = fetch_module.save_oc_snapshot_task
+    def wait_for(result, instrument, expiry, ist_minute, start):
+        rows = result.get(timeout=120)
+        stages["enqueue -> commit"].append(timer.perf_counter() - start)
+        saved.append((instrument["SECURITY_ID"], expiry, ist_minute, rows or 0))
+    class TimedSave:
+        def delay(self, instrument, expiry, oc_response, closing_snapshot_time, captured_at, *rest):
+            start = timer.perf_counter()
+            ist_minute = (captured_at + IST_OFFSET).replace(second=0, microsecond=0)
+            result = save_task.delay(instrument, expiry, oc_response, closing_snapshot_time, captured_at, *rest)
+            pending.append(waiter.submit(wait_for, result, instrument, expiry, ist_minute, start))
+            return result
+    fetch_module.save_oc_snapshot_task = TimedSave()
+
+    submitted = {}
+    submit = ingest_writer.submit
+    async def timed_submit(instrument, expiry, underlying_price, chain, closing_snapshot_time, captured_at):
+        _, ist_minute = minute_stamp(captured_at, closing_snapshot_time)
+        submitted.setdefault((instrument["SECURITY_ID"], expiry, ist_minute), []).append(timer.perf_counter())
+        await submit(instrument, expiry, underlying_price, chain, closing_snapshot_time, captured_at)
+    ingest_writer.submit = timed_submit
+
+    flush = ingest_writer.flush
+    def timed_flush(batch):
+        written = flush(batch)
+        for record in written:
+            key = (record["instrument_id"], record["expiry"], record["ist_minute"])
+            stages["enqueue -> commit"].append(timer.perf_counter() - submitted[key].pop(0))
+            saved.append((*key, record["inserted"]))
+        return written
+    ingest_writer.flush = timed_flush
+
+    with SessionLocal() as db:
+        today_ist = (datetime.utcnow() + IST_OFFSET).date()
+        ensure_partitions(db, today_ist, 1)
+        db.commit()
+
+    async def run_cycles():
+        writer = asyncio.create_task(ingest_writer.run())
+        # Every expiry tier is due at the open, so each cycle polls the full expiry list
+        open_slot = datetime.combine(today_ist, time(9, 15))
+        for _ in range(args.cycles):
+            start = timer.perf_counter()
+            await fetch_module.fetcher(open_slot)
+            stages["cycle"].append(timer.perf_counter() - start)
+
+        # Let the in-process writer commit everything that was queued
+        while any(submitted.values()):
+            await asyncio.sleep(0.05)
+        writer.cancel()
+
+    started = timer.perf_counter()
+    asyncio.run(run_cycles())
+    for future in pending:
+        future.result()
+    elapsed = timer.perf_counter() - started
+
+    # Recompute path and rollup, run directly so they are timed in-process
+    for instrument_id, expiry, ist_minute in sorted({key[:3] for key in saved}):
+        start = timer.perf_counter()
+        oc_summary_task.run(instrument_id, expiry, ist_minute)
+        stages["summary recompute"].append(timer.perf_counter() - start)
+
+    if args.rollup:
+        with SessionLocal() as db:
+            for instrument in INSTRUMENTS:
+                start = timer.perf_counter()
+                rollup_day(db, instrument["SECURITY_ID"], today_ist)
+                stages["rollup"].append(timer.perf_counter() - start)
+            db.commit()
+
+    server.should_exit = True
+    report(stages, elapsed, sum(rows for *_, rows in saved), len(saved))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Throughput of the replay engine over recorded raw payloads, and the implied time for a year of history.
+
+Usage: python -m benchmarks.bench_replay [--days 3] [--expiries 2] [--workers 1 2 4]
+
+Records synthetic NIFTY option chain payloads for far-future trading days into a temporary payload
+directory, replays them into the configured DATABASE_URL with each pool size and deletes the
+resulting historical_oc_summary and tier rows afterwards.
+"""
+import random
+import shutil
+import argparse
+import tempfile
+import time as timer
+from datetime import date, datetime, time, timedelta
+
+from db import SessionLocal
+from config import INSTRUMENTS, IST_OFFSET
+from models import HistoricalOCSummary, HistoricalOCSummaryTier
+from processors.raw_payloads import record_payload
+from processors.replay import replay
+from utils import is_trading_day
+from benchmarks.synthetic_chain import synthetic_oc_response
+
+START_DAY = date(2099, 1, 5)
+SESSION_MINUTES = 375
+TRADING_DAYS_PER_YEAR = 250
+
+def record_days(root, days, expiries):
+    rng = random.Random(11)
+    trading_days = [d for d in (START_DAY + timedelta(days=i) for i in range(days * 2)) if is_trading_day(d)][:days]
+    payloads = 0
+    for ist_date in trading_days:
+        for e in range(expiries):
+            expiry = (ist_date + timedelta(days=(3 - ist_date.weekday()) % 7 + 7 * e)).isoformat()
+            underlying_price = 25000.0
+            oc_response = synthetic_oc_response(underlying_price, strikes_each_side=60, seed=e)
+            for m in range(SESSION_MINUTES):
+                ist_minute = datetime.combine(ist_date, time(9, 15)) + timedelta(minutes=m)
+                underlying_price = round(underlying_price + rng.gauss(0, 6), 2)
+                oc_response["last_price"] = underlying_price
+                record_payload("NIFTY", expiry, ist_minute, ist_minute - IST_OFFSET + timedelta(seconds=5), None, oc_response, root)
+                payloads += 1
+    return trading_days, payloads
+
+def cleanup(trading_days):
+    db = SessionLocal()
+    try:
+        day_start = datetime.combine(trading_days[0], time.min)
+        day_end = datetime.combine(trading_days[-1], time.max)
+        for model in (HistoricalOCSummary, HistoricalOCSummaryTier):
+            db.query(model).filter(
+                model.instrument == "NIFTY", model.ist_minute >= day_start, model.ist_minute <= day_end
+            ).delete()
+        db.commit()
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--expiries", type=int, default=2)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="oc-payloads-")
+    trading_days = []
+    try:
+        trading_days, payloads = record_days(root, args.days, args.expiries)
+        year_payloads = TRADING_DAYS_PER_YEAR * SESSION_MINUTES * sum(i["EXPIRIES"] for i in INSTRUMENTS)
+        print(f"{payloads} recorded payloads over {len(trading_days)} days; a year is about {year_payloads} payloads")
+
+        for workers in args.workers:
+            started = timer.perf_counter()
+            totals = replay("payloads", trading_days[0], trading_days[-1], ["NIFTY"], workers, root)
+            elapsed = timer.perf_counter() - started
+            rate = totals["minutes"] / elapsed
+            print(f"{workers:>2} workers  {totals['minutes']:>7} minutes in {elapsed:6.2f}s  "
+                  f"{rate:8.0f} payloads/s  year ~ {year_payloads / rate / 60:6.1f} min")
+    finally:
+        if trading_days:
+            cleanup(trading_days)
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
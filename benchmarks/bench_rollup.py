@@ -0,0 +1,147 @@
+"""Compare the legacy per-row rollup with the set-based SQL rollup on a seeded multi-day dataset.
+
+Usage: python -m benchmarks.bench_rollup [--days 3] [--expiries 3] [--minutes 375]
+
+Seeds a throwaway BENCH instrument on far-future dates in the configured DATABASE_URL twice
+(cleanup drops those days' partitions) and deletes its historical rows afterwards.
+"""
+import argparse
+import time as timer
+from sqlalchemy import func
+from datetime import date, datetime, time, timedelta
+
+from db import SessionLocal
+from models import OCMinuteSnapshot, OCSummary, HistoricalOCSnapshot, HistoricalOCSummary, HistoricalOCSummaryTier, RollupWatermark
+from processors.oc_chain import parse_oc_chain, chain_rows
+from processors.summary_engine import compute_summary
+from processors.snapshot_writer import replace_minute_snapshot, replace_minute_summary
+from processors.partitions import ensure_partitions
+from processors.clean_intraday_data import cleanup_intraday_data
+from tasks.rollup_historical import rollup_day
+from benchmarks.synthetic_chain import synthetic_oc_response
+
+BENCH_INSTRUMENT = {"SECURITY_ID": "BENCH", "STRIKE_RANGE": 50}
+
+def legacy_rollup_day(db, instrument, ist_date):
+    """The rollup_historical_task body before it moved to set-based SQL."""
+    day_start = datetime.combine(ist_date, time.min)
+    day_end = datetime.combine(ist_date, time.max)
+
+    current_expiry = db.query(func.min(OCMinuteSnapshot.expiry)).filter(
+        OCMinuteSnapshot.instrument == instrument,
+        OCMinuteSnapshot.ist_minute >= day_start,
+        OCMinuteSnapshot.ist_minute <= day_end
+    ).scalar()
+
+    if current_expiry:
+        minute_rows = db.query(OCMinuteSnapshot).filter(
+            OCMinuteSnapshot.instrument == instrument,
+            OCMinuteSnapshot.expiry == current_expiry,
+            OCMinuteSnapshot.ist_minute >= day_start,
+            OCMinuteSnapshot.ist_minute <= day_end
+        ).all()
+
+        snapshots_by_5min = {}
+        for row in minute_rows:
+            bucket_time = row.ist_minute.replace(minute=(row.ist_minute.minute // 5) * 5, second=0, microsecond=0)
+            key = (row.instrument, row.expiry, row.strike, bucket_time)
+            if key not in snapshots_by_5min or row.ist_minute > snapshots_by_5min[key].ist_minute:
+                snapshots_by_5min[key] = row
+
+        for (instrument, expiry, strike, bucket_time), row in snapshots_by_5min.items():
+            exists = db.query(HistoricalOCSnapshot).filter_by(
+                instrument=instrument, expiry=expiry, strike=strike, ist_minute=bucket_time
+            ).first()
+            if not exists:
+                new_row_data = {c.name: getattr(row, c.name) for c in OCMinuteSnapshot.__table__.columns}
+                new_row_data['ist_minute'] = bucket_time
+                db.add(HistoricalOCSnapshot(**new_row_data))
+
+    summary_rows = db.query(OCSummary).filter(
+        OCSummary.instrument == instrument,
+        OCSummary.ist_minute >= day_start,
+        OCSummary.ist_minute <= day_end
+    ).all()
+
+    summary_by_5min = {}
+    for row in summary_rows:
+        bucket_time = row.ist_minute.replace(minute=(row.ist_minute.minute // 5) * 5, second=0, microsecond=0)
+        key = (row.instrument, row.expiry, bucket_time)
+        if key not in summary_by_5min or row.ist_minute > summary_by_5min[key].ist_minute:
+            summary_by_5min[key] = row
+
+    for (instrument, expiry, bucket_time), row in summary_by_5min.items():
+        exists = db.query(HistoricalOCSummary).filter_by(
+            instrument=instrument, expiry=expiry, ist_minute=bucket_time
+        ).first()
+        if not exists:
+            new_row_data = {c.name: getattr(row, c.name) for c in HistoricalOCSummary.__table__.columns}
+            new_row_data['ist_minute'] = bucket_time
+            db.add(HistoricalOCSummary(**new_row_data))
+
+
+def bench_days(days):
+    return [date(2099, 1, 5) + timedelta(days=d) for d in range(days)]
+
+def seed(db, days, expiries, minutes):
+    instrument_id = BENCH_INSTRUMENT["SECURITY_ID"]
+    rows_written = 0
+
+    ensure_partitions(db, days[0], len(days))
+    for ist_date in days:
+        for e in range(expiries):
+            expiry = (date(2099, 12, 3) + timedelta(weeks=e)).isoformat()
+            for m in range(minutes):
+                ist_minute = datetime.combine(ist_date, time(9, 15)) + timedelta(minutes=m)
+                underlying_price, chain = parse_oc_chain(
+                    BENCH_INSTRUMENT, synthetic_oc_response(25000 + m % 40, strikes_each_side=45, seed=m)
+                )
+                rows = chain_rows(chain, instrument_id, expiry, underlying_price, ist_minute, ist_minute)
+                rows_written += replace_minute_snapshot(db, instrument_id, expiry, ist_minute, rows)
+                replace_minute_summary(db, instrument_id, expiry, ist_minute, compute_summary(chain, underlying_price, 50))
+        db.commit()
+
+    return rows_written
+
+def clear_historical(db):
+    instrument_id = BENCH_INSTRUMENT["SECURITY_ID"]
+    db.query(HistoricalOCSnapshot).filter(HistoricalOCSnapshot.instrument == instrument_id).delete()
+    db.query(HistoricalOCSummary).filter(HistoricalOCSummary.instrument == instrument_id).delete()
+    db.query(HistoricalOCSummaryTier).filter(HistoricalOCSummaryTier.instrument == instrument_id).delete()
+    db.query(RollupWatermark).filter(RollupWatermark.instrument == instrument_id).delete()
+    db.commit()
+
+def run(name, rollup, args):
+    db = SessionLocal()
+    try:
+        days = bench_days(args.days)
+        rows = seed(db, days, args.expiries, args.minutes)
+
+        start = timer.perf_counter()
+        for ist_date in days:
+            rollup(db, BENCH_INSTRUMENT["SECURITY_ID"], ist_date)
+        for ist_date in days:
+            cleanup_intraday_data(db, ist_date)
+        db.commit()
+        elapsed = timer.perf_counter() - start
+
+        buckets = db.query(func.count()).select_from(HistoricalOCSnapshot).filter(
+            HistoricalOCSnapshot.instrument == BENCH_INSTRUMENT["SECURITY_ID"]
+        ).scalar()
+        print(f"{name:<10} {rows} minute rows over {args.days} days -> {buckets} buckets in {elapsed:.2f}s")
+    finally:
+        clear_historical(db)
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--expiries", type=int, default=3)
+    parser.add_argument("--minutes", type=int, default=375)
+    args = parser.parse_args()
+
+    run("legacy", legacy_rollup_day, args)
+    run("set-based", rollup_day, args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Compare the legacy per-row ORM write against the bulk DELETE + COPY replace.
+
+Usage: python -m benchmarks.bench_save_snapshot --iterations 50
+
+Writes to a throwaway BENCH instrument in the configured DATABASE_URL and deletes it afterwards.
+"""
+import argparse
+import statistics
+import time as timer
+from datetime import datetime, timedelta
+
+from db import SessionLocal
+from models import OCMinuteSnapshot
+from processors.oc_chain import parse_oc_chain, chain_rows
+from processors.partitions import ensure_partitions
+from processors.snapshot_writer import replace_minute_snapshot
+from benchmarks.synthetic_chain import synthetic_oc_response
+
+BENCH_INSTRUMENT = {"SECURITY_ID": "BENCH", "STRIKE_RANGE": 50}
+BENCH_EXPIRY = "2099-12-31"
+
+def write_orm(db, rows, ist_minute):
+    db.query(OCMinuteSnapshot).filter(
+        OCMinuteSnapshot.instrument == BENCH_INSTRUMENT["SECURITY_ID"],
+        OCMinuteSnapshot.expiry == BENCH_EXPIRY,
+        OCMinuteSnapshot.ist_minute == ist_minute
+    ).delete()
+    for row in rows:
+        db.add(OCMinuteSnapshot(**row))
+    db.commit()
+
+def write_bulk(db, rows, ist_minute):
+    replace_minute_snapshot(db, BENCH_INSTRUMENT["SECURITY_ID"], BENCH_EXPIRY, ist_minute, rows)
+    db.commit()
+
+def run(writer, iterations, rewrite):
+    db = SessionLocal()
+    durations = []
+    base_minute = datetime(2099, 1, 1, 9, 15)
+
+    try:
+        ensure_partitions(db, base_minute.date(), 1)
+        for i in range(iterations):
+            oc_response = synthetic_oc_response(seed=i)
+            ist_minute = base_minute if rewrite else base_minute + timedelta(minutes=i)
+            underlying_price, chain = parse_oc_chain(BENCH_INSTRUMENT, oc_response)
+            rows = chain_rows(chain, BENCH_INSTRUMENT["SECURITY_ID"], BENCH_EXPIRY, underlying_price, datetime.utcnow(), ist_minute)
+
+            start = timer.perf_counter()
+            writer(db, rows, ist_minute)
+            durations.append(timer.perf_counter() - start)
+    finally:
+        db.query(OCMinuteSnapshot).filter(OCMinuteSnapshot.instrument == BENCH_INSTRUMENT["SECURITY_ID"]).delete()
+        db.commit()
+        db.close()
+
+    return durations
+
+def report(name, durations):
+    durations_ms = sorted(d * 1000 for d in durations)
+    p99 = durations_ms[min(len(durations_ms) - 1, int(len(durations_ms) * 0.99))]
+    print(f"{name:<12} mean {statistics.mean(durations_ms):8.2f} ms   p50 {statistics.median(durations_ms):8.2f} ms   p99 {p99:8.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--rewrite", action="store_true", help="Rewrite the same minute every iteration to include the delete cost")
+    args = parser.parse_args()
+
+    report("orm", run(write_orm, args.iterations, args.rewrite))
+    report("bulk", run(write_bulk, args.iterations, args.rewrite))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Intraday snapshot write cost of the natural-key upsert, with and without the old net/abs GEX indexes.
+
+Usage: python -m benchmarks.bench_snapshot_indexes [--minutes 200] [--expiries 7] [--strikes-each-side 40]
+
+Writes a throwaway BENCH instrument on a far-future date in the configured DATABASE_URL through
+replace_minute_snapshot, first on the current schema and then with ix_snapshots_netgex and
+ix_snapshots_absgex recreated. A rewrite pass of the same minutes measures the conflict path.
+The date's partitions (and with them the temporary indexes' partitions) are dropped afterwards.
+"""
+import argparse
+import statistics
+import time as timer
+from sqlalchemy import text
+from datetime import date, datetime, time, timedelta
+
+from db import SessionLocal
+from processors.oc_chain import parse_oc_chain, chain_rows
+from processors.partitions import ensure_partitions, drop_partitions, partition_name
+from processors.snapshot_writer import replace_minute_snapshot
+from benchmarks.synthetic_chain import synthetic_oc_response
+
+BENCH_INSTRUMENT = {"SECURITY_ID": "BENCH", "STRIKE_RANGE": 50}
+BENCH_DATE = date(2099, 1, 5)
+GEX_INDEXES = {
+    "ix_snapshots_netgex": "ist_minute, instrument, net_gex",
+    "ix_snapshots_absgex": "ist_minute, instrument, abs_gex",
+}
+
+def minute_writes(minutes, expiries, strikes_each_side):
+    writes = []
+    for m in range(minutes):
+        ist_minute = datetime.combine(BENCH_DATE, time(9, 15)) + timedelta(minutes=m)
+        underlying_price, chain = parse_oc_chain(
+            BENCH_INSTRUMENT, synthetic_oc_response(25000 + m % 40, strikes_each_side=strikes_each_side, seed=m)
+        )
+        for e in range(expiries):
+            expiry = (date(2099, 12, 3) + timedelta(weeks=e)).isoformat()
+            writes.append((expiry, ist_minute, chain_rows(chain, "BENCH", expiry, underlying_price, ist_minute, ist_minute)))
+    return writes
+
+def timed_pass(db, writes):
+    durations = []
+    for expiry, ist_minute, rows in writes:
+        start = timer.perf_counter()
+        replace_minute_snapshot(db, "BENCH", expiry, ist_minute, rows)
+        db.commit()
+        durations.append(timer.perf_counter() - start)
+    return durations
+
+def run(label, writes, with_gex_indexes):
+    db = SessionLocal()
+    try:
+        ensure_partitions(db, BENCH_DATE, 1)
+        if with_gex_indexes:
+            for name, columns in GEX_INDEXES.items():
+                db.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON oc_minute_snapshots ({columns})"))
+        db.commit()
+
+        inserts = timed_pass(db, writes)
+        rewrites = timed_pass(db, writes)
+        total_bytes = db.execute(text("SELECT pg_total_relation_size(:name)"), {
+            "name": partition_name("oc_minute_snapshots", BENCH_DATE)
+        }).scalar()
+
+        rows = sum(len(r) for *_, r in writes)
+        for name, durations in (("insert", inserts), ("rewrite", rewrites)):
+            ms = [d * 1000 for d in durations]
+            print(f"{label:<20} {name:<8} p50 {statistics.median(ms):7.2f} ms   mean {statistics.mean(ms):7.2f} ms   "
+                  f"{rows / sum(durations):9.0f} rows/s")
+        print(f"{label:<20} partition size {total_bytes / 1024 / 1024:.1f} MiB")
+    finally:
+        db.rollback()
+        drop_partitions(db, BENCH_DATE)
+        if with_gex_indexes:
+            for name in GEX_INDEXES:
+                db.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        db.commit()
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=int, default=200)
+    parser.add_argument("--expiries", type=int, default=7)
+    parser.add_argument("--strikes-each-side", type=int, default=40)
+    args = parser.parse_args()
+
+    writes = minute_writes(args.minutes, args.expiries, args.strikes_each_side)
+    print(f"{len(writes)} minute writes, {sum(len(r) for *_, r in writes)} rows per pass")
+    run("natural key", writes, with_gex_indexes=False)
+    run("+ net/abs GEX index", writes, with_gex_indexes=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Local stand-in for Dhan's /optionchain and /optionchain/expirylist endpoints.
+
+Usage: python -m benchmarks.dhan_stub [--port 8765] [--strikes-each-side 150] [--latency-ms 150] [--expiries 7]
+
+Serves synthetic chains whose spot drifts on every request, so consecutive minutes differ.
+"""
+import random
+import asyncio
+import argparse
+from datetime import date, timedelta
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from benchmarks.synthetic_chain import synthetic_oc_response
+
+SPOTS = {13: (25000.0, 50), 25: (56000.0, 100)}
+
+def upcoming_expiries(count, start=None):
+    """The next `count` weekly (Thursday) expiries from `start`."""
+    day = start or date.today()
+    day += timedelta(days=(3 - day.weekday()) % 7)
+    return [(day + timedelta(weeks=i)).isoformat() for i in range(count)]
+
+def create_app(strikes_each_side=150, latency_ms=150, expiries=7, error_rate=0.0):
+    app = FastAPI(title="Dhan stub")
+    spots = {symbol: spot for symbol, (spot, _) in SPOTS.items()}
+    state = {"requests": 0}
+
+    async def respond(payload):
+        state["requests"] += 1
+        if latency_ms:
+            await asyncio.sleep(random.uniform(0.5, 1.5) * latency_ms / 1000)
+        return payload
+
+    @app.post("/optionchain/expirylist")
+    async def expiry_list(request: Request):
+        return await respond({"data": upcoming_expiries(expiries), "status": "success"})
+
+    @app.post("/optionchain")
+    async def option_chain(request: Request):
+        body = await request.json()
+        symbol = body["UnderlyingScrip"]
+        spot, strike_range = spots.get(symbol, 25000.0), SPOTS.get(symbol, (0, 50))[1]
+        spots[symbol] = spot * (1 + random.gauss(0, 0.0005))
+
+        if error_rate and random.random() < error_rate:
+            return JSONResponse({"status": "failure"}, status_code=429, headers={"Retry-After": "1"})
+
+        chain = synthetic_oc_response(round(spots[symbol], 2), strike_range, strikes_each_side)
+        return await respond({"data": chain, "status": "success"})
+
+    app.state.stub = state
+    return app
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--strikes-each-side", type=int, default=150)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--expiries", type=int, default=7)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of chain requests answered with 429")
+    args = parser.parse_args()
+
+    app = create_app(args.strikes_each_side, args.latency_ms, args.expiries, args.error_rate)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import math
+import random
+
+def synthetic_oc_response(underlying_price=25000.0, strike_range=50, strikes_each_side=150, seed=None):
+    """Build a Dhan-shaped /optionchain `data` payload with plausible greeks around the spot."""
+    rng = random.Random(seed)
+    atm = round(underlying_price / strike_range) * strike_range
+    oc = {}
+
+    for i in range(-strikes_each_side, strikes_each_side + 1):
+        strike = atm + i * strike_range
+        moneyness = (strike - underlying_price) / underlying_price
+        gamma = 0.002 * math.exp(-(moneyness * 40) ** 2)
+        call_delta = 0.5 - math.atan(moneyness * 60) / math.pi
+        iv = 12 + 80 * moneyness ** 2
+
+        oc[f"{strike:.6f}"] = {
+            "ce": {
+                "greeks": {
+                    "delta": round(call_delta, 5),
+                    "theta": round(-8 * gamma * 1000, 4),
+                    "gamma": round(gamma, 6),
+                    "vega": round(12 * gamma * 1000, 4),
+                },
+                "implied_volatility": round(iv, 3),
+                "last_price": round(max(underlying_price - strike, 0) + 40 * gamma * 1000, 2),
+                "oi": rng.randint(0, 5_000_000),
+                "volume": rng.randint(0, 50_000_000),
+            },
+            "pe": {
+                "greeks": {
+                    "delta": round(call_delta - 1, 5),
+                    "theta": round(-7 * gamma * 1000, 4),
+                    "gamma": round(gamma, 6),
+                    "vega": round(12 * gamma * 1000, 4),
+                },
+                "implied_volatility": round(iv + 1, 3),
+                "last_price": round(max(strike - underlying_price, 0) + 40 * gamma * 1000, 2),
+                "oi": rng.randint(0, 5_000_000),
+                "volume": rng.randint(0, 50_000_000),
+            },
+        }
+
+    return {"last_price": underlying_price, "oc": oc}
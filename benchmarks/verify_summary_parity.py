@@ -0,0 +1,100 @@
+"""Check that the in-process summary matches the oc_summary_task recompute path and the legacy loops.
+
+Usage: python -m benchmarks.verify_summary_parity [--instrument NIFTY] [payload.json ...]
+
+Each payload file holds the `data` object of a recorded /optionchain response. Without files,
+synthetic chains are used.
+"""
+import json
+import math
+import argparse
+import time as timer
+from types import SimpleNamespace
+from datetime import datetime
+
+from config import INSTRUMENTS
+from processors.oc_chain import parse_oc_chain, chain_rows, chain_from_rows
+from processors.summary_engine import compute_summary
+from benchmarks.synthetic_chain import synthetic_oc_response
+
+def legacy_summary(rows, strike_range):
+    """The per-row Python implementation oc_summary_task used before the vectorized engine."""
+    underlying = rows[0].underlying_price
+    atm = round(underlying / strike_range) * strike_range
+
+    rows_sorted = sorted(rows, key=lambda r: r.strike)
+    cum_net_gex = 0
+    gamma_flip_level = None
+    for row in rows_sorted:
+        cum_net_gex += row.net_gex or 0
+        if cum_net_gex >= 0:
+            gamma_flip_level = row.strike
+            break
+
+    return {
+        "underlying_price": underlying,
+        "total_net_gex": sum(r.net_gex or 0 for r in rows),
+        "gamma_flip_level": gamma_flip_level,
+        "otm_call_vega": sum(r.call_vega or 0 for r in rows if r.strike >= atm),
+        "otm_put_vega": sum(r.put_vega or 0 for r in rows if r.strike <= atm),
+        "otm_call_theta": sum(r.call_theta or 0 for r in rows if r.strike >= atm),
+        "otm_put_theta": sum(r.put_theta or 0 for r in rows if r.strike <= atm),
+        "otm_call_delta": sum(r.call_delta or 0 for r in rows if r.strike >= atm),
+        "otm_put_delta": sum(r.put_delta or 0 for r in rows if r.strike <= atm),
+    }
+
+def close_enough(a, b):
+    if a is None or b is None:
+        return a is b
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--instrument", default="NIFTY")
+    parser.add_argument("--synthetic", type=int, default=200, help="Number of synthetic chains when no files are given")
+    parser.add_argument("payloads", nargs="*")
+    args = parser.parse_args()
+
+    instrument = next(i for i in INSTRUMENTS if i["SECURITY_ID"] == args.instrument)
+    strike_range = instrument["STRIKE_RANGE"]
+
+    if args.payloads:
+        payloads = [json.load(open(path)) for path in args.payloads]
+    else:
+        payloads = [
+            synthetic_oc_response(25000 + i * 7.3, strike_range, seed=i) for i in range(args.synthetic)
+        ]
+
+    mismatches = 0
+    inline_time = legacy_time = 0.0
+    now = datetime.utcnow()
+
+    for i, oc_response in enumerate(payloads):
+        underlying_price, chain = parse_oc_chain(instrument, oc_response)
+        start = timer.perf_counter()
+        inline = compute_summary(chain, underlying_price, strike_range)
+        inline_time += timer.perf_counter() - start
+
+        # Simulate the rows oc_summary_task reads back from oc_minute_snapshots
+        rows = [
+            SimpleNamespace(**row)
+            for row in chain_rows(chain, args.instrument, "2099-12-31", underlying_price, now, now)
+        ]
+        recompute = compute_summary(chain_from_rows(rows), rows[0].underlying_price, strike_range)
+
+        start = timer.perf_counter()
+        legacy = legacy_summary(rows, strike_range)
+        legacy_time += timer.perf_counter() - start
+
+        if inline != recompute:
+            mismatches += 1
+            print(f"payload {i}: in-process and recompute differ: {inline} != {recompute}")
+        elif not all(close_enough(inline[k], legacy[k]) for k in inline):
+            mismatches += 1
+            print(f"payload {i}: in-process and legacy differ: {inline} != {legacy}")
+
+    print(f"{len(payloads)} payloads, {mismatches} mismatches")
+    print(f"vectorized summary {inline_time / len(payloads) * 1000:.3f} ms/payload, legacy summary loops {legacy_time / len(payloads) * 1000:.3f} ms/payload")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 from celery import Celery
 from celery.schedules import crontab
 
+from config import REDIS_URL
+
 celery_app = Celery(
     "option_pipeline",
-    broker="redis://localhost:6379/0",  # or Redis cloud URL
-    backend="redis://localhost:6379/0",
+    broker=REDIS_URL,
+    backend=REDIS_URL,
 )
 
 celery_app.conf.update(
@@ -14,9 +16,21 @@ celery_app.conf.update(
     timezone="Asia/Kolkata",
     enable_utc=False,
     beat_schedule={
-        'rollup-daily-at-12-10am': {
-            'task': 'rollup.historical_rollup.rollup_to_historical',
-            'schedule': crontab(hour=11, minute=45),  # 11:45 PM IST
+        'rollup-historical-nightly': {
+            'task': 'tasks.rollup_historical.rollup_historical_task',
+            'schedule': crontab(hour=23, minute=45),  # 11:45 PM IST
+        },
+        'seal-rollup-buckets': {
+            'task': 'tasks.seal_buckets.seal_buckets_task',
+            'schedule': crontab(minute='1-59/5', hour='9-15', day_of_week='mon-fri'),  # a minute after each 5-minute bucket closes
+        },
+        'ensure-intraday-partitions': {
+            'task': 'tasks.maintain_partitions.ensure_partitions_task',
+            'schedule': crontab(hour=8, minute=30),  # 8:30 AM IST
+        },
+        'archive-history-nightly': {
+            'task': 'tasks.archive_history.archive_history_task',
+            'schedule': crontab(hour=1, minute=30),  # 1:30 AM IST, after the nightly rollup
         }
     }
 )
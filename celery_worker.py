@@ -1,2 +1,13 @@
+from celery.signals import worker_init
+from prometheus_client import start_http_server
+
 from celery_config import celery_app
+from config import WORKER_METRICS_PORT
+from metrics import metrics_registry
 import tasks
+
+@worker_init.connect
+def start_metrics_server(**kwargs):
+    # With the prefork pool set PROMETHEUS_MULTIPROC_DIR so child process samples are aggregated here
+    if WORKER_METRICS_PORT:
+        start_http_server(WORKER_METRICS_PORT, registry=metrics_registry())
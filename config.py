@@ -5,12 +5,90 @@ from datetime import timedelta
 load_dotenv()
 
 DB_URL = os.getenv("DATABASE_URL")
+# Defaults to DATABASE_URL with the asyncpg driver
+ASYNC_DB_URL = os.getenv("ASYNC_DATABASE_URL")
 DHAN_API_URL = os.getenv("DHAN_API_URL")
 DHAN_ACCESS_TOKEN = os.getenv("DHAN_ACCESS_TOKEN")
 DHAN_CLIENT_ID = os.getenv("DHAN_CLIENT_ID")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
 IST_OFFSET = timedelta(hours=5, minutes=30)
 
+# Dhan publishes 5 requests/second for data APIs and 1 request every 3 seconds per unique option chain
+DHAN_RATE_LIMIT_PER_SEC = float(os.getenv("DHAN_RATE_LIMIT_PER_SEC", 5))
+DHAN_RATE_LIMIT_BURST = int(os.getenv("DHAN_RATE_LIMIT_BURST", 5))
+DHAN_OC_MIN_INTERVAL_SEC = float(os.getenv("DHAN_OC_MIN_INTERVAL_SEC", 3))
+DHAN_MAX_RETRIES = int(os.getenv("DHAN_MAX_RETRIES", 3))
+DHAN_BACKOFF_BASE_SEC = float(os.getenv("DHAN_BACKOFF_BASE_SEC", 1))
+
+# Expiry lists change at most once a day; the Redis copy lets restarts and other processes reuse them
+EXPIRY_CACHE_TTL_SEC = int(os.getenv("EXPIRY_CACHE_TTL_SEC", 6 * 60 * 60))
+EXPIRY_CACHE_USE_REDIS = os.getenv("EXPIRY_CACHE_USE_REDIS", "false").lower() == "true"
+
+# "inline" ships the raw chain JSON through Celery; "claim_check" stores a trimmed binary chain in Redis and ships its key
+PAYLOAD_TRANSPORT = os.getenv("PAYLOAD_TRANSPORT", "inline")
+PAYLOAD_TTL_SEC = int(os.getenv("PAYLOAD_TTL_SEC", 15 * 60))
+
+# "celery" hands each chain to a worker through the broker; "inprocess" queues parsed chains to a
+# batched writer inside the API process (single-node deployments)
+INGEST_MODE = os.getenv("INGEST_MODE", "celery")
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", 64))
+INGEST_BATCH_LINGER_MS = int(os.getenv("INGEST_BATCH_LINGER_MS", 250))
+
+# "full" rewrites every strike each minute; "delta" writes only strikes that changed since the previous
+# minute plus a full keyframe every DELTA_KEYFRAME_MINUTES, and readers carry unchanged strikes forward
+SNAPSHOT_STORAGE = os.getenv("SNAPSHOT_STORAGE", "full")
+DELTA_KEYFRAME_MINUTES = int(os.getenv("DELTA_KEYFRAME_MINUTES", 15))
+DELTA_STATE_TTL_SEC = int(os.getenv("DELTA_STATE_TTL_SEC", 15 * 60))
+
+# Intraday tables are partitioned per IST date; partitions are created this many days ahead
+PARTITION_DAYS_AHEAD = int(os.getenv("PARTITION_DAYS_AHEAD", 7))
+
+# Poll interval in minutes by expiry rank (0 = current expiry); the last entry applies to every later expiry.
+# Intervals count from the 09:15 open and every expiry is polled at the 15:29 closing slot
+POLL_TIER_MINUTES = [int(m) for m in os.getenv("POLL_TIER_MINUTES", "1,2,5,5,10").split(",")]
+# Chain requests still queued at this second of their minute are dropped rather than captured into the next one
+FETCH_DEADLINE_SEC = float(os.getenv("FETCH_DEADLINE_SEC", 55))
+
+# Missing vendor IV/greeks are filled from Black-Scholes at RISK_FREE_RATE before a chain is stored, and
+# traded strikes whose vendor IV is off the IV implied by last_price by more than GREEKS_IV_TOLERANCE
+# volatility points are flagged
+GREEKS_FILL_ENABLED = os.getenv("GREEKS_FILL_ENABLED", "true").lower() == "true"
+RISK_FREE_RATE = float(os.getenv("RISK_FREE_RATE", 0.065))
+GREEKS_IV_TOLERANCE = float(os.getenv("GREEKS_IV_TOLERANCE", 2.0))
+
+# The gap scanner checks the day's minute slots every GAP_SCAN_INTERVAL_MIN minutes, at this second of the minute
+GAP_SCAN_INTERVAL_MIN = int(os.getenv("GAP_SCAN_INTERVAL_MIN", 5))
+GAP_SCAN_SECOND = int(os.getenv("GAP_SCAN_SECOND", 40))
+
+# Intraday, each 5-minute bucket is sealed into the historical tables once it has been closed this long;
+# rows saved for a bucket after it was sealed get it sealed again by the next pass
+ROLLUP_SEAL_DELAY_SEC = int(os.getenv("ROLLUP_SEAL_DELAY_SEC", 60))
+
+# A minute's IV surface is built once every chain its fetch cycles captured has committed, or with whatever
+# has committed this many seconds after the first cycle armed it, so a failed save cannot hold it back
+IV_SURFACE_TIMEOUT_SEC = int(os.getenv("IV_SURFACE_TIMEOUT_SEC", 90))
+
+# Also write the packed per-minute frame layout (historical_oc_frames) during the nightly rollup
+HISTORICAL_FRAMES_ENABLED = os.getenv("HISTORICAL_FRAMES_ENABLED", "false").lower() == "true"
+
+# Closed days older than ARCHIVE_AFTER_DAYS are exported from the historical tables to Parquet under
+# ARCHIVE_DIR (needs the `archive` extra); with ARCHIVE_PRUNE they are then deleted from Postgres
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", 28))
+ARCHIVE_PRUNE = os.getenv("ARCHIVE_PRUNE", "false").lower() == "true"
+
+# When set, the fetcher also appends every raw Dhan option chain response to
+# RAW_PAYLOAD_DIR/{instrument}/{IST date}.jsonl.gz so the replay engine can re-parse it later
+RAW_PAYLOAD_DIR = os.getenv("RAW_PAYLOAD_DIR", "")
+
+# Port for the Celery worker's Prometheus endpoint (0 disables it)
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", 9808))
+
+# Pending events per streaming client before it is resynced with a fresh snapshot
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", 32))
+STREAM_HEARTBEAT_SEC = int(os.getenv("STREAM_HEARTBEAT_SEC", 15))
+
 INSTRUMENTS = [
     {
         "SECURITY_ID": "NIFTY",
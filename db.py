@@ -1,9 +1,22 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
-from config import DB_URL
+from config import DB_URL, ASYNC_DB_URL
 
 engine = create_engine(DB_URL)
 
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 Base = declarative_base()
+
+# The API process talks to Postgres through asyncpg so database I/O never stalls the fetch scheduler.
+# Celery workers, migrations and scripts keep using the sync engine above.
+async_engine = create_async_engine(ASYNC_DB_URL or make_url(DB_URL).set(drivername="postgresql+asyncpg"))
+
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    """FastAPI dependency yielding an AsyncSession for read endpoints."""
+    async with AsyncSessionLocal() as db:
+        yield db
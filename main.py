@@ -1,12 +1,22 @@
 import asyncio
 import logging
 from fastapi import FastAPI
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, time
 
-from db import Base, engine
-from config import IST_OFFSET
-from utils import is_market_open
-from processors.fetch_oc_snapshot import fetcher, closing_snapshot_check
+from db import Base, engine, SessionLocal, AsyncSessionLocal, async_engine
+from config import IST_OFFSET, PARTITION_DAYS_AHEAD, INGEST_MODE
+from api.market_data import router as market_data_router
+from api.stream import router as stream_router
+from api.metrics import router as metrics_router
+from api.completeness import router as completeness_router
+from api.history import router as history_router
+from api.surface import router as surface_router
+from processors.hot_cache import hot_cache
+from processors.ingest import ingest_writer
+from processors.partitions import ensure_partitions
+from processors.gap_scanner import gap_scanner_loop
+from utils import is_market_open, is_trading_day
+from processors.fetch_oc_snapshot import fetcher, closing_snapshot_check, warm_expiry_cache
 
 TESTING = False
 
@@ -16,7 +26,16 @@ logging.basicConfig(
 )
 
 Base.metadata.create_all(bind=engine)
+with SessionLocal() as db:
+    ensure_partitions(db, (datetime.utcnow() + IST_OFFSET).date(), PARTITION_DAYS_AHEAD)
+    db.commit()
 app = FastAPI(title="Options Dashboard API")
+app.include_router(market_data_router)
+app.include_router(stream_router)
+app.include_router(metrics_router)
+app.include_router(completeness_router)
+app.include_router(history_router)
+app.include_router(surface_router)
 
 logger = logging.getLogger(__name__)
 
@@ -27,16 +46,36 @@ async def start_fetcher():
         while True:
             now = datetime.utcnow() + IST_OFFSET
 
+            # A cycle that is still running doesn't block the next one: fetcher coalesces and drops its own stale work
             if is_market_open(now, TESTING):
-                asyncio.create_task(fetcher())
+                asyncio.create_task(fetcher(now))
+            elif is_trading_day(now.date()) and time(9, 0) <= now.time() < time(9, 15):
+                asyncio.create_task(warm_expiry_cache())
 
             # Sleep until the next exact minute
             next_minute = (now + timedelta(minutes=1)).replace(second=0, microsecond=0)
             sleep_duration = max((next_minute - (datetime.utcnow() + IST_OFFSET)).total_seconds(), 0)
             await asyncio.sleep(sleep_duration)
 
+    asyncio.create_task(hot_cache.listen())
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(hot_cache.warm)
+    except Exception as e:
+        logger.error(f"[HOT CACHE] Warm-up failed: {e}")
+
+    if INGEST_MODE == "inprocess":
+        asyncio.create_task(ingest_writer.run())
+
     asyncio.create_task(fetcher_loop())
     asyncio.create_task(closing_snapshot_check())
+    asyncio.create_task(gap_scanner_loop())
+
+@app.on_event("shutdown")
+async def flush_ingest():
+    if INGEST_MODE == "inprocess":
+        await ingest_writer.drain()
+    await async_engine.dispose()
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,54 @@
+import os
+import time as timer
+from celery.signals import task_prerun, task_postrun
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, generate_latest, multiprocess
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 10, 20, 30, 60)
+LAG_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 45, 60, 90, 120, 300)
+
+FETCH_LATENCY = Histogram(
+    "dhan_fetch_seconds", "Option chain fetch latency including rate-limit waits",
+    ["instrument", "expiry"], buckets=LATENCY_BUCKETS
+)
+DHAN_RESPONSES = Counter("dhan_http_responses_total", "Dhan HTTP responses by endpoint and status", ["endpoint", "status"])
+FETCH_CYCLE_SECONDS = Histogram("fetch_cycle_seconds", "Duration of a full fetch cycle", buckets=LATENCY_BUCKETS)
+FETCH_CYCLE_OVERRUNS = Counter("fetch_cycle_overruns_total", "Fetch cycles that ran past their minute")
+CAPTURE_SPREAD = Histogram("fetch_capture_spread_seconds", "Spread between a cycle's first and last chain capture", buckets=LATENCY_BUCKETS)
+FETCH_SKIPPED = Counter("fetch_skipped_total", "Chain fetches dropped by the cycle scheduler", ["reason"])
+
+TASK_SECONDS = Histogram("celery_task_seconds", "Celery task duration", ["task"], buckets=LATENCY_BUCKETS)
+ROWS_INSERTED = Counter("db_rows_inserted_total", "Rows written", ["table"])
+CAPTURE_LAG = Histogram(
+    "capture_commit_lag_seconds", "Seconds from the start of ist_minute to the commit of its rows",
+    ["instrument"], buckets=LAG_BUCKETS
+)
+GAP_MISSING_SLOTS = Gauge("gap_missing_slots", "Missing minute slots today per (instrument, expiry)", ["instrument", "expiry"])
+GAP_RECOVERY_FETCHES = Counter("gap_recovery_fetches_total", "Recovery fetches scheduled by the gap scanner", ["slot"])
+GREEKS_FILLED = Counter("greeks_filled_total", "Vendor IV/greek values filled from Black-Scholes", ["field"])
+GREEKS_MISMATCHED = Counter("greeks_iv_mismatch_total", "Traded strikes whose vendor IV disagrees with last_price", ["instrument", "side"])
+INGEST_QUEUE_DEPTH = Gauge("ingest_queue_depth", "Chains waiting for the in-process writer")
+INGEST_FLUSH_SECONDS = Histogram("ingest_flush_seconds", "In-process writer batch flush duration", buckets=LATENCY_BUCKETS)
+
+_task_started = {}
+
+@task_prerun.connect
+def _task_prerun(task_id=None, **kwargs):
+    _task_started[task_id] = timer.perf_counter()
+
+@task_postrun.connect
+def _task_postrun(task_id=None, task=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        TASK_SECONDS.labels(task.name.rsplit(".", 1)[-1]).observe(timer.perf_counter() - started)
+
+def metrics_registry():
+    """Registry to expose: aggregated across processes when PROMETHEUS_MULTIPROC_DIR is set (prefork workers)."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    from prometheus_client import REGISTRY
+    return REGISTRY
+
+def render_metrics():
+    return generate_latest(metrics_registry())
@@ -1,20 +1,19 @@
-import uuid
 from datetime import datetime
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import Column, String, Float, DateTime, Date, BigInteger, Index
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy import Table, Column, String, Float, DateTime, Date, BigInteger, Integer, Boolean, LargeBinary, Index, PrimaryKeyConstraint, true
 
 from db import Base
 
 class OCMinuteSnapshot(Base):
     __tablename__ = "oc_minute_snapshots"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Keyed by (instrument, expiry, strike, ist_minute); range-partitioned by IST date on ist_minute
     timestamp = Column(DateTime, default=datetime.utcnow)
     ist_minute = Column(DateTime, index=True, nullable=False)
-    instrument = Column(String, index=True)
-    expiry = Column(Date, index=True)
+    instrument = Column(String, index=True, nullable=False)
+    expiry = Column(Date, index=True, nullable=False)
     underlying_price = Column(Float)
-    strike = Column(Float)
+    strike = Column(Float, nullable=False)
 
     call_delta = Column(Float)
     call_theta = Column(Float)
@@ -40,19 +39,19 @@ class OCMinuteSnapshot(Base):
     abs_gex = Column(Float)
 
     __table_args__ = (
+        PrimaryKeyConstraint("instrument", "expiry", "strike", "ist_minute"),
         Index('ix_snapshots_minute_instrument', "ist_minute", "instrument"),
-        Index('ix_snapshots_netgex', "ist_minute", "instrument", "net_gex"),
-        Index('ix_snapshots_absgex', "ist_minute", "instrument", "abs_gex"),
+        {"postgresql_partition_by": "RANGE (ist_minute)"},
     )
 
 class OCSummary(Base):
     __tablename__ = "oc_summary"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Keyed by (instrument, expiry, ist_minute); range-partitioned by IST date on ist_minute
     timestamp = Column(DateTime, default=datetime.utcnow)
     ist_minute = Column(DateTime, index=True, nullable=False)
-    instrument = Column(String, index=True)
-    expiry = Column(Date, index=True)
+    instrument = Column(String, index=True, nullable=False)
+    expiry = Column(Date, index=True, nullable=False)
     underlying_price = Column(Float)
 
     total_net_gex = Column(Float)
@@ -64,21 +63,25 @@ class OCSummary(Base):
     otm_call_delta = Column(Float)
     otm_put_delta = Column(Float)
 
+    # True when every strike of this minute was written; delta minutes only hold changed strikes
+    keyframe = Column(Boolean, nullable=False, default=True, server_default=true())
+
     __table_args__ = (
+        PrimaryKeyConstraint("instrument", "expiry", "ist_minute"),
         Index("ix_summary_minute_instrument", "ist_minute", "instrument"),
+        {"postgresql_partition_by": "RANGE (ist_minute)"},
     )
 
 class HistoricalOCSnapshot(Base):
     __tablename__ = "historical_oc_snapshots"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     timestamp = Column(DateTime, default=datetime.utcnow)
     ist_minute = Column(DateTime, index=True, nullable=False)
-    instrument = Column(String, index=True)
-    expiry = Column(Date, index=True)
+    instrument = Column(String, index=True, nullable=False)
+    expiry = Column(Date, index=True, nullable=False)
     underlying_price = Column(Float)
 
-    strike = Column(Float)
+    strike = Column(Float, nullable=False)
     call_delta = Column(Float)
     call_theta = Column(Float)
     call_gamma = Column(Float)
@@ -103,17 +106,17 @@ class HistoricalOCSnapshot(Base):
     abs_gex = Column(Float)
 
     __table_args__ = (
+        PrimaryKeyConstraint("instrument", "expiry", "strike", "ist_minute"),
         Index('ix_hist_snapshots_minute_instrument', "ist_minute", "instrument"),
     )
 
 class HistoricalOCSummary(Base):
     __tablename__ = "historical_oc_summary"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     timestamp = Column(DateTime, default=datetime.utcnow)
     ist_minute = Column(DateTime, index=True, nullable=False)
-    instrument = Column(String, index=True)
-    expiry = Column(Date, index=True)
+    instrument = Column(String, index=True, nullable=False)
+    expiry = Column(Date, index=True, nullable=False)
     underlying_price = Column(Float)
 
     total_net_gex = Column(Float)
@@ -126,5 +129,100 @@ class HistoricalOCSummary(Base):
     otm_put_delta = Column(Float)
 
     __table_args__ = (
+        PrimaryKeyConstraint("instrument", "expiry", "ist_minute"),
         Index("ix_hist_summary_minute_instrument", "ist_minute", "instrument"),
     )
+
+# One row per (instrument, expiry, ist_minute); per-strike fields are packed arrays (processors/chain_frame.py)
+class HistoricalOCFrame(Base):
+    __tablename__ = "historical_oc_frames"
+
+    timestamp = Column(DateTime, default=datetime.utcnow)
+    ist_minute = Column(DateTime, nullable=False)
+    instrument = Column(String, nullable=False)
+    expiry = Column(Date, nullable=False)
+    underlying_price = Column(Float)
+    strike_count = Column(Integer, nullable=False)
+
+    strike = Column(LargeBinary, nullable=False)
+    call_delta = Column(LargeBinary)
+    call_theta = Column(LargeBinary)
+    call_gamma = Column(LargeBinary)
+    call_vega = Column(LargeBinary)
+    call_iv = Column(LargeBinary)
+    call_oi = Column(LargeBinary)
+    call_volume = Column(LargeBinary)
+    call_last_price = Column(LargeBinary)
+
+    put_delta = Column(LargeBinary)
+    put_theta = Column(LargeBinary)
+    put_gamma = Column(LargeBinary)
+    put_vega = Column(LargeBinary)
+    put_iv = Column(LargeBinary)
+    put_oi = Column(LargeBinary)
+    put_volume = Column(LargeBinary)
+    put_last_price = Column(LargeBinary)
+
+    call_gex = Column(LargeBinary)
+    put_gex = Column(LargeBinary)
+    net_gex = Column(LargeBinary)
+    abs_gex = Column(LargeBinary)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("instrument", "expiry", "ist_minute"),
+    )
+
+# Coarser summary tiers next to the 5-minute historical_oc_summary (processors/history_tiers.py)
+TIER_METRICS = [
+    "underlying_price", "total_net_gex", "gamma_flip_level",
+    "otm_call_vega", "otm_put_vega", "otm_call_theta", "otm_put_theta", "otm_call_delta", "otm_put_delta",
+]
+TIER_AGGREGATES = ["last", "min", "max", "mean"]
+
+class HistoricalOCSummaryTier(Base):
+    __table__ = Table(
+        "historical_oc_summary_tiers", Base.metadata,
+        Column("tier", String, nullable=False),
+        Column("ist_minute", DateTime, nullable=False),
+        Column("instrument", String, nullable=False),
+        Column("expiry", Date, nullable=False),
+        Column("samples", Integer, nullable=False),
+        *[Column(f"{metric}_{aggregate}", Float) for metric in TIER_METRICS for aggregate in TIER_AGGREGATES],
+        PrimaryKeyConstraint("tier", "instrument", "expiry", "ist_minute"),
+    )
+
+class RollupWatermark(Base):
+    __tablename__ = "rollup_watermarks"
+
+    # 5-minute buckets of an (instrument, expiry) on ist_date before sealed_until (IST) are in the historical tables
+    instrument = Column(String, primary_key=True)
+    expiry = Column(Date, primary_key=True)
+    ist_date = Column(Date, primary_key=True)
+    sealed_until = Column(DateTime, nullable=False)
+    # Earliest minute written below sealed_until since the last seal; its bucket onwards is sealed again
+    dirty_from = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class IVSurface(Base):
+    __tablename__ = "iv_surfaces"
+
+    # One row per (instrument, ist_minute) across every stored expiry (processors/iv_surface.py).
+    # Per-expiry arrays follow `expiries`; iv_grid is float32 (len(expiries), strike_count), expiry-major
+    timestamp = Column(DateTime, default=datetime.utcnow)
+    ist_minute = Column(DateTime, primary_key=True)
+    instrument = Column(String, primary_key=True)
+    underlying_price = Column(Float)
+
+    expiries = Column(ARRAY(Date), nullable=False)
+    expiry_minutes = Column(ARRAY(DateTime), nullable=False)
+    atm_iv = Column(ARRAY(Float))
+    rr_25d = Column(ARRAY(Float))
+    bf_25d = Column(ARRAY(Float))
+
+    strike_count = Column(Integer, nullable=False)
+    strike = Column(LargeBinary, nullable=False)
+    iv_grid = Column(LargeBinary, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("instrument", "ist_minute"),
+    )
@@ -0,0 +1,122 @@
+import os
+import uuid
+import logging
+from datetime import datetime, time
+from sqlalchemy import select, delete
+
+from config import ARCHIVE_DIR
+from models import HistoricalOCSnapshot, HistoricalOCSummary
+
+logger = logging.getLogger(__name__)
+
+# Hive-style layout: {ARCHIVE_DIR}/{table}/instrument=X/expiry_month=YYYY-MM/date=YYYY-MM-DD/part-0.parquet
+ARCHIVED_TABLES = {model.__tablename__: model for model in (HistoricalOCSnapshot, HistoricalOCSummary)}
+
+def _pyarrow():
+    """pyarrow is an optional dependency (the `archive` extra), only needed by archive jobs and research reads."""
+    import pyarrow
+    import pyarrow.dataset
+    import pyarrow.parquet
+    return pyarrow
+
+def arrow_schema(model):
+    pa = _pyarrow()
+    types = {
+        "DateTime": pa.timestamp("us"), "Date": pa.date32(),
+        "String": pa.string(), "Float": pa.float64(), "BigInteger": pa.int64(), "Integer": pa.int32(),
+    }
+    # instrument is a partition key, so it lives in the directory name rather than the file
+    return pa.schema([
+        (column.name, types[type(column.type).__name__])
+        for column in model.__table__.columns if column.name != "instrument"
+    ])
+
+def day_bounds(ist_date):
+    return datetime.combine(ist_date, time.min), datetime.combine(ist_date, time.max)
+
+def partition_dir(table_name, instrument, expiry, ist_date, root=ARCHIVE_DIR):
+    return os.path.join(
+        root, table_name, f"instrument={instrument}", f"expiry_month={expiry:%Y-%m}", f"date={ist_date.isoformat()}"
+    )
+
+def export_day(db, model, ist_date, root=ARCHIVE_DIR):
+    """Write one IST day of a historical table to Parquet, one file per (instrument, expiry month).
+
+    Files are written to a temporary name and renamed into place, so re-running a day replaces it
+    atomically. Returns the number of rows written.
+    """
+    pa = _pyarrow()
+    table = model.__table__
+    schema = arrow_schema(model)
+    day_start, day_end = day_bounds(ist_date)
+
+    rows = db.execute(
+        select(table).where(table.c.ist_minute >= day_start, table.c.ist_minute <= day_end)
+        .order_by(table.c.instrument, table.c.expiry, table.c.ist_minute)
+    ).mappings().all()
+
+    groups = {}
+    for row in rows:
+        groups.setdefault((row["instrument"], row["expiry"].strftime("%Y-%m")), []).append(row)
+
+    for (instrument, _), group in groups.items():
+        columns = {name: [row[name] for row in group] for name in schema.names}
+        directory = partition_dir(table.name, instrument, group[0]["expiry"], ist_date, root)
+        os.makedirs(directory, exist_ok=True)
+
+        path = os.path.join(directory, "part-0.parquet")
+        tmp_path = os.path.join(directory, f".part-0.{uuid.uuid4().hex}.tmp")
+        pa.parquet.write_table(pa.Table.from_pydict(columns, schema=schema), tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+
+    return len(rows)
+
+def archived_rows(model, ist_date, root=ARCHIVE_DIR):
+    """Row count of a day in the archive, from Parquet footers only."""
+    pa = _pyarrow()
+    base = os.path.join(root, model.__tablename__)
+    if not os.path.isdir(base):
+        return 0
+
+    dataset = pa.dataset.dataset(base, format="parquet", partitioning="hive")
+    return dataset.count_rows(filter=pa.dataset.field("date") == ist_date.isoformat())
+
+def prune_day(db, model, ist_date):
+    """Delete an archived day from Postgres within the caller's transaction."""
+    table = model.__table__
+    day_start, day_end = day_bounds(ist_date)
+    return db.execute(delete(table).where(table.c.ist_minute >= day_start, table.c.ist_minute <= day_end)).rowcount
+
+def read_archive(table_name, columns=None, instrument=None, expiry=None, start=None, end=None, root=ARCHIVE_DIR):
+    """Read archived history as a pyarrow Table, touching only the files and columns needed.
+
+    instrument, expiry and the start/end dates prune whole partition directories; start/end also
+    filter ist_minute inside the files. `columns` limits what is decoded (partition keys
+    instrument, expiry_month and date are available as columns too).
+    """
+    if table_name not in ARCHIVED_TABLES:
+        raise ValueError(f"Unknown archived table: {table_name}")
+
+    pa = _pyarrow()
+    ds = pa.dataset
+    dataset = ds.dataset(
+        os.path.join(root, table_name), format="parquet",
+        partitioning=ds.partitioning(
+            pa.schema([("instrument", pa.string()), ("expiry_month", pa.string()), ("date", pa.string())]), flavor="hive"
+        )
+    )
+
+    filters = []
+    if instrument:
+        filters.append(ds.field("instrument") == instrument)
+    if expiry:
+        filters += [ds.field("expiry_month") == f"{expiry:%Y-%m}", ds.field("expiry") == expiry]
+    if start:
+        filters += [ds.field("date") >= start.date().isoformat(), ds.field("ist_minute") >= start]
+    if end:
+        filters += [ds.field("date") <= end.date().isoformat(), ds.field("ist_minute") <= end]
+
+    expression = None
+    for f in filters:
+        expression = f if expression is None else expression & f
+    return dataset.to_table(columns=columns, filter=expression)
@@ -0,0 +1,51 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+RESYNC = object()
+
+class Subscriber:
+    def __init__(self, instrument, expiry, queue_size):
+        self.instrument = instrument
+        self.expiry = expiry
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def wants(self, entry):
+        message = entry["message"]
+        return (self.instrument is None or self.instrument == message["instrument"]) and \
+            (self.expiry is None or self.expiry == message["expiry"])
+
+class Broadcaster:
+    """Fans hot cache updates out to per-subscriber bounded queues.
+
+    Publishing never blocks. A subscriber whose queue is full has its backlog discarded and
+    gets a resync marker instead, so it catches up with a fresh snapshot rather than stalling
+    the event loop or receiving deltas against state it never saw.
+    """
+
+    def __init__(self, queue_size):
+        self.queue_size = queue_size
+        self.subscribers = set()
+
+    def subscribe(self, instrument=None, expiry=None):
+        subscriber = Subscriber(instrument, expiry, self.queue_size)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+
+    def publish(self, entry):
+        for subscriber in self.subscribers:
+            if not subscriber.wants(entry):
+                continue
+            try:
+                subscriber.queue.put_nowait(entry)
+            except asyncio.QueueFull:
+                subscriber.dropped += subscriber.queue.qsize()
+                while not subscriber.queue.empty():
+                    subscriber.queue.get_nowait()
+                subscriber.queue.put_nowait(RESYNC)
+                logger.warning(f"[BROADCAST] Slow subscriber ({subscriber.instrument}, {subscriber.expiry}) resynced, {subscriber.dropped} events dropped so far")
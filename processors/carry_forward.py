@@ -0,0 +1,55 @@
+from datetime import timedelta
+from sqlalchemy import func, and_
+
+from config import DELTA_KEYFRAME_MINUTES
+from models import OCMinuteSnapshot, OCSummary
+from processors.oc_chain import CHAIN_FIELDS
+
+# Keyframes are at most this far apart, which bounds how far back a reader has to look
+KEYFRAME_LOOKBACK = timedelta(minutes=DELTA_KEYFRAME_MINUTES)
+
+def tombstone_clause(columns):
+    """SQL condition for a removed-strike marker: every vendor field is NULL."""
+    return and_(*[columns[field].is_(None) for field in CHAIN_FIELDS])
+
+def is_tombstone(row):
+    return all(getattr(row, field) is None for field in CHAIN_FIELDS)
+
+def keyframe_anchor(db, instrument_id, expiry, ist_minute):
+    """The latest full-chain minute at or before `ist_minute`, or None if none is recent enough."""
+    return db.query(func.max(OCSummary.ist_minute)).filter(
+        OCSummary.instrument == instrument_id,
+        OCSummary.expiry == expiry,
+        OCSummary.keyframe.is_(True),
+        OCSummary.ist_minute <= ist_minute,
+        OCSummary.ist_minute > ist_minute - KEYFRAME_LOOKBACK
+    ).scalar()
+
+def carry_forward_rows(db, instrument_id, expiry, ist_minute):
+    """Reconstruct every strike of a stored minute, whether it was written in full or as a delta.
+
+    Each strike takes its latest row between the preceding keyframe and `ist_minute`; strikes
+    removed by a later delta are dropped. Rows keep their own ist_minute and underlying_price, so
+    take those from the minute's OCSummary.
+    """
+    anchor = keyframe_anchor(db, instrument_id, expiry, ist_minute)
+    if anchor is None:
+        return []
+
+    if anchor == ist_minute:
+        return db.query(OCMinuteSnapshot).filter_by(
+            instrument=instrument_id,
+            expiry=expiry,
+            ist_minute=ist_minute
+        ).all()
+
+    latest = db.query(OCMinuteSnapshot).filter(
+        OCMinuteSnapshot.instrument == instrument_id,
+        OCMinuteSnapshot.expiry == expiry,
+        OCMinuteSnapshot.ist_minute >= anchor,
+        OCMinuteSnapshot.ist_minute <= ist_minute
+    ).distinct(OCMinuteSnapshot.strike).order_by(
+        OCMinuteSnapshot.strike, OCMinuteSnapshot.ist_minute.desc()
+    ).all()
+
+    return [row for row in latest if row.ist_minute == anchor or not is_tombstone(row)]
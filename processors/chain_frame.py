@@ -0,0 +1,94 @@
+import logging
+import numpy as np
+from itertools import groupby
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from models import HistoricalOCSnapshot, HistoricalOCFrame
+from processors.oc_chain import CHAIN_FIELDS, GEX_FIELDS, INTEGER_FIELDS, chain_from_rows
+
+logger = logging.getLogger(__name__)
+
+# Strikes stay float64, OI/volume are int64 with INT_NULL for missing values, everything else float32 with NaN
+FRAME_FIELDS = [*CHAIN_FIELDS, *GEX_FIELDS]
+FRAME_DTYPES = {field: np.dtype("<i8") if field in INTEGER_FIELDS else np.dtype("<f4") for field in FRAME_FIELDS}
+FRAME_DTYPES["strike"] = np.dtype("<f8")
+INT_NULL = -1
+
+def encode_frame(chain):
+    """Pack a parsed chain into {column: bytes} for HistoricalOCFrame."""
+    columns = {"strike_count": len(chain["strike"])}
+    for field, dtype in FRAME_DTYPES.items():
+        values = chain[field]
+        if dtype.kind == "i":
+            values = np.where(np.isnan(values), INT_NULL, values)
+        columns[field] = np.ascontiguousarray(values, dtype=dtype).tobytes()
+    return columns
+
+def decode_frame(frame, fields=None):
+    """Unpack a HistoricalOCFrame-shaped row into zero-copy arrays keyed by field (plus "strike")."""
+    fields = FRAME_FIELDS if fields is None else fields
+    return {
+        field: np.frombuffer(getattr(frame, field), dtype=FRAME_DTYPES[field], count=frame.strike_count)
+        for field in ["strike", *fields]
+    }
+
+def read_frames(db, instrument, expiry, start, end, fields=None):
+    """Range-read frames as arrays aligned on a common strike grid.
+
+    Returns {"ist_minute": datetime64[m] (T,), "underlying_price": (T,), "strike": (K,), field: (T, K)}.
+    Strikes absent from a minute's window are NaN (INT_NULL for OI/volume).
+    """
+    fields = FRAME_FIELDS if fields is None else fields
+    table = HistoricalOCFrame.__table__
+    frames = db.execute(
+        select(table.c.ist_minute, table.c.underlying_price, table.c.strike_count, table.c.strike, *[table.c[f] for f in fields])
+        .where(table.c.instrument == instrument, table.c.expiry == expiry, table.c.ist_minute >= start, table.c.ist_minute <= end)
+        .order_by(table.c.ist_minute)
+    ).all()
+
+    decoded = [decode_frame(frame, fields) for frame in frames]
+    strikes = np.unique(np.concatenate([d["strike"] for d in decoded])) if decoded else np.empty(0)
+    result = {
+        "ist_minute": np.array([f.ist_minute for f in frames], dtype="datetime64[m]"),
+        "underlying_price": np.array([f.underlying_price for f in frames], dtype=np.float64),
+        "strike": strikes,
+    }
+
+    for field in fields:
+        dtype = FRAME_DTYPES[field]
+        grid = np.full((len(frames), len(strikes)), INT_NULL if dtype.kind == "i" else np.nan, dtype=dtype)
+        for t, d in enumerate(decoded):
+            grid[t, np.searchsorted(strikes, d["strike"])] = d[field]
+        result[field] = grid
+
+    return result
+
+def frames_from_historical(db, instrument, start, end, expiry=None):
+    """Encode stored historical_oc_snapshots rows in [start, end] into frames. Existing frames are kept."""
+    table = HistoricalOCSnapshot.__table__
+    query = select(table).where(
+        table.c.instrument == instrument, table.c.ist_minute >= start, table.c.ist_minute <= end
+    ).order_by(table.c.expiry, table.c.ist_minute)
+    if expiry is not None:
+        query = query.where(table.c.expiry == expiry)
+
+    written = 0
+    rows = db.execute(query.execution_options(yield_per=5000))
+    for (row_expiry, ist_minute), minute_rows in groupby(rows, key=lambda r: (r.expiry, r.ist_minute)):
+        minute_rows = list(minute_rows)
+        frame = {
+            "instrument": instrument,
+            "expiry": row_expiry,
+            "ist_minute": ist_minute,
+            "underlying_price": minute_rows[0].underlying_price,
+            **encode_frame(chain_from_rows(minute_rows)),
+        }
+        written += db.execute(
+            pg_insert(HistoricalOCFrame).values(**frame).on_conflict_do_nothing(
+                index_elements=["instrument", "expiry", "ist_minute"]
+            )
+        ).rowcount
+
+    logger.info(f"[FRAMES] Wrote {written} frames for {instrument} between IST {start} and {end}")
+    return written
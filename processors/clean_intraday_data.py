@@ -1,30 +1,16 @@
 import logging
-from datetime import datetime, time
 
-from models import OCMinuteSnapshot, OCSummary
+from models import RollupWatermark
+from processors.partitions import drop_partitions
 
 logger = logging.getLogger(__name__)
 
-def cleanup_intraday_data(db, instrument, ist_date):
-    "Deletes all rows from OCMinuteSnapshot and OCSummary (based on ist_minute) for a given instrument and IST date."
+def cleanup_intraday_data(db, ist_date):
+    "Detaches and drops the OCMinuteSnapshot and OCSummary partitions (based on ist_minute) for a given IST date, and its rollup watermarks."
 
-    day_start_ist = datetime.combine(ist_date, time.min)
-    day_end_ist = datetime.combine(ist_date, time.max)
-
-    # Delete OCMinuteSnapshot
-    minute_count = db.query(OCMinuteSnapshot).filter(
-        OCMinuteSnapshot.instrument == instrument,
-        OCMinuteSnapshot.ist_minute >= day_start_ist,
-        OCMinuteSnapshot.ist_minute <= day_end_ist
-    ).delete(synchronize_session=False)
-
-    # Delete OCSummary
-    summary_count = db.query(OCSummary).filter(
-        OCSummary.instrument == instrument,
-        OCSummary.ist_minute >= day_start_ist,
-        OCSummary.ist_minute <= day_end_ist
-    ).delete(synchronize_session=False)
+    dropped = drop_partitions(db, ist_date)
+    db.query(RollupWatermark).filter(RollupWatermark.ist_date == ist_date).delete()
 
     logger.info(
-        f"[DAILY CLEANUP] Deleted no raw snapshot rows (UTC), {minute_count} 1-min, and {summary_count} summary rows for {instrument} on IST {ist_date}"
+        f"[DAILY CLEANUP] Dropped {dropped} intraday partitions for IST {ist_date}"
     )
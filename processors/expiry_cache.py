@@ -0,0 +1,95 @@
+import json
+import asyncio
+import logging
+from datetime import datetime, time
+
+from config import IST_OFFSET
+
+logger = logging.getLogger(__name__)
+
+MARKET_OPEN_REFRESH = time(9, 0)
+
+class ExpiryCache:
+    """TTL'd per-instrument cache of Dhan expiry lists, optionally backed by Redis.
+
+    An entry is also considered stale once the market-open refresh time has passed since it
+    was fetched, or once an expiry that was still live when it was fetched is in the past
+    (expiry rollover). Dates already past at fetch time do not count.
+    """
+
+    def __init__(self, fetch, ttl_sec, redis_url=None):
+        self.fetch = fetch
+        self.ttl_sec = ttl_sec
+        self.entries = {}
+        self.locks = {}
+        self.redis = None
+        if redis_url:
+            import redis.asyncio as aioredis
+            self.redis = aioredis.from_url(redis_url)
+
+    def _is_fresh(self, entry, now_ist):
+        fetched_at = entry["fetched_at"]
+        if (now_ist - fetched_at).total_seconds() > self.ttl_sec:
+            return False
+
+        market_open = datetime.combine(now_ist.date(), MARKET_OPEN_REFRESH)
+        if fetched_at < market_open <= now_ist:
+            return False
+
+        fetched_on, today = fetched_at.date().isoformat(), now_ist.date().isoformat()
+        return bool(entry["expiries"]) and not any(fetched_on <= expiry < today for expiry in entry["expiries"])
+
+    async def _load_redis(self, instrument_id):
+        try:
+            raw = await self.redis.get(f"expiries:{instrument_id}")
+        except Exception as e:
+            logger.warning(f"[EXPIRY CACHE] Redis read failed for {instrument_id}: {e}")
+            return None
+        if not raw:
+            return None
+        data = json.loads(raw)
+        return {"expiries": data["expiries"], "fetched_at": datetime.fromisoformat(data["fetched_at"])}
+
+    async def _store_redis(self, instrument_id, entry):
+        payload = json.dumps({"expiries": entry["expiries"], "fetched_at": entry["fetched_at"].isoformat()})
+        try:
+            await self.redis.set(f"expiries:{instrument_id}", payload, ex=self.ttl_sec)
+        except Exception as e:
+            logger.warning(f"[EXPIRY CACHE] Redis write failed for {instrument_id}: {e}")
+
+    async def get(self, client, instrument):
+        instrument_id = instrument["SECURITY_ID"]
+        now_ist = datetime.utcnow() + IST_OFFSET
+
+        entry = self.entries.get(instrument_id)
+        if entry and self._is_fresh(entry, now_ist):
+            return entry["expiries"]
+
+        # One refresh per instrument at a time; concurrent callers wait for it
+        lock = self.locks.setdefault(instrument_id, asyncio.Lock())
+        async with lock:
+            entry = self.entries.get(instrument_id)
+            if entry and self._is_fresh(entry, now_ist):
+                return entry["expiries"]
+
+            if self.redis:
+                entry = await self._load_redis(instrument_id)
+                if entry and self._is_fresh(entry, now_ist):
+                    self.entries[instrument_id] = entry
+                    return entry["expiries"]
+
+            expiries = await self.fetch(client, instrument)
+            entry = {"expiries": expiries, "fetched_at": now_ist}
+            self.entries[instrument_id] = entry
+            if self.redis:
+                await self._store_redis(instrument_id, entry)
+
+            logger.info(f"[EXPIRY CACHE] Refreshed {len(expiries)} expiries for {instrument_id}")
+            return expiries
+
+    async def invalidate(self, instrument_id=None):
+        instrument_ids = list(self.entries) if instrument_id is None else [instrument_id]
+        for key in instrument_ids:
+            self.entries.pop(key, None)
+            if self.redis:
+                await self.redis.delete(f"expiries:{key}")
@@ -1,18 +1,42 @@
 import httpx
+import random
 import logging
 import asyncio
 import time as timer
 from datetime import datetime, time, timedelta
 
-from db import SessionLocal
+from sqlalchemy import select
+
+from db import AsyncSessionLocal
 from tasks.save_oc_snapshot import save_oc_snapshot_task
+from processors.rate_limiter import RateLimiter
+from processors.expiry_cache import ExpiryCache
+from processors.oc_chain import parse_oc_chain
+from processors.payload_store import store_chain
+from processors.ingest import ingest_writer, minute_stamp
+from processors.raw_payloads import record_payload
+from processors.poll_schedule import is_due
+from processors.partitions import ensure_partitions
+from processors.iv_surface import chains_expected, schedule_surface
+from metrics import DHAN_RESPONSES, FETCH_LATENCY, FETCH_CYCLE_SECONDS, FETCH_CYCLE_OVERRUNS, CAPTURE_SPREAD, FETCH_SKIPPED
 from models import OCMinuteSnapshot, HistoricalOCSnapshot
 from utils import get_last_trading_day, is_trading_day, is_pre_market_hours
-from config import DHAN_API_URL, DHAN_ACCESS_TOKEN, DHAN_CLIENT_ID, INSTRUMENTS, IST_OFFSET
+from config import (
+    DHAN_API_URL, DHAN_ACCESS_TOKEN, DHAN_CLIENT_ID, INSTRUMENTS, IST_OFFSET,
+    DHAN_RATE_LIMIT_PER_SEC, DHAN_RATE_LIMIT_BURST, DHAN_OC_MIN_INTERVAL_SEC,
+    DHAN_MAX_RETRIES, DHAN_BACKOFF_BASE_SEC, REDIS_URL, EXPIRY_CACHE_TTL_SEC, EXPIRY_CACHE_USE_REDIS,
+    PAYLOAD_TRANSPORT, INGEST_MODE, RAW_PAYLOAD_DIR, FETCH_DEADLINE_SEC, IV_SURFACE_TIMEOUT_SEC
+)
 
 logger = logging.getLogger(__name__)
 
+rate_limiter = RateLimiter(DHAN_RATE_LIMIT_PER_SEC, DHAN_RATE_LIMIT_BURST, DHAN_OC_MIN_INTERVAL_SEC)
+
 fetch_cycle_count = 1
+# (instrument, expiry) chains requested by a cycle and not yet captured; later cycles coalesce into them
+in_flight = set()
+# (IST minute, UTC capture time) of each (instrument, expiry)'s latest captured chain, whose save may not have committed yet
+latest_captures = {}
 headers = {
     "Content-Type": "application/json",
     "access-token": DHAN_ACCESS_TOKEN,
@@ -21,7 +45,7 @@ headers = {
 
 async def closing_snapshot_check():
     """Check if last trading day's closing snapshot exists in the correct table. If missing, fetch and store it once."""
-    db = SessionLocal()
+    db = AsyncSessionLocal()
 
     try:
         now_ist = datetime.utcnow() + IST_OFFSET
@@ -45,40 +69,46 @@ async def closing_snapshot_check():
             table = HistoricalOCSnapshot
 
         closing_snapshot_time = datetime.combine(target_trading_day, time(15, 29))
+        partition_ready = table is OCMinuteSnapshot
 
         logger.info(f"[CLOSE CHECK] Checking for closing snapshot of {target_trading_day} at {check_time_ist} in {table.__tablename__}")
         async with httpx.AsyncClient() as client:
             for instrument in INSTRUMENTS:
                 instrument_id = instrument["SECURITY_ID"]
-                expiries = await fetch_expiries(client, instrument)
+                expiries = await expiry_cache.get(client, instrument)
 
                 top_expiries = get_top_n_expiries(instrument, expiries)
                 if not top_expiries:
                     logger.warning(f"[CLOSE CHECK] No valid expiries found for {instrument_id}")
                     continue
 
+                # One query for all of the instrument's expiries
+                present = set(await db.scalars(select(table.expiry).where(
+                    table.instrument == instrument_id,
+                    table.expiry.in_([expiry_date for expiry_date, _ in top_expiries]),
+                    table.ist_minute == check_time_ist
+                ).distinct()))
+
                 for expiry_date, expiry in top_expiries:
-                    exists = db.query(table).filter(
-                        table.instrument == instrument_id,
-                        table.expiry == expiry,
-                        table.ist_minute == check_time_ist
-                    ).first()
-                    if exists:
+                    if expiry_date in present:
                         logger.info(f"[CLOSE CHECK] {table.__tablename__} has {instrument_id} ({expiry}) snapshot at {check_time_ist}")
                         continue
 
                     logger.warning(f"[CLOSE CHECK] Missing {instrument_id} ({expiry}) snapshot at {check_time_ist} in {table.__tablename__}. Fetching...")
                     try:
-                        await fetch_oc_data(db, client, instrument, expiry, closing_snapshot_time=closing_snapshot_time)
+                        if not partition_ready:
+                            # A past day's partitions are gone after its rollup; recreate them so the next rollup picks the recovery up
+                            await db.run_sync(ensure_partitions, target_trading_day, 1)
+                            await db.commit()
+                            partition_ready = True
+                        await fetch_oc_data(client, instrument, expiry, closing_snapshot_time=closing_snapshot_time)
                     except Exception as e:
                         logger.error(f"[CLOSE CHECK] Error fetching closing snapshot for {instrument_id} ({expiry}): {e}")
 
-                    await asyncio.sleep(3)
-
     except Exception as e:
         logger.error(f"[CLOSE CHECK] Unexpected error: {e}")
     finally:
-        db.close()
+        await db.close()
 
 def get_top_n_expiries(instrument, expiries, expiry_limit=None):
     """Get the top N expiry dates in ascending order"""
@@ -99,6 +129,42 @@ def get_top_n_expiries(instrument, expiries, expiry_limit=None):
     expiry_dates.sort(key=lambda x: x[0])
     return expiry_dates[:expiry_limit]
 
+class DeadlineExceeded(Exception):
+    pass
+
+async def post_with_backoff(client, url, request_body, rate_key=None, deadline=None):
+    """POST to Dhan through the shared rate limiter, backing off and retrying on 429.
+
+    With a `deadline` (time.monotonic()), a request still waiting for the limiter past it is
+    dropped with DeadlineExceeded instead of being sent late.
+    """
+    endpoint = url.rsplit("/", 1)[-1]
+    for attempt in range(DHAN_MAX_RETRIES + 1):
+        await rate_limiter.acquire(rate_key)
+        if deadline and timer.monotonic() > deadline:
+            raise DeadlineExceeded(f"{endpoint} request for {rate_key} missed its deadline")
+        try:
+            response = await client.post(url, json=request_body, headers=headers)
+        except httpx.HTTPError:
+            DHAN_RESPONSES.labels(endpoint, "error").inc()
+            raise
+        DHAN_RESPONSES.labels(endpoint, str(response.status_code)).inc()
+
+        if response.status_code != 429 or attempt == DHAN_MAX_RETRIES:
+            break
+
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            delay = float(retry_after)
+        else:
+            delay = DHAN_BACKOFF_BASE_SEC * 2 ** attempt + random.uniform(0, DHAN_BACKOFF_BASE_SEC)
+
+        logger.warning(f"Rate limited by Dhan on {url} ({rate_key}), retrying in {delay:.2f}s")
+        rate_limiter.pause(delay)
+
+    response.raise_for_status()
+    return response.json()["data"]
+
 async def fetch_expiries(client, instrument):
     url = f"{DHAN_API_URL}/optionchain/expirylist"
     request_body = {
@@ -106,11 +172,20 @@ async def fetch_expiries(client, instrument):
         "UnderlyingSeg": instrument["UNDERLYING_SEGMENT"],
     }
 
-    response = await client.post(url, json=request_body, headers=headers)
-    response.raise_for_status()
-    return response.json()["data"]
+    return await post_with_backoff(client, url, request_body, ("expirylist", instrument["SECURITY_ID"]))
 
-async def fetch_chain_for_expiry(client, instrument, expiry):
+expiry_cache = ExpiryCache(fetch_expiries, EXPIRY_CACHE_TTL_SEC, REDIS_URL if EXPIRY_CACHE_USE_REDIS else None)
+
+async def warm_expiry_cache():
+    """Refresh expiry lists ahead of the open so the first cycle doesn't pay for them."""
+    async with httpx.AsyncClient() as client:
+        for instrument in INSTRUMENTS:
+            try:
+                await expiry_cache.get(client, instrument)
+            except Exception as e:
+                logger.error(f"Error warming expiries for {instrument['SECURITY_ID']}: {e}")
+
+async def fetch_chain_for_expiry(client, instrument, expiry, deadline=None):
     url = f"{DHAN_API_URL}/optionchain"
     request_body = {
         "UnderlyingScrip": instrument["UNDERLYING_SYMBOL"],
@@ -118,82 +193,132 @@ async def fetch_chain_for_expiry(client, instrument, expiry):
         "Expiry": expiry
     }
 
-    response = await client.post(url, json=request_body, headers=headers)
-    response.raise_for_status()
-    return response.json()["data"]
+    return await post_with_backoff(client, url, request_body, ("optionchain", instrument["SECURITY_ID"], expiry), deadline)
 
-async def fetch_oc_data(db, client, instrument, expiry, closing_snapshot_time=None):
-    """Fetch option chain data for an instrument for an expiry"""
+async def fetch_oc_data(client, instrument, expiry, closing_snapshot_time=None, deadline=None):
+    """Fetch option chain data for an instrument for an expiry. Returns the UTC capture time, or None on failure."""
     logger.info(f"=== Fetching option chain data of {instrument['SECURITY_ID']} for {expiry} ===")
 
     try:
-        oc_response = await fetch_chain_for_expiry(client, instrument, expiry)
-        save_oc_snapshot_task.delay(instrument, expiry, oc_response, closing_snapshot_time)
-
+        start = timer.time()
+        oc_response = await fetch_chain_for_expiry(client, instrument, expiry, deadline)
+        captured_at = datetime.utcnow()
+        elapsed = timer.time() - start
+        FETCH_LATENCY.labels(instrument["SECURITY_ID"], expiry).observe(elapsed)
+        logger.info(f"{instrument['SECURITY_ID']} ({expiry}): {elapsed:.2f}s")
+        _, ist_minute = minute_stamp(captured_at, closing_snapshot_time)
+        latest_captures[(instrument["SECURITY_ID"], expiry)] = (ist_minute, captured_at)
+
+        if INGEST_MODE == "inprocess":
+            await ingest_writer.submit(instrument, expiry, *parse_oc_chain(instrument, oc_response), closing_snapshot_time, captured_at)
+        elif PAYLOAD_TRANSPORT == "claim_check":
+            payload_key = await store_chain(instrument["SECURITY_ID"], expiry, *parse_oc_chain(instrument, oc_response))
+            save_oc_snapshot_task.delay(instrument, expiry, None, closing_snapshot_time, captured_at, payload_key)
+        else:
+            save_oc_snapshot_task.delay(instrument, expiry, oc_response, closing_snapshot_time, captured_at)
+
+        # Keep the untrimmed response for replays, after the chain is already on its way to storage
+        if RAW_PAYLOAD_DIR:
+            await asyncio.to_thread(
+                record_payload, instrument["SECURITY_ID"], expiry, ist_minute, captured_at, closing_snapshot_time, oc_response
+            )
+        return captured_at
+
+    except DeadlineExceeded:
+        FETCH_SKIPPED.labels("deadline").inc()
+        logger.warning(f"Skipped {instrument['SECURITY_ID']} ({expiry}): still queued at its minute's deadline")
     except Exception as e:
         logger.error(f"Error fetching option chain data of {instrument['SECURITY_ID']} for {expiry}: {e}")
 
-async def fetcher():
+async def scheduled_fetch(client, instrument, expiry, deadline=None, closing_snapshot_time=None):
+    """fetch_oc_data for a job whose key the caller already marked in flight."""
+    try:
+        return await fetch_oc_data(client, instrument, expiry, closing_snapshot_time, deadline)
+    finally:
+        in_flight.discard((instrument["SECURITY_ID"], expiry))
+
+async def fetcher(now_ist=None):
+    """One fetch cycle for the IST minute of `now_ist` (default now).
+
+    Each expiry is polled at its tier's interval (processors/poll_schedule.py). Cycles never stack
+    requests: an expiry still in flight from an earlier cycle is coalesced into that request, and
+    requests still queued FETCH_DEADLINE_SEC into the minute are dropped.
+    """
     start = timer.time()
     global fetch_cycle_count
 
+    now_ist = now_ist or datetime.utcnow() + IST_OFFSET
+    slot = now_ist.replace(second=0, microsecond=0)
+    deadline = timer.monotonic() + (slot + timedelta(seconds=FETCH_DEADLINE_SEC) - now_ist).total_seconds()
+
     async with httpx.AsyncClient() as client:
-        db = SessionLocal()
         try:
             logger.info(f"=== Fetch Cycle {fetch_cycle_count} ===")
 
-            # Fetching for current expiries
-            logger.info("Fetching for current expiry...")
-            current_start = timer.time()
-            current_count = 0
+            expiry_lists = await asyncio.gather(
+                *(expiry_cache.get(client, instrument) for instrument in INSTRUMENTS),
+                return_exceptions=True
+            )
 
-            for instrument in INSTRUMENTS:
-                expiries = await fetch_expiries(client, instrument)
-                top_expiries = get_top_n_expiries(instrument, expiries)
-                if not top_expiries:
-                    logger.warning(f"No valid expiries found for {instrument['SECURITY_ID']}")
+            # Current expiries are queued ahead of the others so they get the first rate-limit tokens
+            current_jobs, other_jobs, coalesced = [], [], 0
+            for instrument, expiries in zip(INSTRUMENTS, expiry_lists):
+                if isinstance(expiries, Exception):
+                    logger.error(f"Error fetching expiries for {instrument['SECURITY_ID']}: {expiries}")
                     continue
-                current_expiry = top_expiries[0][1]
-
-                instrument_start = timer.time()
-                await fetch_oc_data(db, client, instrument, current_expiry)
-                instrument_end = timer.time()
-                logger.info(f"{instrument['SECURITY_ID']} current: {(instrument_end - instrument_start):.2f}s")
-                await asyncio.sleep(3)
-                current_count += 1
-
-            current_end = timer.time()
-            logger.info(f"Current expiry total ({current_count} instruments): {(current_end - current_start):.2f}s")
-
-            # Fetching for other expiries
-            logger.info("Fetching for other expiries...")
-            other_start = timer.time()
-            other_count = 0
 
-            for instrument in INSTRUMENTS:
-                expiries = await fetch_expiries(client, instrument)
                 top_expiries = get_top_n_expiries(instrument, expiries)
                 if not top_expiries:
                     logger.warning(f"No valid expiries found for {instrument['SECURITY_ID']}")
                     continue
-                current_expiry = top_expiries[0][1]
-                other_expiries = [expiry for expiry_date, expiry in top_expiries[1:]]
 
-                for expiry in other_expiries:
-                    await fetch_oc_data(db, client, instrument, expiry)
-                    await asyncio.sleep(3)
-                    other_count += 1
+                for rank, (expiry_date, expiry) in enumerate(top_expiries):
+                    if not is_due(rank, slot):
+                        continue
+
+                    key = (instrument["SECURITY_ID"], expiry)
+                    if key in in_flight:
+                        coalesced += 1
+                        FETCH_SKIPPED.labels("in_flight").inc()
+                        continue
 
-            other_end = timer.time()
-            logger.info(f"Other expiries total ({other_count} instruments): {(other_end - other_start):.2f}s")
+                    in_flight.add(key)
+                    (current_jobs if rank == 0 else other_jobs).append((instrument, expiry))
+
+            captures = await asyncio.gather(
+                *(scheduled_fetch(client, instrument, expiry, deadline) for instrument, expiry in current_jobs + other_jobs)
+            )
+
+            captured = [c for c in captures if c]
+
+            # Arm each instrument's IV surface latch with the chains this cycle will commit
+            landing = {}
+            for (instrument, _), captured_at in zip(current_jobs + other_jobs, captures):
+                if captured_at:
+                    key = (instrument["SECURITY_ID"], minute_stamp(captured_at)[1])
+                    landing[key] = landing.get(key, 0) + 1
+            for (instrument_id, ist_minute), count in landing.items():
+                if await chains_expected(instrument_id, ist_minute, count):
+                    schedule_surface(instrument_id, ist_minute)
+                else:
+                    # Builds from whatever landed if a save fails and the latch never closes
+                    schedule_surface(instrument_id, ist_minute, countdown=IV_SURFACE_TIMEOUT_SEC)
+
+            logger.info(f"Fetched {len(captured)}/{len(captures)} chains ({len(current_jobs)} current, {len(other_jobs)} other expiries"
+                        + (f", {coalesced} still in flight" if coalesced else "") + ")")
+            if captured:
+                spread = (max(captured) - min(captured)).total_seconds()
+                CAPTURE_SPREAD.observe(spread)
+                logger.info(f"Capture spread: {spread:.2f}s")
 
             fetch_cycle_count += 1
 
         except Exception as e:
             logger.error(f"Error in fetch loop: {e}")
-        finally:
-            db.close()
 
     total_end = timer.time()
+    FETCH_CYCLE_SECONDS.observe(total_end - start)
+    if total_end - start > 60:
+        FETCH_CYCLE_OVERRUNS.inc()
     logger.info(f"Total fetch cycle time: {(total_end - start):.2f}s")
     logger.info("-" * 50)
@@ -0,0 +1,198 @@
+import httpx
+import asyncio
+import logging
+from datetime import datetime, date, time, timedelta
+from sqlalchemy import select, func, and_, column, values, literal_column, String, Date, Integer
+
+from db import AsyncSessionLocal
+from models import OCSummary
+from config import INSTRUMENTS, IST_OFFSET, GAP_SCAN_INTERVAL_MIN, GAP_SCAN_SECOND
+from metrics import GAP_MISSING_SLOTS, GAP_RECOVERY_FETCHES
+from utils import is_trading_day
+from processors.poll_schedule import SESSION_START, CLOSING_SLOT, poll_interval, due_clause
+from processors.fetch_oc_snapshot import expiry_cache, get_top_n_expiries, scheduled_fetch, in_flight, latest_captures
+
+logger = logging.getLogger(__name__)
+
+# A chain captured for a slot this recently is assumed to be waiting on its save rather than lost
+SAVE_GRACE_SEC = 60
+
+def session_window(ist_date, now_ist=None):
+    """First and last minute slot of `ist_date` that should exist by `now_ist`, or None if none yet."""
+    first = datetime.combine(ist_date, SESSION_START)
+    last = datetime.combine(ist_date, CLOSING_SLOT)
+    if now_ist and now_ist.date() == ist_date:
+        last = min(last, now_ist.replace(second=0, microsecond=0))
+    return (first, last) if last >= first else None
+
+def missing_slots_query(first, last, keys=None):
+    """One statement returning, per (instrument, expiry), the expected and present slot counts and the missing slots.
+
+    `keys` is the list of (instrument, expiry date, expiry rank) expected to be captured; without it
+    the keys are whatever was stored that day, ranked by expiry within each instrument. A key only
+    expects the slots its poll tier is due at, and every polled slot gets an OCSummary row (full
+    or delta storage alike).
+    """
+    summary = OCSummary.__table__
+    minutes = select(
+        func.generate_series(first, last, literal_column("interval '1 minute'")).label("ist_minute")
+    ).subquery("minutes")
+
+    if keys:
+        expected = values(
+            column("instrument", String), column("expiry", Date), column("rank", Integer), name="expected"
+        ).data(keys)
+    else:
+        stored = select(summary.c.instrument, summary.c.expiry).where(
+            summary.c.ist_minute >= first,
+            summary.c.ist_minute <= last
+        ).distinct().subquery("stored")
+        expected = select(
+            stored.c.instrument,
+            stored.c.expiry,
+            (func.dense_rank().over(partition_by=stored.c.instrument, order_by=stored.c.expiry) - 1).label("rank")
+        ).subquery("expected")
+
+    missing = summary.c.ist_minute.is_(None)
+    return select(
+        expected.c.instrument,
+        expected.c.expiry,
+        expected.c.rank,
+        func.count().label("expected"),
+        func.count(summary.c.ist_minute).label("present"),
+        func.array_agg(minutes.c.ist_minute).filter(missing).label("missing")
+    ).select_from(
+        expected.join(minutes, due_clause(expected.c.rank, minutes.c.ist_minute, first)).outerjoin(summary, and_(
+            summary.c.instrument == expected.c.instrument,
+            summary.c.expiry == expected.c.expiry,
+            summary.c.ist_minute == minutes.c.ist_minute,
+            summary.c.ist_minute >= first,
+            summary.c.ist_minute <= last
+        ))
+    ).group_by(expected.c.instrument, expected.c.expiry, expected.c.rank).order_by(expected.c.instrument, expected.c.expiry)
+
+def gap_ranges(minutes, step=1):
+    """Collapse sorted minute slots into [first, last] runs of slots `step` minutes apart."""
+    ranges = []
+    for minute in minutes:
+        if ranges and minute - ranges[-1][1] <= timedelta(minutes=step):
+            ranges[-1][1] = minute
+        else:
+            ranges.append([minute, minute])
+    return ranges
+
+async def completeness_report(db, ist_date, now_ist=None, keys=None):
+    """Completeness of `ist_date` up to `now_ist`: expected, present and missing slots per (instrument, expiry).
+
+    `expected_slots` is the number of session minutes so far; each key's `expected` counts the ones its poll tier is due at.
+    """
+    window = session_window(ist_date, now_ist)
+    report = {"date": ist_date.isoformat(), "expected_slots": 0, "keys": [], "completeness": None}
+    if not window:
+        return report
+
+    first, last = window
+    report["expected_slots"] = int((last - first).total_seconds() // 60) + 1
+
+    for instrument, expiry, rank, expected, present, missing in await db.execute(missing_slots_query(first, last, keys)):
+        missing = sorted(missing or [])
+        report["keys"].append({
+            "instrument": instrument,
+            "expiry": expiry.isoformat(),
+            "poll_minutes": poll_interval(rank),
+            "expected": expected,
+            "present": present,
+            "missing": len(missing),
+            "missing_slots": missing,
+            "gaps": [[start.strftime("%H:%M"), end.strftime("%H:%M")] for start, end in gap_ranges(missing, poll_interval(rank))],
+        })
+
+    if report["keys"]:
+        report["completeness"] = sum(k["present"] for k in report["keys"]) / sum(k["expected"] for k in report["keys"])
+    return report
+
+async def expected_keys(client):
+    """The (instrument, expiry) pairs the fetcher is capturing today, with the instrument configs and expiry ranks."""
+    keys = {}
+    for instrument in INSTRUMENTS:
+        top_expiries = get_top_n_expiries(instrument, await expiry_cache.get(client, instrument))
+        for rank, (expiry_date, expiry) in enumerate(top_expiries):
+            keys[(instrument["SECURITY_ID"], expiry_date)] = (instrument, expiry, rank)
+    return keys
+
+async def scan_and_recover(now_ist=None):
+    """Scan today's slots, schedule fetches for the slots that can still be captured and log the report.
+
+    Dhan only serves the live chain, so a past minute cannot be refetched. Recoverable slots are the
+    current minute (the cycle should have finished by GAP_SCAN_SECOND) and, once the market has
+    closed, the 15:29 closing slot. Keys whose request is still in flight, or whose chain for the
+    slot was captured less than SAVE_GRACE_SEC ago and is presumably waiting on its save, are left alone.
+    """
+    now_ist = now_ist or datetime.utcnow() + IST_OFFSET
+    current_slot = now_ist.replace(second=0, microsecond=0)
+    closing_slot = datetime.combine(now_ist.date(), CLOSING_SLOT)
+
+    async with httpx.AsyncClient() as client:
+        keys = await expected_keys(client)
+        async with AsyncSessionLocal() as db:
+            report = await completeness_report(
+                db, now_ist.date(), now_ist, [(*key, rank) for key, (_, _, rank) in keys.items()]
+            )
+
+        recoveries, pending = [], 0
+        for entry in report["keys"]:
+            GAP_MISSING_SLOTS.labels(entry["instrument"], entry["expiry"]).set(entry["missing"])
+            instrument, expiry, _ = keys[(entry["instrument"], date.fromisoformat(entry["expiry"]))]
+
+            if now_ist.time() > time(15, 30) and closing_slot in entry["missing_slots"]:
+                slot, kind, closing_snapshot_time = closing_slot, "closing", closing_slot
+            elif current_slot in entry["missing_slots"]:
+                slot, kind, closing_snapshot_time = current_slot, "current", None
+            else:
+                continue
+
+            key = (entry["instrument"], expiry)
+            captured_slot, captured_at = latest_captures.get(key, (None, None))
+            saving = captured_slot == slot and (datetime.utcnow() - captured_at).total_seconds() < SAVE_GRACE_SEC
+            if key in in_flight or saving:
+                pending += 1
+                continue
+
+            GAP_RECOVERY_FETCHES.labels(kind).inc()
+            in_flight.add(key)
+            recoveries.append(scheduled_fetch(client, instrument, expiry, closing_snapshot_time=closing_snapshot_time))
+
+        # Recovery fetches share the fetcher's rate limiter, so they queue behind any live cycle
+        if pending:
+            logger.info(f"[GAP SCAN] {pending} missing slots are still in flight or saving")
+        if recoveries:
+            logger.warning(f"[GAP SCAN] Recovering {len(recoveries)} slots")
+            await asyncio.gather(*recoveries)
+
+    gaps = ", ".join(
+        f"{k['instrument']} ({k['expiry']}) {' '.join('-'.join(g) for g in k['gaps'])}" for k in report["keys"] if k["missing"]
+    )
+    completeness = f"{report['completeness']:.2%}" if report["completeness"] is not None else "n/a"
+    logger.info(f"[GAP SCAN] {report['date']}: {completeness} of {sum(k['expected'] for k in report['keys'])} due slots across {len(report['keys'])} keys"
+                + (f"; missing {gaps}" if gaps else ""))
+    return report
+
+async def gap_scanner_loop():
+    """Run scan_and_recover every GAP_SCAN_INTERVAL_MIN minutes during the session, plus once after the close."""
+    while True:
+        now_ist = datetime.utcnow() + IST_OFFSET
+        minute_of_day = now_ist.hour * 60 + now_ist.minute
+        in_session = time(9, 16) <= now_ist.time() < time(15, 32)
+        on_schedule = now_ist.second >= GAP_SCAN_SECOND - 1
+
+        if is_trading_day(now_ist.date()) and in_session and on_schedule and (
+            minute_of_day % GAP_SCAN_INTERVAL_MIN == 0 or now_ist.time() >= time(15, 31)
+        ):
+            try:
+                await scan_and_recover(now_ist)
+            except Exception as e:
+                logger.error(f"[GAP SCAN] Scan failed: {e}")
+
+        # Sleep until GAP_SCAN_SECOND of the next minute
+        next_scan = (now_ist + timedelta(minutes=1)).replace(second=GAP_SCAN_SECOND, microsecond=0)
+        await asyncio.sleep(max((next_scan - (datetime.utcnow() + IST_OFFSET)).total_seconds(), 0))
@@ -0,0 +1,158 @@
+import numpy as np
+from datetime import date, datetime, time
+
+from config import RISK_FREE_RATE, GREEKS_IV_TOLERANCE
+
+# Index options expire at the 15:30 IST close; time to expiry is in calendar years
+EXPIRY_CLOSE = time(15, 30)
+YEAR_SECONDS = 365 * 24 * 60 * 60
+SIDES = [("call", True), ("put", False)]
+
+# Abramowitz & Stegun 26.2.17, |error| < 7.5e-8
+_P = 0.2316419
+_B = (0.319381530, -0.356563782, 1.781477937, -1.821255978, 1.330274429)
+
+def norm_pdf(x):
+    return np.exp(-0.5 * x * x) / np.sqrt(2 * np.pi)
+
+def norm_cdf(x):
+    t = 1 / (1 + _P * np.abs(x))
+    poly = t * (_B[0] + t * (_B[1] + t * (_B[2] + t * (_B[3] + t * _B[4]))))
+    upper = norm_pdf(x) * poly
+    return np.where(x >= 0, 1 - upper, upper)
+
+def years_to_expiry(expiry, ist_minute):
+    """Calendar years from `ist_minute` to the 15:30 IST close of `expiry` (an ISO string or date)."""
+    if not isinstance(expiry, date):
+        expiry = date.fromisoformat(expiry)
+    return (datetime.combine(expiry, EXPIRY_CLOSE) - ist_minute).total_seconds() / YEAR_SECONDS
+
+def _d1_d2(spot, strike, t, r, sigma):
+    vol_sqrt_t = sigma * np.sqrt(t)
+    d1 = (np.log(spot / strike) + (r + 0.5 * sigma * sigma) * t) / vol_sqrt_t
+    return d1, d1 - vol_sqrt_t
+
+def bs_price(spot, strike, t, r, sigma, is_call):
+    """Black-Scholes premium; `is_call` is a bool or a per-strike mask, puts follow from put-call parity."""
+    d1, d2 = _d1_d2(spot, strike, t, r, sigma)
+    discounted = strike * np.exp(-r * t)
+    call = spot * norm_cdf(d1) - discounted * norm_cdf(d2)
+    return np.where(is_call, call, call - spot + discounted)
+
+def bs_greeks(spot, strike, t, r, sigma, is_call):
+    """Delta, theta per calendar day, gamma per point and vega per volatility point, Dhan's units."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d1, d2 = _d1_d2(spot, strike, t, r, sigma)
+        pdf = norm_pdf(d1)
+        discounted = strike * np.exp(-r * t)
+        decay = -spot * pdf * sigma / (2 * np.sqrt(t))
+        if is_call:
+            delta, carry = norm_cdf(d1), -r * discounted * norm_cdf(d2)
+        else:
+            delta, carry = norm_cdf(d1) - 1, r * discounted * norm_cdf(-d2)
+
+        return {
+            "delta": delta,
+            "theta": (decay + carry) / 365,
+            "gamma": pdf / (spot * sigma * np.sqrt(t)),
+            "vega": spot * pdf * np.sqrt(t) / 100,
+        }
+
+def implied_vol(price, spot, strike, t, r, is_call, iterations=60, tol=1e-4):
+    """Annualized IV for every price at once by safeguarded Newton steps inside a shrinking bisection bracket.
+
+    Prices outside the no-arbitrage bounds, and strikes that do not converge, come back as NaN.
+    """
+    price = np.asarray(price, dtype=np.float64)
+    strike = np.broadcast_to(np.asarray(strike, dtype=np.float64), price.shape)
+    discounted = strike * np.exp(-r * t)
+    is_call = np.broadcast_to(is_call, price.shape)
+    lower = np.maximum(np.where(is_call, spot - discounted, discounted - spot), 0)
+    upper = np.where(is_call, spot, discounted)
+
+    sigma = np.full_like(price, np.nan)
+    with np.errstate(invalid="ignore"):
+        valid = np.isfinite(price) & (price > lower) & (price < upper)
+    if t <= 0 or not valid.any():
+        return sigma
+
+    p, k, is_call = price[valid], strike[valid], is_call[valid]
+    lo, hi = np.full_like(p, 1e-4), np.full_like(p, 5.0)
+    # Brenner-Subrahmanyam start, which is close near the money and bracketed everywhere else
+    s = np.clip(np.sqrt(2 * np.pi / t) * p / spot, 0.05, 2.0)
+    converged = np.zeros(p.shape, dtype=bool)
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for _ in range(iterations):
+            diff = bs_price(spot, k, t, r, s, is_call) - p
+            converged = (np.abs(diff) < tol) | (hi - lo < 1e-7)
+            if converged.all():
+                break
+
+            lo = np.where(diff < 0, s, lo)
+            hi = np.where(diff > 0, s, hi)
+            d1, _ = _d1_d2(spot, k, t, r, s)
+            newton = s - diff / (spot * norm_pdf(d1) * np.sqrt(t))
+            s = np.where(converged, s, np.where((newton > lo) & (newton < hi), newton, (lo + hi) / 2))
+
+    sigma[valid] = np.where(converged, s, np.nan)
+    return sigma
+
+def strike_vols(chain, underlying_price, t, r):
+    """IV per strike implied by its out-of-the-money leg, or by the other leg where that one has no price.
+
+    Deep in-the-money premiums are nearly all intrinsic value and rounded to the tick, so they pin
+    volatility down far worse than the out-of-the-money premium at the same strike.
+    """
+    otm_call = chain["strike"] >= underlying_price * np.exp(r * t)
+    call_price, put_price = chain["call_last_price"], chain["put_last_price"]
+
+    sigma = implied_vol(np.where(otm_call, call_price, put_price), underlying_price, chain["strike"], t, r, otm_call)
+    retry = np.isnan(np.where(otm_call, call_price, put_price))
+    if retry.any():
+        sigma[retry] = implied_vol(
+            np.where(otm_call, put_price, call_price)[retry], underlying_price, chain["strike"][retry], t, r, ~otm_call[retry]
+        )
+    return sigma
+
+def fill_greeks(chain, underlying_price, expiry, ist_minute, r=RISK_FREE_RATE, tolerance=GREEKS_IV_TOLERANCE):
+    """Fill missing vendor IV and greeks of a parsed chain from Black-Scholes and flag suspect vendor IVs.
+
+    Only NaN fields are filled; vendor values are never replaced. A leg with a positive vendor IV gets
+    its missing greeks computed at that IV; any other leg gets them, and a missing IV, from the
+    strike's IV implied by last_price (strike_vols). Traded legs whose vendor IV differs from the
+    implied one by more than `tolerance` volatility points are flagged.
+    Columns are replaced rather than written to, since they may be read-only views. Returns
+    {"filled": {field: count}, "mismatched": {side: strikes}}; the GEX columns need recomputing afterwards.
+    """
+    report = {"filled": {}, "mismatched": {}}
+    t = years_to_expiry(expiry, ist_minute)
+    if t <= 0 or not underlying_price or not len(chain["strike"]):
+        return report
+
+    strikes = chain["strike"]
+    implied = strike_vols(chain, underlying_price, t, r)
+    for side, is_call in SIDES:
+        vendor_iv = chain[f"{side}_iv"] / 100
+        with np.errstate(invalid="ignore"):
+            missing = ~(vendor_iv > 0)
+            sigma = np.where(missing, implied, vendor_iv)
+
+        for greek, values in bs_greeks(underlying_price, strikes, t, r, sigma, is_call).items():
+            field = f"{side}_{greek}"
+            fill = np.isnan(chain[field]) & np.isfinite(values)
+            if fill.any():
+                chain[field] = np.where(fill, values, chain[field])
+                report["filled"][field] = int(fill.sum())
+
+        fill = np.isnan(vendor_iv) & np.isfinite(implied)
+        if fill.any():
+            chain[f"{side}_iv"] = np.where(fill, implied * 100, chain[f"{side}_iv"])
+            report["filled"][f"{side}_iv"] = int(fill.sum())
+
+        with np.errstate(invalid="ignore"):
+            mismatched = ~missing & (chain[f"{side}_volume"] > 0) & (np.abs(vendor_iv - implied) * 100 > tolerance)
+        if mismatched.any():
+            report["mismatched"][side] = strikes[mismatched]
+
+    return report
@@ -0,0 +1,97 @@
+import logging
+from datetime import timedelta
+from sqlalchemy import select, func, cast, literal, literal_column, Integer
+from sqlalchemy.dialects.postgresql import insert as pg_insert, array_agg, aggregate_order_by
+
+from models import HistoricalOCSummary, HistoricalOCSummaryTier, TIER_METRICS, TIER_AGGREGATES
+from utils import is_trading_day
+
+logger = logging.getLogger(__name__)
+
+# Bucket width in minutes; "5m" is historical_oc_summary itself, which only keeps the last value
+TIERS = {"5m": 5, "15m": 15, "1h": 60, "1d": 24 * 60}
+AGGREGATED_TIERS = ["15m", "1h", "1d"]
+# Buckets per trading day (09:15 - 15:30)
+SLOTS_PER_DAY = {"5m": 75, "15m": 25, "1h": 7, "1d": 1}
+
+def minute_bucket(column, minutes):
+    """Floor a timestamp column to its `minutes`-wide bucket in SQL (hour and day tiers use date_trunc)."""
+    if minutes >= 24 * 60:
+        return func.date_trunc("day", column)
+    if minutes == 60:
+        return func.date_trunc("hour", column)
+    return func.date_trunc("hour", column) + cast(
+        func.floor(func.extract("minute", column) / minutes), Integer
+    ) * literal_column(f"interval '{minutes} minutes'")
+
+def bucket_start(ist_minute, minutes):
+    """Python counterpart of minute_bucket for a single timestamp."""
+    if minutes >= 24 * 60:
+        return ist_minute.replace(hour=0, minute=0, second=0, microsecond=0)
+    return ist_minute.replace(minute=ist_minute.minute // minutes * minutes, second=0, microsecond=0)
+
+def tier_insert(source, tier, *filters):
+    """INSERT ... SELECT last/min/max/mean of every summary metric per `tier` bucket of `source` rows.
+
+    `source` is OCSummary during the nightly rollup (minute resolution) or HistoricalOCSummary when
+    backfilling older days, where the aggregates are over 5-minute last values.
+    """
+    src = source.__table__
+    bucket = minute_bucket(src.c.ist_minute, TIERS[tier])
+
+    aggregates = []
+    for metric in TIER_METRICS:
+        column = src.c[metric]
+        aggregates += [
+            array_agg(aggregate_order_by(column, src.c.ist_minute.desc()))[1],
+            func.min(column),
+            func.max(column),
+            func.avg(column),
+        ]
+
+    buckets = select(
+        literal(tier), bucket, src.c.instrument, src.c.expiry, func.count(), *aggregates
+    ).where(*filters).group_by(src.c.instrument, src.c.expiry, bucket)
+
+    columns = [f"{metric}_{aggregate}" for metric in TIER_METRICS for aggregate in TIER_AGGREGATES]
+    return pg_insert(HistoricalOCSummaryTier.__table__).from_select(
+        ["tier", "ist_minute", "instrument", "expiry", "samples", *columns], buckets
+    ).on_conflict_do_nothing(index_elements=["tier", "instrument", "expiry", "ist_minute"])
+
+def choose_tier(start, end, max_points):
+    """Finest tier whose bucket count over [start, end] fits in `max_points` (1d if none does)."""
+    days = (end.date() - start.date()).days + 1
+    trading_days = sum(is_trading_day(start.date() + timedelta(days=d)) for d in range(days)) or 1
+    for tier in TIERS:
+        if trading_days * SLOTS_PER_DAY[tier] <= max_points:
+            return tier
+    return "1d"
+
+def history_query(instrument, tier, start, end, metrics, expiry=None):
+    """Select (ist_minute, expiry, {metric}_{aggregate}...) for a tier, oldest first.
+
+    Without an expiry, each bucket takes the nearest expiry still live on that day, which gives a
+    continuous front-expiry series across rollovers. The 5-minute tier only stores the last value,
+    so its min/max/mean repeat it.
+    """
+    if tier == "5m":
+        table = HistoricalOCSummary.__table__
+        values = [table.c[metric].label(f"{metric}_{aggregate}") for metric in metrics for aggregate in TIER_AGGREGATES]
+        filters = []
+    else:
+        table = HistoricalOCSummaryTier.__table__
+        values = [table.c[f"{metric}_{aggregate}"] for metric in metrics for aggregate in TIER_AGGREGATES]
+        filters = [table.c.tier == tier]
+
+    query = select(table.c.ist_minute, table.c.expiry, *values).where(
+        table.c.instrument == instrument,
+        table.c.ist_minute >= start,
+        table.c.ist_minute <= end,
+        *filters
+    )
+    if expiry:
+        return query.where(table.c.expiry == expiry).order_by(table.c.ist_minute)
+
+    return query.where(table.c.expiry >= func.date(table.c.ist_minute)).distinct(table.c.ist_minute).order_by(
+        table.c.ist_minute, table.c.expiry
+    )
@@ -0,0 +1,116 @@
+import json
+import asyncio
+import hashlib
+import logging
+
+from models import OCSummary
+from processors.oc_chain import chain_from_rows
+from processors.carry_forward import carry_forward_rows
+from processors.redis_clients import async_redis
+from processors.minute_events import MINUTE_CHANNEL, minute_message
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_FIELDS = [c.name for c in OCSummary.__table__.columns if c.name not in ("timestamp", "ist_minute", "instrument", "expiry", "keyframe")]
+GEX_COLUMNS = ["strike", "call_gex", "put_gex", "net_gex", "abs_gex"]
+
+def minute_delta(previous, message):
+    """Per-strike changes from `previous` to `message`: only the fields that differ, plus strikes that left the window."""
+    chain = message["chain"]
+    fields = [field for field in chain if field != "strike"]
+    header = {k: message[k] for k in ("instrument", "expiry", "ist_minute", "underlying_price", "summary")}
+
+    if previous is None:
+        return {**header, "changed": [dict(zip(chain, values)) for values in zip(*chain.values())], "removed": []}
+
+    prev_chain = previous["chain"]
+    prev_index = {strike: i for i, strike in enumerate(prev_chain["strike"])}
+    changed = []
+    for i, strike in enumerate(chain["strike"]):
+        j = prev_index.pop(strike, None)
+        diff = {
+            field: chain[field][i] for field in fields
+            if j is None or prev_chain[field][j] != chain[field][i]
+        }
+        if diff:
+            changed.append({"strike": strike, **diff})
+
+    return {**header, "changed": changed, "removed": sorted(prev_index)}
+
+class HotCache:
+    """Latest chain, GEX profile and summary per (instrument, expiry), kept as ready-to-send JSON.
+
+    Fed by the minute events Celery workers publish after each commit, so reads never touch the database.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.listeners = []
+
+    def update(self, message):
+        key = (message["instrument"], message["expiry"])
+        current = self.entries.get(key)
+        if current and current["ist_minute"] > message["ist_minute"]:
+            return None
+
+        chain = message["chain"]
+        header = {"instrument": message["instrument"], "expiry": message["expiry"], "ist_minute": message["ist_minute"]}
+        rows = [dict(zip(chain, values)) for values in zip(*chain.values())]
+        summary = {**header, **message["summary"]}
+
+        entry = {
+            "ist_minute": message["ist_minute"],
+            "etag": '"' + hashlib.blake2b(json.dumps(message, sort_keys=True).encode(), digest_size=12).hexdigest() + '"',
+            "message": message,
+            "summary_obj": summary,
+            "chain": json.dumps({**header, "underlying_price": message["underlying_price"], "strikes": rows}).encode(),
+            "gex": json.dumps({**header, **{column: chain[column] for column in GEX_COLUMNS}}).encode(),
+            "summary": json.dumps(summary).encode(),
+        }
+        entry["delta"] = minute_delta(current["message"] if current else None, message)
+        self.entries[key] = entry
+
+        for listener in self.listeners:
+            listener(entry)
+        return entry
+
+    def get(self, instrument, expiry):
+        return self.entries.get((instrument, expiry))
+
+    def instrument_entries(self, instrument):
+        return [entry for (entry_instrument, _), entry in sorted(self.entries.items()) if entry_instrument == instrument]
+
+    def warm(self, db):
+        """Seed the cache with the latest stored minute of every (instrument, expiry)."""
+        latest = db.query(OCSummary).distinct(OCSummary.instrument, OCSummary.expiry).order_by(
+            OCSummary.instrument, OCSummary.expiry, OCSummary.ist_minute.desc()
+        ).all()
+
+        for summary in latest:
+            rows = carry_forward_rows(db, summary.instrument, summary.expiry, summary.ist_minute)
+            if not rows:
+                continue
+
+            self.update(minute_message(
+                summary.instrument, summary.expiry, summary.ist_minute, summary.underlying_price,
+                chain_from_rows(rows), {field: getattr(summary, field) for field in SUMMARY_FIELDS}
+            ))
+
+        logger.info(f"[HOT CACHE] Warmed {len(self.entries)} (instrument, expiry) entries")
+
+    async def listen(self):
+        """Apply minute events from Redis pub/sub for as long as the process runs."""
+        while True:
+            try:
+                pubsub = async_redis().pubsub()
+                await pubsub.subscribe(MINUTE_CHANNEL)
+                async for event in pubsub.listen():
+                    if event["type"] == "message":
+                        self.update(json.loads(event["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[HOT CACHE] Minute event subscription failed, retrying: {e}")
+                await asyncio.sleep(5)
+
+hot_cache = HotCache()
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import time as timer
+from datetime import datetime
+
+from db import SessionLocal
+from config import IST_OFFSET, SNAPSHOT_STORAGE, GREEKS_FILL_ENABLED, INGEST_QUEUE_SIZE, INGEST_BATCH_LINGER_MS
+from metrics import ROWS_INSERTED, CAPTURE_LAG, GREEKS_FILLED, GREEKS_MISMATCHED, INGEST_QUEUE_DEPTH, INGEST_FLUSH_SECONDS
+from processors.oc_chain import chain_rows, compute_gex
+from processors.greeks import fill_greeks
+from processors.iv_surface import chain_landed, schedule_surface
+from processors.summary_engine import compute_summary
+from processors.minute_events import publish_minute
+from processors.snapshot_delta import plan_write, save_state, tombstone_rows
+from processors.snapshot_writer import replace_minute_snapshot, replace_minute_summary
+
+logger = logging.getLogger(__name__)
+
+def minute_stamp(captured_at, closing_snapshot_time=None):
+    """Return (snapshot_time, ist_minute) for a chain captured at UTC `captured_at`."""
+    snapshot_time = captured_at.replace(microsecond=0)
+    if closing_snapshot_time:
+        return snapshot_time, closing_snapshot_time
+    return snapshot_time, (snapshot_time + IST_OFFSET).replace(second=0, microsecond=0)
+
+def persist_minute(db, instrument, expiry, underlying_price, chain, snapshot_time, ist_minute, closing=False):
+    """Write one captured chain and its summary into the caller's transaction.
+
+    Returns a record of what was written for after_commit once the caller has committed.
+    """
+    instrument_id = instrument["SECURITY_ID"]
+
+    # Vendor chains often lack greeks on far strikes and closing fetches, which GEX would read as zero
+    greeks = None
+    if GREEKS_FILL_ENABLED:
+        greeks = fill_greeks(chain, underlying_price, expiry, ist_minute)
+        if greeks["filled"]:
+            compute_gex(chain)
+
+    rows = chain_rows(chain, instrument_id, expiry, underlying_price, snapshot_time, ist_minute)
+
+    # In delta mode keep only strikes that changed since the previous minute, plus markers for removed ones
+    keyframe, keyframe_minute = True, ist_minute
+    if SNAPSHOT_STORAGE == "delta":
+        keyframe_minute, changed, removed = plan_write(instrument_id, expiry, ist_minute, chain)
+        if changed is not None:
+            keyframe = False
+            rows = [row for row, keep in zip(rows, changed.tolist()) if keep]
+            rows += tombstone_rows(instrument_id, expiry, underlying_price, snapshot_time, ist_minute, removed)
+
+    # Replace any existing records for that minute, then the summary
+    inserted = replace_minute_snapshot(db, instrument_id, expiry, ist_minute, rows)
+    summary = None
+    if len(chain["strike"]):
+        summary = compute_summary(chain, underlying_price, instrument["STRIKE_RANGE"])
+        replace_minute_summary(db, instrument_id, expiry, ist_minute, summary, snapshot_time, keyframe)
+
+    return {
+        "instrument_id": instrument_id,
+        "expiry": expiry,
+        "ist_minute": ist_minute,
+        "underlying_price": underlying_price,
+        "chain": chain,
+        "summary": summary,
+        "inserted": inserted,
+        "greeks": greeks,
+        "keyframe_minute": keyframe_minute,
+        "closing": closing,
+    }
+
+def after_commit(written):
+    """Metrics, delta state and the minute event for a committed persist_minute record."""
+    ROWS_INSERTED.labels("oc_minute_snapshots").inc(written["inserted"])
+    if written["greeks"]:
+        for field, count in written["greeks"]["filled"].items():
+            GREEKS_FILLED.labels(field).inc(count)
+        for side, strikes in written["greeks"]["mismatched"].items():
+            GREEKS_MISMATCHED.labels(written["instrument_id"], side).inc(len(strikes))
+            logger.warning(
+                f"[GREEKS] Vendor {side} IV off last_price for {written['instrument_id']} ({written['expiry']}) "
+                f"at IST {written['ist_minute']} on {len(strikes)} strikes between {strikes.min():g} and {strikes.max():g}"
+            )
+    if not written["summary"]:
+        return
+
+    ROWS_INSERTED.labels("oc_summary").inc()
+    if not written["closing"]:
+        CAPTURE_LAG.labels(written["instrument_id"]).observe(
+            (datetime.utcnow() + IST_OFFSET - written["ist_minute"]).total_seconds()
+        )
+    if SNAPSHOT_STORAGE == "delta":
+        save_state(
+            written["instrument_id"], written["expiry"], written["ist_minute"],
+            written["keyframe_minute"], written["underlying_price"], written["chain"]
+        )
+    publish_minute(
+        written["instrument_id"], written["expiry"], written["ist_minute"],
+        written["underlying_price"], written["chain"], written["summary"]
+    )
+    if not written["closing"] and chain_landed(written["instrument_id"], written["ist_minute"]):
+        schedule_surface(written["instrument_id"], written["ist_minute"])
+
+class IngestWriter:
+    """Bounded queue of parsed chains drained by one writer coroutine.
+
+    Chains that arrive together (typically one fetch cycle) are flushed in a single transaction on
+    a worker thread. If that transaction fails, the batch is retried one chain per transaction so
+    a bad chain does not cost the rest of the cycle.
+    """
+
+    def __init__(self, queue_size=INGEST_QUEUE_SIZE, linger_ms=INGEST_BATCH_LINGER_MS):
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.linger_sec = linger_ms / 1000
+
+    async def submit(self, instrument, expiry, underlying_price, chain, closing_snapshot_time, captured_at):
+        if self.queue.full():
+            logger.warning(f"[INGEST] Queue full, waiting to queue {instrument['SECURITY_ID']} ({expiry})")
+        await self.queue.put((instrument, expiry, underlying_price, chain, closing_snapshot_time, captured_at))
+        INGEST_QUEUE_DEPTH.set(self.queue.qsize())
+
+    def take_batch(self, first):
+        batch = [first]
+        while not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        INGEST_QUEUE_DEPTH.set(self.queue.qsize())
+        return batch
+
+    async def run(self):
+        while True:
+            first = await self.queue.get()
+            # Give the rest of the cycle's chains a moment to land in the same batch
+            await asyncio.sleep(self.linger_sec)
+            batch = self.take_batch(first)
+            try:
+                await asyncio.to_thread(self.flush, batch)
+            except Exception as e:
+                logger.error(f"[INGEST] Failed to flush {len(batch)} chains: {e}")
+
+    async def drain(self):
+        """Flush whatever is still queued, e.g. on shutdown."""
+        if not self.queue.empty():
+            await asyncio.to_thread(self.flush, self.take_batch(self.queue.get_nowait()))
+
+    def flush(self, batch):
+        start = timer.perf_counter()
+        db = SessionLocal()
+        try:
+            try:
+                written = [self.persist(db, item) for item in batch]
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"[INGEST] Batch of {len(batch)} failed, retrying one chain at a time: {e}")
+                written = []
+                for item in batch:
+                    try:
+                        written.append(self.persist(db, item))
+                        db.commit()
+                    except Exception as e:
+                        db.rollback()
+                        logger.error(f"[INGEST] Error saving {item[0]['SECURITY_ID']} ({item[1]}): {e}")
+        finally:
+            db.close()
+
+        for record in written:
+            after_commit(record)
+        INGEST_FLUSH_SECONDS.observe(timer.perf_counter() - start)
+        logger.info(f"[INGEST] Saved {sum(w['inserted'] for w in written)} rows for {len(written)}/{len(batch)} chains")
+        return written
+
+    @staticmethod
+    def persist(db, item):
+        instrument, expiry, underlying_price, chain, closing_snapshot_time, captured_at = item
+        snapshot_time, ist_minute = minute_stamp(captured_at, closing_snapshot_time)
+        return persist_minute(
+            db, instrument, expiry, underlying_price, chain, snapshot_time, ist_minute, bool(closing_snapshot_time)
+        )
+
+ingest_writer = IngestWriter()
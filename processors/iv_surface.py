@@ -0,0 +1,185 @@
+import logging
+import numpy as np
+from datetime import datetime, time
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from models import OCSummary, IVSurface
+from processors.oc_chain import chain_from_rows
+from processors.carry_forward import carry_forward_rows
+from processors.redis_clients import sync_redis, async_redis
+
+logger = logging.getLogger(__name__)
+
+# Strikes are float64, the IV grid float32 (expiry-major, NaN where an expiry lacks the strike)
+STRIKE_DTYPE = np.dtype("<f8")
+GRID_DTYPE = np.dtype("<f4")
+RISK_REVERSAL_DELTA = 0.25
+
+# Per (instrument, minute) latch: fetch cycles add up the chains they captured, workers count the ones committed
+LATCH_KEY = "oc:surface:{instrument}:{minute}"
+LATCH_TTL_SEC = 10 * 60
+
+def smile(chain, underlying_price):
+    """Per-strike IV (percent) from the out-of-the-money leg, falling back to the other leg."""
+    otm_call = chain["strike"] >= underlying_price
+    primary = np.where(otm_call, chain["call_iv"], chain["put_iv"])
+    fallback = np.where(otm_call, chain["put_iv"], chain["call_iv"])
+    with np.errstate(invalid="ignore"):
+        return np.where(primary > 0, primary, np.where(fallback > 0, fallback, np.nan))
+
+def _interp(x, xs, ys):
+    """np.interp over the finite (xs, ys) pairs, NaN outside their range instead of clamping."""
+    known = np.isfinite(xs) & np.isfinite(ys)
+    xs, ys = xs[known], ys[known]
+    if len(xs) < 2:
+        return np.nan
+    order = np.argsort(xs, kind="stable")
+    xs, ys = xs[order], ys[order]
+    if not xs[0] <= x <= xs[-1]:
+        return np.nan
+    return float(np.interp(x, xs, ys))
+
+def expiry_metrics(chain, underlying_price):
+    """(ATM IV, 25-delta risk reversal, 25-delta butterfly) of one expiry's chain, in volatility points."""
+    atm_iv = _interp(underlying_price, chain["strike"], smile(chain, underlying_price))
+
+    with np.errstate(invalid="ignore"):
+        call_iv = np.where(chain["call_iv"] > 0, chain["call_iv"], np.nan)
+        put_iv = np.where(chain["put_iv"] > 0, chain["put_iv"], np.nan)
+    call_wing = _interp(-RISK_REVERSAL_DELTA, -chain["call_delta"], call_iv)
+    put_wing = _interp(-RISK_REVERSAL_DELTA, chain["put_delta"], put_iv)
+
+    return atm_iv, call_wing - put_wing, (call_wing + put_wing) / 2 - atm_iv
+
+def build_surface(instrument_id, ist_minute, underlying_price, chains):
+    """IVSurface row from [(expiry, captured ist_minute, chain)] sorted by expiry.
+
+    The strike axis is the union of every expiry's strikes; metrics and grid rows follow `chains`.
+    """
+    strikes = np.unique(np.concatenate([chain["strike"] for _, _, chain in chains]))
+    grid = np.full((len(chains), len(strikes)), np.nan, dtype=GRID_DTYPE)
+    metrics = []
+    for i, (_, _, chain) in enumerate(chains):
+        grid[i, np.searchsorted(strikes, chain["strike"])] = smile(chain, underlying_price)
+        metrics.append(expiry_metrics(chain, underlying_price))
+
+    def column(values):
+        return [None if np.isnan(v) else round(v, 4) for v in values]
+
+    atm_iv, risk_reversal, butterfly = zip(*metrics)
+    return {
+        "timestamp": datetime.utcnow(),
+        "ist_minute": ist_minute,
+        "instrument": instrument_id,
+        "underlying_price": underlying_price,
+        "expiries": [expiry for expiry, _, _ in chains],
+        "expiry_minutes": [captured for _, captured, _ in chains],
+        "atm_iv": column(atm_iv),
+        "rr_25d": column(risk_reversal),
+        "bf_25d": column(butterfly),
+        "strike_count": len(strikes),
+        "strike": np.ascontiguousarray(strikes, dtype=STRIKE_DTYPE).tobytes(),
+        "iv_grid": grid.tobytes(),
+    }
+
+def decode_surface(row):
+    """JSON-ready view of a stored IVSurface row, with the grid as one IV list per expiry."""
+    strikes = np.frombuffer(row.strike, dtype=STRIKE_DTYPE, count=row.strike_count)
+    grid = np.frombuffer(row.iv_grid, dtype=GRID_DTYPE).reshape(len(row.expiries), row.strike_count)
+    return {
+        "instrument": row.instrument,
+        "ist_minute": row.ist_minute,
+        "underlying_price": row.underlying_price,
+        "expiries": row.expiries,
+        "expiry_minutes": row.expiry_minutes,
+        "atm_iv": row.atm_iv,
+        "rr_25d": row.rr_25d,
+        "bf_25d": row.bf_25d,
+        "strike": strikes.tolist(),
+        "iv": [[None if np.isnan(v) else round(v, 4) for v in line] for line in grid.astype(np.float64).tolist()],
+    }
+
+def latest_chains(db, instrument_id, ist_minute):
+    """[(expiry, captured ist_minute, underlying_price, chain)] of every expiry's latest chain that day up to `ist_minute`."""
+    latest = db.query(OCSummary.expiry, OCSummary.ist_minute, OCSummary.underlying_price).filter(
+        OCSummary.instrument == instrument_id,
+        OCSummary.ist_minute >= datetime.combine(ist_minute.date(), time.min),
+        OCSummary.ist_minute <= ist_minute
+    ).distinct(OCSummary.expiry).order_by(OCSummary.expiry, OCSummary.ist_minute.desc()).all()
+
+    chains = []
+    for expiry, captured, underlying_price in latest:
+        rows = carry_forward_rows(db, instrument_id, expiry, captured)
+        if rows:
+            chains.append((expiry, captured, underlying_price, chain_from_rows(rows)))
+    return chains
+
+def write_surface(db, instrument_id, ist_minute):
+    """Build and upsert the IV surface of an (instrument, minute) in the caller's transaction. Returns it, or None.
+
+    Expiries polled less often than every minute contribute their latest chain; all of them are
+    read against the spot of the most recently captured one.
+    """
+    chains = latest_chains(db, instrument_id, ist_minute)
+    if not chains:
+        return None
+
+    underlying_price = max(chains, key=lambda c: c[1])[2]
+    row = build_surface(instrument_id, ist_minute, underlying_price, [(e, captured, chain) for e, captured, _, chain in chains])
+    stmt = pg_insert(IVSurface.__table__).values(row)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["instrument", "ist_minute"],
+        set_={name: stmt.excluded[name] for name in row if name not in ("instrument", "ist_minute")}
+    ))
+    return row
+
+def _latch_key(instrument_id, ist_minute):
+    return LATCH_KEY.format(instrument=instrument_id, minute=ist_minute.strftime("%Y%m%d%H%M"))
+
+def _latch_closed(expected, landed):
+    return expected is not None and int(landed or 0) >= int(expected)
+
+def chain_landed(instrument_id, ist_minute):
+    """Count a committed chain of the minute; True for the one caller that completes the latch."""
+    key = _latch_key(instrument_id, ist_minute)
+    try:
+        redis = sync_redis()
+        with redis.pipeline() as pipe:
+            landed, expected, _ = pipe.hincrby(key, "landed", 1).hget(key, "expected").expire(key, LATCH_TTL_SEC).execute()
+        return _latch_closed(expected, landed) and bool(redis.hsetnx(key, "fired", 1))
+    except Exception as e:
+        logger.warning(f"[IV SURFACE] Latch update failed for {instrument_id} at IST {ist_minute}: {e}")
+        return False
+
+async def chains_expected(instrument_id, ist_minute, count):
+    """Add the chains a cycle captured for the minute; True if they had all landed already and nobody fired."""
+    key = _latch_key(instrument_id, ist_minute)
+    try:
+        redis = async_redis()
+        async with redis.pipeline() as pipe:
+            expected, landed, _ = await pipe.hincrby(key, "expected", count).hget(key, "landed").expire(key, LATCH_TTL_SEC).execute()
+        return _latch_closed(expected, landed) and bool(await redis.hsetnx(key, "fired", 1))
+    except Exception as e:
+        logger.warning(f"[IV SURFACE] Latch update failed for {instrument_id} at IST {ist_minute}: {e}")
+        return False
+
+def claim_latch(instrument_id, ist_minute):
+    """Fire the minute's latch with whatever has landed; True unless it already fired (or Redis is unreachable)."""
+    key = _latch_key(instrument_id, ist_minute)
+    try:
+        redis = sync_redis()
+        with redis.pipeline() as pipe:
+            fired, _ = pipe.hsetnx(key, "fired", 1).expire(key, LATCH_TTL_SEC).execute()
+        return bool(fired)
+    except Exception as e:
+        logger.warning(f"[IV SURFACE] Latch update failed for {instrument_id} at IST {ist_minute}: {e}")
+        return True
+
+def schedule_surface(instrument_id, ist_minute, countdown=None):
+    """Queue the surface build; with a countdown it is the timeout fallback, which only builds if the latch never fired."""
+    # Imported here: the tasks package imports the writers that call this
+    from tasks.iv_surface import iv_surface_task
+    if countdown is None:
+        iv_surface_task.delay(instrument_id, ist_minute.isoformat())
+    else:
+        iv_surface_task.apply_async((instrument_id, ist_minute.isoformat(), True), countdown=countdown)
@@ -0,0 +1,36 @@
+import json
+import logging
+import numpy as np
+
+from processors.oc_chain import CHAIN_FIELDS, GEX_FIELDS, INTEGER_FIELDS
+from processors.redis_clients import sync_redis
+
+logger = logging.getLogger(__name__)
+
+MINUTE_CHANNEL = "oc:minute"
+
+def chain_columns(chain):
+    """JSON-ready columnar view of a parsed chain, with NaN mapped to null."""
+    columns = {"strike": chain["strike"].tolist()}
+    for field in [*CHAIN_FIELDS, *GEX_FIELDS]:
+        cast = int if field in INTEGER_FIELDS else float
+        columns[field] = [None if np.isnan(v) else cast(v) for v in chain[field].tolist()]
+    return columns
+
+def minute_message(instrument_id, expiry, ist_minute, underlying_price, chain, summary):
+    return {
+        "instrument": instrument_id,
+        "expiry": str(expiry),
+        "ist_minute": ist_minute.isoformat() if hasattr(ist_minute, "isoformat") else str(ist_minute),
+        "underlying_price": underlying_price,
+        "chain": chain_columns(chain),
+        "summary": summary,
+    }
+
+def publish_minute(instrument_id, expiry, ist_minute, underlying_price, chain, summary):
+    """Announce a committed minute to API processes so their hot caches pick it up."""
+    try:
+        message = minute_message(instrument_id, expiry, ist_minute, underlying_price, chain, summary)
+        sync_redis().publish(MINUTE_CHANNEL, json.dumps(message))
+    except Exception as e:
+        logger.warning(f"[MINUTE EVENTS] Failed to publish {instrument_id} ({expiry}) at IST {ist_minute}: {e}")
@@ -0,0 +1,100 @@
+import numpy as np
+
+# Per-strike vendor fields, mapped to (side, greek) in the Dhan option chain payload
+CHAIN_FIELDS = {
+    "call_delta": ("ce", "delta"),
+    "call_theta": ("ce", "theta"),
+    "call_gamma": ("ce", "gamma"),
+    "call_vega": ("ce", "vega"),
+    "call_iv": ("ce", "implied_volatility"),
+    "call_oi": ("ce", "oi"),
+    "call_volume": ("ce", "volume"),
+    "call_last_price": ("ce", "last_price"),
+    "put_delta": ("pe", "delta"),
+    "put_theta": ("pe", "theta"),
+    "put_gamma": ("pe", "gamma"),
+    "put_vega": ("pe", "vega"),
+    "put_iv": ("pe", "implied_volatility"),
+    "put_oi": ("pe", "oi"),
+    "put_volume": ("pe", "volume"),
+    "put_last_price": ("pe", "last_price"),
+}
+GREEKS = {"delta", "theta", "gamma", "vega"}
+INTEGER_FIELDS = {"call_oi", "call_volume", "put_oi", "put_volume"}
+GEX_FIELDS = ["call_gex", "put_gex", "net_gex", "abs_gex"]
+
+def strike_window(instrument, underlying_price, width=40):
+    strike_range = instrument["STRIKE_RANGE"]
+    atm = round(underlying_price / strike_range) * strike_range
+    return atm - width * strike_range, atm + width * strike_range
+
+def compute_gex(chain):
+    """Add per-strike GEX columns to a parsed chain in place."""
+    call_gex = np.nan_to_num(chain["call_gamma"]) * np.nan_to_num(chain["call_oi"])
+    put_gex = np.nan_to_num(chain["put_gamma"]) * np.nan_to_num(chain["put_oi"])
+    chain["call_gex"] = call_gex
+    chain["put_gex"] = put_gex
+    chain["net_gex"] = call_gex - put_gex
+    chain["abs_gex"] = np.abs(call_gex) + np.abs(put_gex)
+    return chain
+
+def parse_oc_chain(instrument, oc_response):
+    """Parse the ±40 strike window of a Dhan option chain response into strike-sorted float64 columns.
+
+    Missing vendor values become NaN. Returns (underlying_price, chain) where chain maps
+    "strike", every CHAIN_FIELDS column and the GEX columns to equal-length arrays.
+    """
+    oc, underlying_price = oc_response["oc"], oc_response["last_price"]
+    lower_bound, upper_bound = strike_window(instrument, underlying_price)
+
+    strikes = []
+    values = {field: [] for field in CHAIN_FIELDS}
+    for strike_str, legs in oc.items():
+        strike = float(strike_str)
+        if not (lower_bound <= strike <= upper_bound):
+            continue
+
+        strikes.append(strike)
+        for field, (side, key) in CHAIN_FIELDS.items():
+            leg = legs.get(side, {})
+            if key in GREEKS:
+                leg = leg.get("greeks", {})
+            values[field].append(leg.get(key))
+
+    order = np.argsort(strikes, kind="stable")
+    chain = {"strike": np.array(strikes, dtype=np.float64)[order]}
+    for field, column in values.items():
+        chain[field] = np.array(column, dtype=np.float64)[order]
+
+    return underlying_price, compute_gex(chain)
+
+def chain_from_rows(rows):
+    """Rebuild a parsed chain from stored OCMinuteSnapshot-shaped rows."""
+    rows = sorted(rows, key=lambda r: r.strike)
+    chain = {"strike": np.array([r.strike for r in rows], dtype=np.float64)}
+    for field in [*CHAIN_FIELDS, *GEX_FIELDS]:
+        chain[field] = np.array([getattr(r, field) for r in rows], dtype=np.float64)
+    return chain
+
+def chain_rows(chain, instrument_id, expiry, underlying_price, snapshot_time, ist_minute):
+    """Turn a parsed chain back into OCMinuteSnapshot row dicts, with NaN mapped to NULL."""
+    columns = {}
+    for field in [*CHAIN_FIELDS, *GEX_FIELDS]:
+        cast = int if field in INTEGER_FIELDS else float
+        columns[field] = [None if np.isnan(v) else cast(v) for v in chain[field].tolist()]
+
+    rows = []
+    for i, strike in enumerate(chain["strike"].tolist()):
+        row = {
+            "timestamp": snapshot_time,
+            "ist_minute": ist_minute,
+            "instrument": instrument_id,
+            "expiry": expiry,
+            "strike": strike,
+            "underlying_price": underlying_price,
+        }
+        for field, column in columns.items():
+            row[field] = column[i]
+        rows.append(row)
+
+    return rows
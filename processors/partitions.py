@@ -0,0 +1,46 @@
+import logging
+from sqlalchemy import text
+from datetime import timedelta
+
+from models import OCMinuteSnapshot, OCSummary
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = [OCMinuteSnapshot.__tablename__, OCSummary.__tablename__]
+
+def partition_name(table, ist_date):
+    return f"{table}_p{ist_date:%Y%m%d}"
+
+def ensure_partitions(db, start_date, days):
+    """Create the daily partitions covering [start_date, start_date + days) if they don't exist yet."""
+    created = 0
+    for offset in range(days):
+        ist_date = start_date + timedelta(days=offset)
+        for table in PARTITIONED_TABLES:
+            name = partition_name(table, ist_date)
+            if db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar():
+                continue
+
+            db.execute(text(
+                f"CREATE TABLE {name} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{ist_date.isoformat()}') TO ('{(ist_date + timedelta(days=1)).isoformat()}')"
+            ))
+            created += 1
+
+    if created:
+        logger.info(f"[PARTITIONS] Created {created} partitions from {start_date} for {days} days")
+    return created
+
+def drop_partitions(db, ist_date):
+    """Detach and drop the given IST date's partitions. Returns the number of partitions dropped."""
+    dropped = 0
+    for table in PARTITIONED_TABLES:
+        name = partition_name(table, ist_date)
+        if not db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar():
+            continue
+
+        db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        db.execute(text(f"DROP TABLE {name}"))
+        dropped += 1
+
+    return dropped
@@ -0,0 +1,50 @@
+import uuid
+import struct
+import logging
+import numpy as np
+
+from config import PAYLOAD_TTL_SEC
+from processors.oc_chain import CHAIN_FIELDS, compute_gex
+from processors.redis_clients import sync_redis, async_redis
+
+logger = logging.getLogger(__name__)
+
+# Header: magic, strike count, underlying price; followed by one float64 record per strike
+HEADER = struct.Struct("<4sId")
+MAGIC = b"OCC1"
+CHAIN_DTYPE = np.dtype([("strike", "<f8")] + [(field, "<f8") for field in CHAIN_FIELDS])
+
+def pack_chain(underlying_price, chain):
+    """Serialize a parsed (already strike-window trimmed) chain into a compact binary blob."""
+    records = np.empty(len(chain["strike"]), dtype=CHAIN_DTYPE)
+    for name in CHAIN_DTYPE.names:
+        records[name] = chain[name]
+    return HEADER.pack(MAGIC, len(records), underlying_price) + records.tobytes()
+
+def unpack_chain(blob):
+    """Inverse of pack_chain. Columns are zero-copy views over `blob`; GEX columns are recomputed."""
+    magic, count, underlying_price = HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise ValueError(f"Unknown chain payload format {magic!r}")
+
+    records = np.frombuffer(blob, dtype=CHAIN_DTYPE, count=count, offset=HEADER.size)
+    chain = {name: records[name] for name in CHAIN_DTYPE.names}
+    return underlying_price, compute_gex(chain)
+
+async def store_chain(instrument_id, expiry, underlying_price, chain):
+    """Store a packed chain in Redis and return the claim-check key to hand to the worker."""
+    key = f"oc:payload:{instrument_id}:{expiry}:{uuid.uuid4().hex}"
+    await async_redis().set(key, pack_chain(underlying_price, chain), ex=PAYLOAD_TTL_SEC)
+    return key
+
+def load_chain(key):
+    blob = sync_redis().get(key)
+    if blob is None:
+        raise KeyError(f"Chain payload {key} expired or missing")
+    return unpack_chain(blob)
+
+def discard_chain(key):
+    try:
+        sync_redis().delete(key)
+    except Exception as e:
+        logger.warning(f"[PAYLOAD] Failed to delete {key}: {e}")
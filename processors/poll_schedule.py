@@ -0,0 +1,26 @@
+from datetime import datetime, time
+from sqlalchemy import func, or_, cast, Integer, Time
+from sqlalchemy.dialects.postgresql import array
+
+from config import POLL_TIER_MINUTES
+
+# Minute slots are counted from the open; 15:29 doubles as the closing slot every expiry is polled at
+SESSION_START = time(9, 15)
+CLOSING_SLOT = time(15, 29)
+
+def poll_interval(rank):
+    """Minutes between polls of the expiry at `rank` (0 = current) in its instrument's expiry list."""
+    return POLL_TIER_MINUTES[min(rank, len(POLL_TIER_MINUTES) - 1)]
+
+def is_due(rank, slot):
+    """Whether an expiry of this rank is polled at the IST minute `slot`."""
+    if slot.time() >= CLOSING_SLOT:
+        return True
+    minutes = int((slot - datetime.combine(slot.date(), SESSION_START)).total_seconds() // 60)
+    return minutes % poll_interval(rank) == 0
+
+def due_clause(rank, slot, session_start):
+    """SQL counterpart of is_due for a rank column and a slot column, given that day's session start."""
+    interval = array(POLL_TIER_MINUTES)[func.least(rank, len(POLL_TIER_MINUTES) - 1) + 1]
+    minutes = cast(func.extract("epoch", slot - session_start), Integer) // 60
+    return or_(minutes % interval == 0, cast(slot, Time) >= CLOSING_SLOT)
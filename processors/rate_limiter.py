@@ -0,0 +1,59 @@
+import asyncio
+import time as timer
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, holding at most `burst` tokens."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = timer.monotonic()
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        # The lock is FIFO, so callers are served in the order they asked
+        async with self.lock:
+            while True:
+                now = timer.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds):
+        """Hold back every caller for `seconds`, e.g. after the server answered 429."""
+        self.paused_until = max(self.paused_until, timer.monotonic() + seconds)
+        self.tokens = 0
+        self.updated = self.paused_until
+
+class RateLimiter:
+    """Global token bucket plus a minimum spacing between repeats of the same request key."""
+
+    def __init__(self, rate, burst, min_key_interval=0.0):
+        self.bucket = TokenBucket(rate, burst)
+        self.min_key_interval = min_key_interval
+        self.key_next_at = {}
+
+    async def acquire(self, key=None):
+        if key is not None and self.min_key_interval:
+            now = timer.monotonic()
+            next_at = max(self.key_next_at.get(key, now), now)
+            self.key_next_at[key] = next_at + self.min_key_interval
+            if next_at > now:
+                await asyncio.sleep(next_at - now)
+
+        await self.bucket.acquire()
+
+    def pause(self, seconds):
+        self.bucket.pause(seconds)
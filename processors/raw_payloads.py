@@ -0,0 +1,57 @@
+import os
+import gzip
+import json
+import logging
+import threading
+from datetime import datetime
+
+from config import RAW_PAYLOAD_DIR
+
+logger = logging.getLogger(__name__)
+
+# Appends from concurrent fetches (run in worker threads) must not interleave within a file
+_lock = threading.Lock()
+
+def payload_path(instrument_id, ist_date, root=RAW_PAYLOAD_DIR):
+    return os.path.join(root, instrument_id, f"{ist_date.isoformat()}.jsonl.gz")
+
+def record_payload(instrument_id, expiry, ist_minute, captured_at, closing_snapshot_time, oc_response, root=RAW_PAYLOAD_DIR):
+    """Append one raw option chain response to its (instrument, IST date) file.
+
+    Each append is its own gzip member, so a file cut short by a crash still reads up to the last
+    complete line. Errors are logged and swallowed: recording must never hold up ingest.
+    """
+    line = json.dumps({
+        "expiry": expiry,
+        "captured_at": captured_at.isoformat(),
+        "closing_snapshot_time": closing_snapshot_time.isoformat() if closing_snapshot_time else None,
+        "oc_response": oc_response,
+    }, separators=(",", ":")) + "\n"
+
+    try:
+        path = payload_path(instrument_id, ist_minute.date(), root)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with _lock, gzip.open(path, "at", compresslevel=1) as f:
+            f.write(line)
+    except Exception as e:
+        logger.error(f"[RAW PAYLOAD] Failed to record {instrument_id} ({expiry}) at IST {ist_minute}: {e}")
+
+def read_payloads(instrument_id, ist_date, root=RAW_PAYLOAD_DIR):
+    """Yield (expiry, captured_at, closing_snapshot_time, oc_response) in recorded order."""
+    path = payload_path(instrument_id, ist_date, root)
+    if not os.path.exists(path):
+        return
+
+    with gzip.open(path, "rt") as f:
+        try:
+            for line in f:
+                record = json.loads(line)
+                closing = record["closing_snapshot_time"]
+                yield (
+                    record["expiry"],
+                    datetime.fromisoformat(record["captured_at"]),
+                    datetime.fromisoformat(closing) if closing else None,
+                    record["oc_response"],
+                )
+        except (EOFError, json.JSONDecodeError):
+            logger.warning(f"[RAW PAYLOAD] {path} ends in a partial record, skipping it")
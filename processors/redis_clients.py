@@ -0,0 +1,20 @@
+from config import REDIS_URL
+
+_redis = None
+_async_redis = None
+
+def sync_redis():
+    """Process-wide Redis client for Celery workers and other sync code."""
+    global _redis
+    if _redis is None:
+        import redis
+        _redis = redis.Redis.from_url(REDIS_URL)
+    return _redis
+
+def async_redis():
+    """Process-wide asyncio Redis client for the API process."""
+    global _async_redis
+    if _async_redis is None:
+        import redis.asyncio as aioredis
+        _async_redis = aioredis.from_url(REDIS_URL)
+    return _async_redis
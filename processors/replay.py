@@ -0,0 +1,208 @@
+"""Recompute historical summaries from stored snapshots or recorded raw payloads.
+
+Usage:
+    python -m processors.replay --source payloads --start 2025-01-01 --end 2025-12-31 [--workers 8] [--instrument NIFTY]
+    python -m processors.replay --source snapshots --start 2025-06-02 --end 2025-06-06
+
+Run after changing the parsing, GEX or summary formulas. Work is fanned out across a process pool
+by (instrument, IST date) and every result is upserted, so a replay can be re-run or interrupted safely.
+"""
+import logging
+import argparse
+import time as timer
+from itertools import groupby
+from datetime import date, datetime, time, timedelta
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from db import engine, SessionLocal
+from config import INSTRUMENTS, RAW_PAYLOAD_DIR, GREEKS_FILL_ENABLED
+from models import HistoricalOCSnapshot, HistoricalOCSummary, HistoricalOCSummaryTier, TIER_METRICS, TIER_AGGREGATES
+from processors.oc_chain import parse_oc_chain, compute_gex, chain_from_rows
+from processors.summary_engine import compute_summary
+from processors.greeks import fill_greeks
+from processors.ingest import minute_stamp
+from processors.history_tiers import TIERS, AGGREGATED_TIERS, bucket_start
+from processors.raw_payloads import read_payloads
+from utils import is_trading_day
+
+logger = logging.getLogger(__name__)
+
+SOURCES = ["payloads", "snapshots"]
+
+def payload_summaries(instrument, ist_date, root=RAW_PAYLOAD_DIR):
+    """Minute summaries of a recorded day: {(expiry, ist_minute): (snapshot_time, summary)}.
+
+    Payloads go through parse_oc_chain like a live capture; when a minute was captured more than
+    once (recoveries, closing fetches) the last recording wins, as it did in storage.
+    """
+    summaries = {}
+    for expiry, captured_at, closing_snapshot_time, oc_response in read_payloads(instrument["SECURITY_ID"], ist_date, root):
+        snapshot_time, ist_minute = minute_stamp(captured_at, closing_snapshot_time)
+        underlying_price, chain = parse_oc_chain(instrument, oc_response)
+        if GREEKS_FILL_ENABLED and fill_greeks(chain, underlying_price, expiry, ist_minute)["filled"]:
+            compute_gex(chain)
+        if len(chain["strike"]):
+            summaries[(date.fromisoformat(expiry), ist_minute)] = (
+                snapshot_time, compute_summary(chain, underlying_price, instrument["STRIKE_RANGE"])
+            )
+    return summaries
+
+def snapshot_summaries(db, instrument, ist_date):
+    """5-minute summaries rebuilt from a rolled-up day's historical_oc_snapshots (current expiry only).
+
+    GEX is recomputed from the stored greeks and OI, so GEX formula changes apply too; greeks missing
+    from days stored before the Black-Scholes fill are filled first.
+    """
+    table = HistoricalOCSnapshot.__table__
+    rows = db.execute(select(table).where(
+        table.c.instrument == instrument["SECURITY_ID"],
+        table.c.ist_minute >= datetime.combine(ist_date, time.min),
+        table.c.ist_minute <= datetime.combine(ist_date, time.max)
+    ).order_by(table.c.expiry, table.c.ist_minute)).all()
+
+    summaries = {}
+    for (expiry, ist_minute), group in groupby(rows, key=lambda r: (r.expiry, r.ist_minute)):
+        group = list(group)
+        chain = chain_from_rows(group)
+        if GREEKS_FILL_ENABLED:
+            fill_greeks(chain, group[0].underlying_price, expiry, ist_minute)
+        compute_gex(chain)
+        summaries[(expiry, ist_minute)] = (
+            group[0].timestamp, compute_summary(chain, group[0].underlying_price, instrument["STRIKE_RANGE"])
+        )
+    return summaries
+
+def upsert_summary_buckets(db, instrument_id, summaries):
+    """Upsert the latest summary of every 5-minute bucket into historical_oc_summary."""
+    buckets = {}
+    for (expiry, ist_minute), value in sorted(summaries.items()):
+        buckets[(expiry, bucket_start(ist_minute, 5))] = value
+
+    rows = [
+        {"timestamp": snapshot_time, "ist_minute": bucket, "instrument": instrument_id, "expiry": expiry, **summary}
+        for (expiry, bucket), (snapshot_time, summary) in buckets.items()
+    ]
+    if not rows:
+        return 0
+
+    stmt = pg_insert(HistoricalOCSummary.__table__)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["instrument", "expiry", "ist_minute"],
+        set_={metric: stmt.excluded[metric] for metric in TIER_METRICS}
+    ), rows)
+    return len(rows)
+
+def tier_rows(instrument_id, summaries, tier):
+    """last/min/max/mean of every metric per `tier` bucket, matching tier_insert (NULLs ignored except by last)."""
+    groups = {}
+    for (expiry, ist_minute), (_, summary) in sorted(summaries.items()):
+        groups.setdefault((expiry, bucket_start(ist_minute, TIERS[tier])), []).append(summary)
+
+    rows = []
+    for (expiry, bucket), group in groups.items():
+        row = {"tier": tier, "ist_minute": bucket, "instrument": instrument_id, "expiry": expiry, "samples": len(group)}
+        for metric in TIER_METRICS:
+            values = [s[metric] for s in group if s[metric] is not None]
+            row[f"{metric}_last"] = group[-1][metric]
+            row[f"{metric}_min"] = min(values) if values else None
+            row[f"{metric}_max"] = max(values) if values else None
+            row[f"{metric}_mean"] = sum(values) / len(values) if values else None
+        rows.append(row)
+    return rows
+
+def upsert_tiers(db, instrument_id, summaries):
+    rows = [row for tier in AGGREGATED_TIERS for row in tier_rows(instrument_id, summaries, tier)]
+    if not rows:
+        return 0
+
+    stmt = pg_insert(HistoricalOCSummaryTier.__table__)
+    columns = ["samples", *[f"{metric}_{aggregate}" for metric in TIER_METRICS for aggregate in TIER_AGGREGATES]]
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["tier", "instrument", "expiry", "ist_minute"],
+        set_={name: stmt.excluded[name] for name in columns}
+    ), rows)
+    return len(rows)
+
+def replay_day(source, instrument_id, ist_date, root=RAW_PAYLOAD_DIR):
+    """Recompute and upsert one (instrument, IST date) in its own transaction. Returns counts for the log.
+
+    Recorded payloads have every captured minute of every expiry, so they also rebuild the 15m/1h/1d
+    tiers. Stored snapshots only keep the current expiry at 5-minute resolution, so they refresh
+    historical_oc_summary alone rather than coarsening tiers built from full-resolution minutes.
+    """
+    instrument = next(i for i in INSTRUMENTS if i["SECURITY_ID"] == instrument_id)
+    db = SessionLocal()
+
+    try:
+        if source == "payloads":
+            summaries = payload_summaries(instrument, ist_date, root)
+        else:
+            summaries = snapshot_summaries(db, instrument, ist_date)
+
+        buckets = upsert_summary_buckets(db, instrument_id, summaries)
+        tiers = upsert_tiers(db, instrument_id, summaries) if source == "payloads" else 0
+        db.commit()
+        return {"minutes": len(summaries), "buckets": buckets, "tiers": tiers}
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def _init_worker():
+    # Connections inherited from the parent must not be shared with it; each worker opens its own
+    engine.dispose(close=False)
+
+def replay(source, start, end, instrument_ids=None, workers=None, root=RAW_PAYLOAD_DIR):
+    """Replay every trading day in [start, end] for the given instruments (default all) across `workers` processes."""
+    instrument_ids = instrument_ids or [i["SECURITY_ID"] for i in INSTRUMENTS]
+    units = [
+        (source, instrument_id, start + timedelta(days=d), root)
+        for d in range((end - start).days + 1) if is_trading_day(start + timedelta(days=d))
+        for instrument_id in instrument_ids
+    ]
+
+    totals = {"minutes": 0, "buckets": 0, "tiers": 0}
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {pool.submit(replay_day, *unit): unit for unit in units}
+        for future in as_completed(futures):
+            _, instrument_id, ist_date, _ = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failed += 1
+                logger.error(f"[REPLAY] Failed to replay {instrument_id} at IST {ist_date}: {e}")
+                continue
+
+            for key, count in result.items():
+                totals[key] += count
+            logger.info(f"[REPLAY] {instrument_id} at IST {ist_date}: {result['minutes']} minutes, "
+                        f"{result['buckets']} summary buckets, {result['tiers']} tier buckets")
+
+    return {**totals, "days": len(units) - failed, "failed": failed}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", choices=SOURCES, default="payloads")
+    parser.add_argument("--start", type=date.fromisoformat, required=True)
+    parser.add_argument("--end", type=date.fromisoformat, required=True)
+    parser.add_argument("--instrument", action="append", help="Limit to this SECURITY_ID (repeatable)")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count)")
+    parser.add_argument("--payload-dir", default=RAW_PAYLOAD_DIR, help="Recorded payload root (default: RAW_PAYLOAD_DIR)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    started = timer.perf_counter()
+    totals = replay(args.source, args.start, args.end, args.instrument, args.workers, args.payload_dir)
+    logger.info(
+        f"[REPLAY] Replayed {totals['days']} instrument-days ({totals['failed']} failed) from {args.source} in "
+        f"{timer.perf_counter() - started:.1f}s: {totals['minutes']} minutes, {totals['buckets']} summary buckets, "
+        f"{totals['tiers']} tier buckets"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import logging
+import numpy as np
+from datetime import datetime, timedelta
+
+from config import DELTA_KEYFRAME_MINUTES, DELTA_STATE_TTL_SEC
+from processors.oc_chain import CHAIN_FIELDS, GEX_FIELDS, chain_rows
+from processors.payload_store import pack_chain, unpack_chain
+from processors.redis_clients import sync_redis
+
+logger = logging.getLogger(__name__)
+
+def state_key(instrument_id, expiry):
+    return f"oc:last:{instrument_id}:{expiry}"
+
+def load_state(instrument_id, expiry):
+    """Return (ist_minute, keyframe_minute, chain) of the last committed write, or None if unknown."""
+    try:
+        state = sync_redis().hgetall(state_key(instrument_id, expiry))
+    except Exception as e:
+        logger.warning(f"[DELTA] Failed to load last state for {instrument_id} ({expiry}): {e}")
+        return None
+    if not state:
+        return None
+
+    _, chain = unpack_chain(state[b"chain"])
+    return (
+        datetime.fromisoformat(state[b"minute"].decode()),
+        datetime.fromisoformat(state[b"keyframe"].decode()),
+        chain
+    )
+
+def save_state(instrument_id, expiry, ist_minute, keyframe_minute, underlying_price, chain):
+    """Remember the full chain just committed so the next minute can be diffed against it."""
+    key = state_key(instrument_id, expiry)
+    try:
+        pipe = sync_redis().pipeline()
+        pipe.hset(key, mapping={
+            "minute": ist_minute.isoformat(),
+            "keyframe": keyframe_minute.isoformat(),
+            "chain": pack_chain(underlying_price, chain),
+        })
+        pipe.expire(key, DELTA_STATE_TTL_SEC)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"[DELTA] Failed to save last state for {instrument_id} ({expiry}): {e}")
+
+def changed_strikes(previous, chain):
+    """Mask of strikes in `chain` that are new or differ from `previous` in any vendor field,
+    plus the strikes of `previous` that are no longer in `chain`."""
+    prev_strikes = previous["strike"]
+    if not len(prev_strikes):
+        return np.ones(len(chain["strike"]), dtype=bool), prev_strikes
+
+    idx = np.minimum(np.searchsorted(prev_strikes, chain["strike"]), len(prev_strikes) - 1)
+    changed = prev_strikes[idx] != chain["strike"]
+    for field in CHAIN_FIELDS:
+        old, new = previous[field][idx], chain[field]
+        changed |= ~((old == new) | (np.isnan(old) & np.isnan(new)))
+
+    removed = prev_strikes[~np.isin(prev_strikes, chain["strike"])]
+    return changed, removed
+
+def plan_write(instrument_id, expiry, ist_minute, chain):
+    """Decide how to store a minute. Returns (keyframe_minute, changed, removed) where `changed` is
+    None for a full keyframe write.
+
+    A delta is only safe against the minute immediately before this one; a missing or stale state,
+    a gap, a rewrite of an earlier minute or an expired keyframe all fall back to a keyframe.
+    """
+    state = load_state(instrument_id, expiry)
+    if state:
+        last_minute, keyframe_minute, previous = state
+        if last_minute == ist_minute - timedelta(minutes=1) and \
+                ist_minute - keyframe_minute < timedelta(minutes=DELTA_KEYFRAME_MINUTES):
+            changed, removed = changed_strikes(previous, chain)
+            return keyframe_minute, changed, removed
+
+    return ist_minute, None, np.empty(0)
+
+def tombstone_rows(instrument_id, expiry, underlying_price, snapshot_time, ist_minute, strikes):
+    """Rows with every vendor field NULL, marking strikes that left the chain in a delta minute."""
+    chain = {"strike": np.asarray(strikes, dtype=np.float64)}
+    for field in [*CHAIN_FIELDS, *GEX_FIELDS]:
+        chain[field] = np.full(len(strikes), np.nan)
+    return chain_rows(chain, instrument_id, expiry, underlying_price, snapshot_time, ist_minute)
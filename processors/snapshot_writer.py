@@ -0,0 +1,107 @@
+import io
+import csv
+import logging
+from datetime import datetime, time
+from sqlalchemy import text, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from models import OCMinuteSnapshot, OCSummary, RollupWatermark
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = ["instrument", "expiry", "strike", "ist_minute"]
+SUMMARY_KEY = ["instrument", "expiry", "ist_minute"]
+WATERMARK_KEY = ["instrument", "expiry", "ist_date"]
+SNAPSHOT_COLUMNS = [c.name for c in OCMinuteSnapshot.__table__.columns]
+
+STAGE_TABLE = f"{OCMinuteSnapshot.__tablename__}_stage"
+
+# The stage is consumed by the same statement that upserts it, so it is empty again afterwards
+UPSERT_MINUTE_SNAPSHOT = text(f"""
+    WITH staged AS (
+        DELETE FROM {STAGE_TABLE} RETURNING *
+    ), stale AS (
+        DELETE FROM {OCMinuteSnapshot.__tablename__}
+        WHERE instrument = :instrument AND expiry = :expiry AND ist_minute = :ist_minute
+          AND strike NOT IN (SELECT strike FROM staged)
+    )
+    INSERT INTO {OCMinuteSnapshot.__tablename__} ({", ".join(SNAPSHOT_COLUMNS)})
+    SELECT {", ".join(SNAPSHOT_COLUMNS)} FROM staged
+    ON CONFLICT ({", ".join(SNAPSHOT_KEY)}) DO UPDATE SET
+        {", ".join(f"{c} = EXCLUDED.{c}" for c in SNAPSHOT_COLUMNS if c not in SNAPSHOT_KEY)}
+""")
+
+def copy_rows(db, table_name, columns, rows):
+    """Stream row dicts into `table_name` with a single COPY on the session's connection."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([r"\N" if row.get(c) is None else row[c] for c in columns])
+    buffer.seek(0)
+
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table_name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer
+        )
+    finally:
+        cursor.close()
+
+def replace_minute_snapshot(db, instrument_id, expiry, ist_minute, rows):
+    """Upsert every strike for an (instrument, expiry, ist_minute) within the caller's transaction.
+
+    The strikes are COPYed into a session-local stage table and upserted from it on the natural
+    key in one statement, which also deletes strikes the earlier write had but `rows` lacks, so a
+    rewrite still replaces the whole minute at the cost of three round trips.
+    """
+    db.execute(text(
+        f"CREATE TEMP TABLE IF NOT EXISTS {STAGE_TABLE} (LIKE {OCMinuteSnapshot.__tablename__}) ON COMMIT DELETE ROWS"
+    ))
+    if rows:
+        copy_rows(db, STAGE_TABLE, SNAPSHOT_COLUMNS, rows)
+
+    db.execute(UPSERT_MINUTE_SNAPSHOT, {"instrument": instrument_id, "expiry": expiry, "ist_minute": ist_minute})
+    return len(rows)
+
+def replace_minute_summary(db, instrument_id, expiry, ist_minute, summary, snapshot_time=None, keyframe=True):
+    """Upsert the OCSummary row for an (instrument, expiry, ist_minute).
+
+    `keyframe` records whether the minute's snapshot rows hold the full chain or only a delta.
+    """
+    row = {
+        "timestamp": snapshot_time or datetime.utcnow(),
+        "ist_minute": ist_minute,
+        "instrument": instrument_id,
+        "expiry": expiry,
+        "keyframe": keyframe,
+        **summary,
+    }
+
+    stmt = pg_insert(OCSummary.__table__).values(row)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=SUMMARY_KEY,
+        set_={name: stmt.excluded[name] for name in row if name not in SUMMARY_KEY}
+    ))
+    note_minute_write(db, instrument_id, expiry, ist_minute)
+    return 1
+
+def note_minute_write(db, instrument_id, expiry, ist_minute):
+    """Flag a minute written below its rollup watermark, so the next seal rolls its bucket up again.
+
+    The watermark row is created or locked either way, which orders this write against a seal of
+    the same (instrument, expiry, date) running concurrently: the seal either sees the committed
+    minute or this statement sees the seal's new sealed_until.
+    """
+    watermark = RollupWatermark.__table__
+    stmt = pg_insert(watermark).values(
+        instrument=instrument_id,
+        expiry=expiry,
+        ist_date=ist_minute.date(),
+        sealed_until=datetime.combine(ist_minute.date(), time.min),
+        updated_at=datetime.utcnow()
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=WATERMARK_KEY,
+        set_={"dirty_from": func.least(func.coalesce(watermark.c.dirty_from, ist_minute), ist_minute)},
+        where=watermark.c.sealed_until > ist_minute
+    ))
@@ -0,0 +1,28 @@
+import numpy as np
+
+def compute_summary(chain, underlying_price, strike_range):
+    """Vectorized OCSummary metrics for a strike-sorted parsed chain."""
+    strikes = chain["strike"]
+    atm = round(underlying_price / strike_range) * strike_range
+    otm_calls = strikes >= atm
+    otm_puts = strikes <= atm
+
+    # Gamma flip: first strike (ascending) where cumulative net GEX turns non-negative
+    cum_net_gex = np.cumsum(np.nan_to_num(chain["net_gex"]))
+    flips = np.flatnonzero(cum_net_gex >= 0)
+    gamma_flip_level = float(strikes[flips[0]]) if flips.size else None
+
+    def otm_sum(field, mask):
+        return float(np.nan_to_num(chain[field])[mask].sum())
+
+    return {
+        "underlying_price": underlying_price,
+        "total_net_gex": float(np.nan_to_num(chain["net_gex"]).sum()),
+        "gamma_flip_level": gamma_flip_level,
+        "otm_call_vega": otm_sum("call_vega", otm_calls),
+        "otm_put_vega": otm_sum("put_vega", otm_puts),
+        "otm_call_theta": otm_sum("call_theta", otm_calls),
+        "otm_put_theta": otm_sum("put_theta", otm_puts),
+        "otm_call_delta": otm_sum("call_delta", otm_calls),
+        "otm_put_delta": otm_sum("put_delta", otm_puts),
+    }
@@ -1,2 +1,9 @@
 from .save_oc_snapshot import save_oc_snapshot_task
+from .compute_summary import oc_summary_task
 from .rollup_historical import rollup_historical_task
+from .maintain_partitions import ensure_partitions_task
+from .migrate_frames import migrate_historical_frames_task
+from .backfill_tiers import backfill_summary_tiers_task
+from .archive_history import archive_history_task
+from .seal_buckets import seal_buckets_task
+from .iv_surface import iv_surface_task
@@ -0,0 +1,61 @@
+import logging
+from sqlalchemy import func
+from datetime import date, datetime, time, timedelta
+
+from db import SessionLocal
+from celery_config import celery_app
+from config import IST_OFFSET, ARCHIVE_AFTER_DAYS, ARCHIVE_PRUNE
+from models import HistoricalOCSnapshot, HistoricalOCSummary
+from processors.archive import day_bounds, export_day, archived_rows, prune_day
+
+logger = logging.getLogger(__name__)
+
+@celery_app.task
+def archive_history_task(before_date=None, prune=None):
+    """Export closed historical days older than `before_date` to Parquet, optionally pruning them from Postgres.
+
+    Defaults to ARCHIVE_AFTER_DAYS before today (IST) and ARCHIVE_PRUNE. Days whose archive already
+    holds the same row count are not rewritten, and a day is only pruned once the archive matches it.
+    """
+    prune = ARCHIVE_PRUNE if prune is None else prune
+    cutoff = date.fromisoformat(before_date) if before_date else (
+        (datetime.utcnow() + IST_OFFSET).date() - timedelta(days=ARCHIVE_AFTER_DAYS)
+    )
+
+    db = SessionLocal()
+
+    try:
+        for model in (HistoricalOCSnapshot, HistoricalOCSummary):
+            table_name = model.__tablename__
+            days = db.query(func.date(model.ist_minute)).filter(
+                model.ist_minute < datetime.combine(cutoff, time.min)
+            ).distinct().all()
+
+            for (ist_date,) in sorted(days):
+                try:
+                    day_start, day_end = day_bounds(ist_date)
+                    stored = db.query(func.count()).select_from(model).filter(
+                        model.ist_minute >= day_start,
+                        model.ist_minute <= day_end
+                    ).scalar()
+
+                    if archived_rows(model, ist_date) != stored:
+                        export_day(db, model, ist_date)
+                        logger.info(f"[ARCHIVE] Exported {stored} {table_name} rows at IST {ist_date}")
+
+                    if not prune:
+                        continue
+                    if archived_rows(model, ist_date) != stored:
+                        logger.error(f"[ARCHIVE] Archive row count mismatch for {table_name} at IST {ist_date}, not pruning")
+                        continue
+
+                    deleted = prune_day(db, model, ist_date)
+                    db.commit()
+                    logger.info(f"[ARCHIVE] Pruned {deleted} {table_name} rows at IST {ist_date}")
+                except Exception as e:
+                    db.rollback()
+                    logger.error(f"[ARCHIVE] Failed to archive {table_name} at IST {ist_date}: {e}")
+
+        logger.info(f"[ARCHIVE] Archival before IST {cutoff} completed")
+    finally:
+        db.close()
@@ -0,0 +1,42 @@
+import logging
+from sqlalchemy import func
+from datetime import date, datetime, time
+
+from db import SessionLocal
+from celery_config import celery_app
+from models import HistoricalOCSummary
+from processors.history_tiers import AGGREGATED_TIERS, tier_insert
+
+logger = logging.getLogger(__name__)
+
+@celery_app.task
+def backfill_summary_tiers_task(start_date=None, end_date=None):
+    """Build the 15m/1h/1d summary tiers for days rolled up before they existed, one committed date at a time.
+
+    Intraday minutes for those days are gone, so min/max/mean are taken over the 5-minute last values.
+    """
+    db = SessionLocal()
+
+    try:
+        days = db.query(func.date(HistoricalOCSummary.ist_minute)).distinct()
+        if start_date:
+            days = days.filter(HistoricalOCSummary.ist_minute >= datetime.combine(date.fromisoformat(start_date), time.min))
+        if end_date:
+            days = days.filter(HistoricalOCSummary.ist_minute <= datetime.combine(date.fromisoformat(end_date), time.max))
+
+        for (ist_date,) in sorted(days.all()):
+            try:
+                inserted = sum(db.execute(tier_insert(
+                    HistoricalOCSummary, tier,
+                    HistoricalOCSummary.ist_minute >= datetime.combine(ist_date, time.min),
+                    HistoricalOCSummary.ist_minute <= datetime.combine(ist_date, time.max)
+                )).rowcount for tier in AGGREGATED_TIERS)
+                db.commit()
+                logger.info(f"[TIERS] Backfilled {inserted} tier buckets at IST {ist_date}")
+            except Exception as e:
+                db.rollback()
+                logger.error(f"[TIERS] Failed to backfill tiers at IST {ist_date}: {e}")
+
+        logger.info("[TIERS] Summary tier backfill completed")
+    finally:
+        db.close()
@@ -4,55 +4,50 @@ from db import SessionLocal
 from config import INSTRUMENTS
 from celery_config import celery_app
 from models import OCMinuteSnapshot, OCSummary
+from processors.oc_chain import chain_from_rows
+from processors.carry_forward import carry_forward_rows
+from processors.summary_engine import compute_summary
+from processors.snapshot_writer import replace_minute_summary
 
 logger = logging.getLogger(__name__)
 
 @celery_app.task
 def oc_summary_task(instrument_id, expiry, ist_minute):
+    """Recompute the OCSummary for a stored minute.
+
+    save_oc_snapshot_task writes the summary in the same transaction as the rows, so this is
+    only needed to rebuild a minute after the rows or the summary formula change.
+    """
     db = SessionLocal()
 
     try:
-        rows = db.query(OCMinuteSnapshot).filter_by(
+        existing = db.query(OCSummary).filter_by(
             instrument=instrument_id,
             expiry=expiry,
             ist_minute=ist_minute
-        ).all()
+        ).first()
+
+        # Delta minutes only hold changed strikes, so rebuild the chain through the carry-forward view
+        if existing:
+            rows = carry_forward_rows(db, instrument_id, expiry, ist_minute)
+        else:
+            rows = db.query(OCMinuteSnapshot).filter_by(
+                instrument=instrument_id,
+                expiry=expiry,
+                ist_minute=ist_minute
+            ).all()
 
         if not rows:
             logger.warning(f"[I-SUMMARY] No data found for {instrument_id} ({expiry}) at IST {ist_minute}")
             return
 
-        underlying = rows[0].underlying_price
+        underlying = existing.underlying_price if existing else rows[0].underlying_price
+        keyframe = existing.keyframe if existing else True
         instrument = next(i for i in INSTRUMENTS if i["SECURITY_ID"] == instrument_id)
-        strike_range = instrument["STRIKE_RANGE"]
-        atm = round(underlying / strike_range) * strike_range
-
-        # Gamma Flip Logic
-        rows_sorted = sorted(rows, key=lambda r: r.strike)
-        cum_net_gex = 0
-        gamma_flip_level = None
-        for row in rows_sorted:
-            cum_net_gex += row.net_gex or 0
-            if cum_net_gex >= 0:
-                gamma_flip_level = row.strike
-                break
-
-        summary = OCSummary(
-            ist_minute=ist_minute,
-            instrument=instrument_id,
-            expiry=expiry,
-            underlying_price=underlying,
-            total_net_gex=sum(r.net_gex or 0 for r in rows),
-            gamma_flip_level=gamma_flip_level,
-            otm_call_vega=sum(r.call_vega or 0 for r in rows if r.strike >= atm),
-            otm_put_vega=sum(r.put_vega or 0 for r in rows if r.strike <= atm),
-            otm_call_theta=sum(r.call_theta or 0 for r in rows if r.strike >= atm),
-            otm_put_theta=sum(r.put_theta or 0 for r in rows if r.strike <= atm),
-            otm_call_delta=sum(r.call_delta or 0 for r in rows if r.strike >= atm),
-            otm_put_delta=sum(r.put_delta or 0 for r in rows if r.strike <= atm),
-        )
-
-        db.add(summary)
+
+        summary = compute_summary(chain_from_rows(rows), underlying, instrument["STRIKE_RANGE"])
+        replace_minute_summary(db, instrument_id, expiry, ist_minute, summary, keyframe=keyframe)
+
         db.commit()
         logger.info(f"[I-SUMMARY] Added summary for {instrument_id} ({expiry}) at IST {ist_minute}")
 
@@ -60,4 +55,4 @@ def oc_summary_task(instrument_id, expiry, ist_minute):
         db.rollback()
         logger.error(f"[I-SUMMARY] Failed to add summary for {instrument_id} ({expiry}) at IST {ist_minute}: {e}")
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -0,0 +1,36 @@
+import logging
+from datetime import datetime
+
+from db import SessionLocal
+from celery_config import celery_app
+from metrics import ROWS_INSERTED
+from processors.iv_surface import write_surface, claim_latch
+
+logger = logging.getLogger(__name__)
+
+@celery_app.task
+def iv_surface_task(instrument_id, ist_minute, timeout=False):
+    """Store the IV surface of an (instrument, IST minute) once every chain its fetch cycles captured is committed.
+
+    The `timeout` run is queued when the latch is armed and only builds if the latch has not fired by then.
+    """
+    ist_minute = datetime.fromisoformat(ist_minute)
+    if timeout:
+        if not claim_latch(instrument_id, ist_minute):
+            return
+        logger.warning(f"[IV SURFACE] Not every chain landed for {instrument_id} at IST {ist_minute}, building from what did")
+
+    db = SessionLocal()
+
+    try:
+        surface = write_surface(db, instrument_id, ist_minute)
+        db.commit()
+
+        if surface:
+            ROWS_INSERTED.labels("iv_surfaces").inc()
+            logger.info(f"[IV SURFACE] Stored {len(surface['expiries'])} expiries x {surface['strike_count']} strikes for {instrument_id} at IST {ist_minute}")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[IV SURFACE] Failed to build surface for {instrument_id} at IST {ist_minute}: {e}")
+    finally:
+        db.close()
@@ -0,0 +1,23 @@
+import logging
+from datetime import datetime
+
+from db import SessionLocal
+from config import IST_OFFSET, PARTITION_DAYS_AHEAD
+from celery_config import celery_app
+from processors.partitions import ensure_partitions
+
+logger = logging.getLogger(__name__)
+
+@celery_app.task
+def ensure_partitions_task():
+    db = SessionLocal()
+
+    try:
+        today_ist = (datetime.utcnow() + IST_OFFSET).date()
+        ensure_partitions(db, today_ist, PARTITION_DAYS_AHEAD)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[PARTITIONS] Failed to create intraday partitions: {e}")
+    finally:
+        db.close()
@@ -0,0 +1,37 @@
+import logging
+from sqlalchemy import func
+from datetime import date, datetime, time
+
+from db import SessionLocal
+from celery_config import celery_app
+from models import HistoricalOCSnapshot
+from processors.chain_frame import frames_from_historical
+
+logger = logging.getLogger(__name__)
+
+@celery_app.task
+def migrate_historical_frames_task(start_date=None, end_date=None):
+    """Backfill historical_oc_frames from historical_oc_snapshots, one committed (instrument, date) at a time."""
+    db = SessionLocal()
+
+    try:
+        keys = db.query(
+            HistoricalOCSnapshot.instrument,
+            func.date(HistoricalOCSnapshot.ist_minute)
+        ).distinct()
+        if start_date:
+            keys = keys.filter(HistoricalOCSnapshot.ist_minute >= datetime.combine(date.fromisoformat(start_date), time.min))
+        if end_date:
+            keys = keys.filter(HistoricalOCSnapshot.ist_minute <= datetime.combine(date.fromisoformat(end_date), time.max))
+
+        for instrument, ist_date in sorted(keys.all()):
+            try:
+                frames_from_historical(db, instrument, datetime.combine(ist_date, time.min), datetime.combine(ist_date, time.max))
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"[FRAMES] Failed to migrate {instrument} at IST {ist_date}: {e}")
+
+        logger.info("[FRAMES] Historical frame migration completed")
+    finally:
+        db.close()
@@ -1,112 +1,275 @@
 import logging
-from sqlalchemy import func
-from datetime import datetime, time
+from celery import chord
+from sqlalchemy import func, select, update, union, or_, not_, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import date, datetime, time, timedelta
 
 from db import SessionLocal
 from celery_config import celery_app
+from config import HISTORICAL_FRAMES_ENABLED
+from processors.chain_frame import frames_from_historical
+from processors.carry_forward import KEYFRAME_LOOKBACK, tombstone_clause
+from processors.history_tiers import TIERS, AGGREGATED_TIERS, minute_bucket, bucket_start, tier_insert
+from metrics import ROWS_INSERTED
 from processors.clean_intraday_data import cleanup_intraday_data
-from models import OCMinuteSnapshot, OCSummary, HistoricalOCSnapshot, HistoricalOCSummary
+from models import OCMinuteSnapshot, OCSummary, HistoricalOCSnapshot, HistoricalOCSummary, HistoricalOCSummaryTier, HistoricalOCFrame, RollupWatermark
 
 logger = logging.getLogger(__name__)
 
+def five_minute_bucket(column):
+    """Floor a timestamp column to its 5-minute bucket in SQL."""
+    return minute_bucket(column, 5)
+
+def latest_per_bucket_insert(source, target, key_columns, *filters):
+    """INSERT ... SELECT the latest source row of every 5-minute bucket, skipping buckets already in target."""
+    src = source.__table__
+    bucket = five_minute_bucket(src.c.ist_minute)
+    copied = [c.name for c in src.columns if c.name != "ist_minute" and c.name in target.__table__.c]
+    partition = [src.c[name] for name in key_columns if name != "ist_minute"]
+
+    latest = select(
+        *[src.c[name] for name in copied],
+        bucket
+    ).where(*filters).distinct(*partition, bucket).order_by(*partition, bucket, src.c.ist_minute.desc())
+
+    return pg_insert(target.__table__).from_select(
+        [*copied, "ist_minute"], latest
+    ).on_conflict_do_nothing(index_elements=key_columns)
+
+def carry_forward_bucket_insert(instrument, expiry, start, end):
+    """INSERT ... SELECT the full chain as of the last stored minute of every 5-minute bucket in [start, end).
+
+    Works for full and delta minutes alike: each strike takes its latest row between that minute's
+    keyframe and the minute itself, removed strikes are dropped, and the underlying price comes
+    from the minute's summary.
+    """
+    summary = OCSummary.__table__
+    snap = OCMinuteSnapshot.__table__
+    keyframes = summary.alias("keyframes")
+    bucket = five_minute_bucket(summary.c.ist_minute)
+
+    anchor = select(func.max(keyframes.c.ist_minute)).where(
+        keyframes.c.instrument == instrument,
+        keyframes.c.expiry == expiry,
+        keyframes.c.keyframe.is_(True),
+        keyframes.c.ist_minute <= summary.c.ist_minute,
+        keyframes.c.ist_minute > summary.c.ist_minute - KEYFRAME_LOOKBACK
+    ).scalar_subquery()
+
+    marks = select(
+        summary.c.ist_minute.label("mark"),
+        summary.c.underlying_price,
+        bucket.label("bucket"),
+        anchor.label("anchor")
+    ).where(
+        summary.c.instrument == instrument,
+        summary.c.expiry == expiry,
+        summary.c.ist_minute >= start,
+        summary.c.ist_minute < end
+    ).distinct(bucket).order_by(bucket, summary.c.ist_minute.desc()).cte("marks")
+
+    # Per mark, the latest row of every strike since its keyframe (LATERAL keeps this an index range scan)
+    copied = [c.name for c in snap.columns if c.name not in ("ist_minute", "underlying_price")]
+    latest = select(*[snap.c[name] for name in copied], snap.c.ist_minute).where(
+        snap.c.instrument == instrument,
+        snap.c.expiry == expiry,
+        snap.c.ist_minute >= marks.c.anchor,
+        snap.c.ist_minute <= marks.c.mark
+    ).distinct(snap.c.strike).order_by(snap.c.strike, snap.c.ist_minute.desc()).lateral("latest")
+
+    chains = select(
+        *[latest.c[name] for name in copied],
+        marks.c.underlying_price,
+        marks.c.bucket
+    ).select_from(marks.join(latest, true())).where(
+        or_(latest.c.ist_minute == marks.c.anchor, not_(tombstone_clause(latest.c)))
+    )
+
+    return pg_insert(HistoricalOCSnapshot.__table__).from_select(
+        [*copied, "underlying_price", "ist_minute"], chains
+    ).on_conflict_do_nothing(index_elements=["instrument", "expiry", "strike", "ist_minute"])
+
+def clear_sealed(db, instrument, expiry, start, end, snapshots=True):
+    """Delete the historical rows a seal of [start, end) writes, so its buckets can be sealed again from scratch."""
+    models = [HistoricalOCSummary]
+    if snapshots:
+        models.append(HistoricalOCSnapshot)
+        if HISTORICAL_FRAMES_ENABLED:
+            models.append(HistoricalOCFrame)
+    for model in models:
+        db.query(model).filter(
+            model.instrument == instrument,
+            model.expiry == expiry,
+            model.ist_minute >= start,
+            model.ist_minute < end
+        ).delete(synchronize_session=False)
+
+    for tier in AGGREGATED_TIERS:
+        db.query(HistoricalOCSummaryTier).filter(
+            HistoricalOCSummaryTier.tier == tier,
+            HistoricalOCSummaryTier.instrument == instrument,
+            HistoricalOCSummaryTier.expiry == expiry,
+            HistoricalOCSummaryTier.ist_minute >= bucket_start(start, TIERS[tier]),
+            HistoricalOCSummaryTier.ist_minute < bucket_start(end, TIERS[tier])
+        ).delete(synchronize_session=False)
+
+def seal_expiry(db, instrument, expiry, ist_date, until, snapshots=True):
+    """Roll one (instrument, expiry) from its `ist_date` watermark up to `until` on that date and advance the watermark.
+
+    `until` is a 5-minute boundary, or the next midnight to close the day. 15m/1h/1d tier buckets are
+    only written once `until` has closed them, and chain snapshots only when `snapshots` is set.
+    Minutes written after their bucket was sealed (the watermark's dirty_from) have that bucket and
+    everything after it cleared and sealed again. Returns the (snapshot, summary, tier) rows inserted.
+    """
+    day_start = datetime.combine(ist_date, time.min)
+    watermark = RollupWatermark.__table__
+    key = [watermark.c.instrument == instrument, watermark.c.expiry == expiry, watermark.c.ist_date == ist_date]
+
+    # Lock the watermark before reading any minute, so writes racing this seal flag themselves as late (note_minute_write)
+    stmt = pg_insert(watermark).values(
+        instrument=instrument, expiry=expiry, ist_date=ist_date, sealed_until=day_start, updated_at=datetime.utcnow()
+    )
+    sealed_until, dirty_from = db.execute(stmt.on_conflict_do_update(
+        index_elements=["instrument", "expiry", "ist_date"],
+        set_={"updated_at": stmt.excluded.updated_at}
+    ).returning(watermark.c.sealed_until, watermark.c.dirty_from)).one()
+
+    start, end = sealed_until, max(sealed_until, until)
+    if dirty_from is not None:
+        start = min(start, bucket_start(dirty_from, TIERS["5m"]))
+        clear_sealed(db, instrument, expiry, start, end, snapshots)
+    if start >= end:
+        return 0, 0, 0
+
+    snapshot_count = 0
+    if snapshots:
+        snapshot_count = db.execute(carry_forward_bucket_insert(instrument, expiry, start, end)).rowcount
+
+        if HISTORICAL_FRAMES_ENABLED:
+            frames_from_historical(db, instrument, start, end, expiry=expiry)
+
+    summary_count = db.execute(latest_per_bucket_insert(
+        OCSummary, HistoricalOCSummary,
+        ["instrument", "expiry", "ist_minute"],
+        OCSummary.instrument == instrument,
+        OCSummary.expiry == expiry,
+        OCSummary.ist_minute >= start,
+        OCSummary.ist_minute < end
+    )).rowcount
+
+    # Coarser tiers come from the full-resolution minutes, so only whole buckets are aggregated
+    tier_count = 0
+    for tier in AGGREGATED_TIERS:
+        tier_start, tier_end = bucket_start(start, TIERS[tier]), bucket_start(end, TIERS[tier])
+        if tier_start < tier_end:
+            tier_count += db.execute(tier_insert(
+                OCSummary, tier,
+                OCSummary.instrument == instrument,
+                OCSummary.expiry == expiry,
+                OCSummary.ist_minute >= tier_start,
+                OCSummary.ist_minute < tier_end
+            )).rowcount
+
+    db.execute(update(watermark).where(*key).values(sealed_until=end, dirty_from=None, updated_at=datetime.utcnow()))
+    return snapshot_count, summary_count, tier_count
+
+def seal_instrument(db, instrument, ist_date, until):
+    """Seal and commit every expiry of an instrument on `ist_date` up to `until`; chain snapshots are kept for the current expiry only."""
+    day_start = datetime.combine(ist_date, time.min)
+
+    current_expiry = db.query(func.min(OCMinuteSnapshot.expiry)).filter(
+        OCMinuteSnapshot.instrument == instrument,
+        OCMinuteSnapshot.ist_minute >= day_start,
+        OCMinuteSnapshot.ist_minute < until
+    ).scalar()
+    expiries = db.query(OCSummary.expiry).filter(
+        OCSummary.instrument == instrument,
+        OCSummary.ist_minute >= day_start,
+        OCSummary.ist_minute < until
+    ).distinct().all()
+
+    # Committed per expiry so a seal never holds more than one watermark lock that writers could be waiting on
+    counts = [0, 0, 0]
+    for (expiry,) in sorted(expiries):
+        for i, count in enumerate(seal_expiry(db, instrument, expiry, ist_date, until, snapshots=expiry == current_expiry)):
+            counts[i] += count
+        db.commit()
+
+    snapshot_count, summary_count, tier_count = counts
+    ROWS_INSERTED.labels("historical_oc_snapshots").inc(snapshot_count)
+    ROWS_INSERTED.labels("historical_oc_summary").inc(summary_count)
+    ROWS_INSERTED.labels("historical_oc_summary_tiers").inc(tier_count)
+    logger.info(
+        f"[H-ROLLUP] Sealed {instrument} ({current_expiry}) up to IST {until}: {snapshot_count} snapshot, "
+        f"{summary_count} summary and {tier_count} tier buckets"
+    )
+    return counts
+
+def rollup_day(db, instrument, ist_date):
+    """Roll what is left of one (instrument, IST date) into the historical tables after the intraday sealing."""
+    return seal_instrument(db, instrument, ist_date, datetime.combine(ist_date + timedelta(days=1), time.min))
+
+def rollup_keys(db):
+    """Every (instrument, IST date) with rows in the intraday snapshot or summary tables."""
+    keys = union(*(
+        select(model.instrument, func.date(model.ist_minute)) for model in (OCMinuteSnapshot, OCSummary)
+    ))
+    return sorted(db.execute(keys).tuples())
+
 @celery_app.task
-def rollup_historical_task():
+def rollup_key_task(instrument, ist_date):
+    """Roll one (instrument, IST date) up in its own transaction and report how it went to the chord."""
     db = SessionLocal()
 
     try:
-        # Get all (instrument, ist_date) pairs from minute + summary tables
-        snap_keys = db.query(
-            OCMinuteSnapshot.instrument,
-            func.date(OCMinuteSnapshot.ist_minute)
-        ).distinct().all()
-
-        summary_keys = db.query(
-            OCSummary.instrument,
-            func.date(OCSummary.ist_minute)
-        ).distinct().all()
-
-        combined_keys = set(snap_keys) | set(summary_keys)
-
-        for instrument, ist_date in combined_keys:
-            day_start = datetime.combine(ist_date, time.min)
-            day_end = datetime.combine(ist_date, time.max)
-
-            # --- Minute Snapshot Rollup (current expiry only) ---
-            current_expiry = db.query(func.min(OCMinuteSnapshot.expiry)).filter(
-                OCMinuteSnapshot.instrument == instrument,
-                OCMinuteSnapshot.ist_minute >= day_start,
-                OCMinuteSnapshot.ist_minute <= day_end
-            ).scalar()
-
-            logger.info(f"[H-ROLLUP] Rolling up {instrument} ({current_expiry}) at IST {ist_date}")
-
-            if current_expiry:
-                minute_rows = db.query(OCMinuteSnapshot).filter(
-                    OCMinuteSnapshot.instrument == instrument,
-                    OCMinuteSnapshot.expiry == current_expiry,
-                    OCMinuteSnapshot.ist_minute >= day_start,
-                    OCMinuteSnapshot.ist_minute <= day_end
-                ).all()
-
-                snapshots_by_5min = {}
-                for row in minute_rows:
-                    bucket_time = row.ist_minute.replace(
-                        minute=(row.ist_minute.minute // 5) * 5,
-                        second=0,
-                        microsecond=0
-                    )
-                    key = (row.instrument, row.expiry, row.strike, bucket_time)
-                    if key not in snapshots_by_5min or row.ist_minute > snapshots_by_5min[key].ist_minute:
-                        snapshots_by_5min[key] = row
-
-                for (instrument, expiry, strike, bucket_time), row in snapshots_by_5min.items():
-                    exists = db.query(HistoricalOCSnapshot).filter_by(
-                        instrument=instrument,
-                        expiry=expiry,
-                        strike=strike,
-                        ist_minute=bucket_time
-                    ).first()
-                    if not exists:
-                        new_row_data = {c.name: getattr(row, c.name) for c in OCMinuteSnapshot.__table__.columns}
-                        new_row_data['ist_minute'] = bucket_time
-                        db.add(HistoricalOCSnapshot(**new_row_data))
-
-            # --- Summary Rollup (all expiries) ---
-            summary_rows = db.query(OCSummary).filter(
-                OCSummary.instrument == instrument,
-                OCSummary.ist_minute >= day_start,
-                OCSummary.ist_minute <= day_end
-            ).all()
-
-            summary_by_5min = {}
-            for row in summary_rows:
-                bucket_time = row.ist_minute.replace(
-                    minute=(row.ist_minute.minute // 5) * 5,
-                    second=0,
-                    microsecond=0
-                )
-                key = (row.instrument, row.expiry, bucket_time)
-                if key not in summary_by_5min or row.ist_minute > summary_by_5min[key].ist_minute:
-                    summary_by_5min[key] = row
-
-            for (instrument, expiry, bucket_time), row in summary_by_5min.items():
-                exists = db.query(HistoricalOCSummary).filter_by(
-                    instrument=instrument,
-                    expiry=expiry,
-                    ist_minute=bucket_time
-                ).first()
-                if not exists:
-                    new_row_data = {c.name: getattr(row, c.name) for c in OCSummary.__table__.columns}
-                    new_row_data['ist_minute'] = bucket_time
-                    db.add(HistoricalOCSummary(**new_row_data))
-
-            # --- Cleanup ---
-            cleanup_intraday_data(db, instrument, ist_date)
-
+        rollup_day(db, instrument, date.fromisoformat(ist_date))
         db.commit()
-        logger.info("[H-ROLLUP] Full historical rollup completed")
+        return {"instrument": instrument, "date": ist_date, "status": "ok"}
     except Exception as e:
         db.rollback()
-        logger.error(f"[H-ROLLUP] Rollup failed: {e}")
+        logger.error(f"[H-ROLLUP] Rollup failed for {instrument} at IST {ist_date}: {e}")
+        return {"instrument": instrument, "date": ist_date, "status": "failed", "error": str(e)}
     finally:
         db.close()
+
+@celery_app.task
+def finish_rollup_task(results):
+    """Chord callback: drop the intraday partitions of dates whose every key rolled up, and report the rest.
+
+    A day's partitions hold every instrument, so one failed key keeps the whole date for the next run.
+    """
+    failed = [r for r in results if r["status"] != "ok"]
+    for r in failed:
+        logger.error(f"[H-ROLLUP] {r['instrument']} at IST {r['date']} was not rolled up: {r['error']}")
+
+    db = SessionLocal()
+
+    try:
+        for ist_date in sorted({r["date"] for r in results} - {r["date"] for r in failed}):
+            cleanup_intraday_data(db, date.fromisoformat(ist_date))
+            db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[H-ROLLUP] Intraday cleanup failed: {e}")
+    finally:
+        db.close()
+
+    logger.info(f"[H-ROLLUP] Historical rollup completed, {len(results) - len(failed)}/{len(results)} keys rolled up")
+    return {"rolled_up": len(results) - len(failed), "failed": failed}
+
+@celery_app.task
+def rollup_historical_task():
+    """Fan the nightly rollup out as one rollup_key_task per (instrument, IST date), joined by finish_rollup_task."""
+    db = SessionLocal()
+
+    try:
+        keys = rollup_keys(db)
+    finally:
+        db.close()
+
+    if not keys:
+        logger.info("[H-ROLLUP] No intraday data to roll up")
+        return
+
+    chord(rollup_key_task.s(instrument, ist_date.isoformat()) for instrument, ist_date in keys)(finish_rollup_task.s())
+    logger.info(f"[H-ROLLUP] Dispatched rollup for {len(keys)} (instrument, date) keys")
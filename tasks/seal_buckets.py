@@ -0,0 +1,40 @@
+import logging
+from datetime import datetime, time, timedelta
+
+from db import SessionLocal
+from celery_config import celery_app
+from config import IST_OFFSET, ROLLUP_SEAL_DELAY_SEC
+from models import OCSummary
+from processors.history_tiers import bucket_start
+from tasks.rollup_historical import seal_instrument
+
+logger = logging.getLogger(__name__)
+
+@celery_app.task
+def seal_buckets_task(now_ist=None):
+    """Seal today's 5-minute buckets closed at least ROLLUP_SEAL_DELAY_SEC ago, one committed instrument at a time.
+
+    Each (instrument, expiry) resumes from today's watermark, so the nightly rollup only seals the tail of the day.
+    Buckets that received writes after they were sealed are sealed again by whichever pass runs next.
+    """
+    now_ist = datetime.fromisoformat(now_ist) if now_ist else datetime.utcnow() + IST_OFFSET
+    until = bucket_start(now_ist - timedelta(seconds=ROLLUP_SEAL_DELAY_SEC), 5)
+    day_start = datetime.combine(until.date(), time.min)
+
+    db = SessionLocal()
+
+    try:
+        instruments = db.query(OCSummary.instrument).filter(
+            OCSummary.ist_minute >= day_start,
+            OCSummary.ist_minute < until
+        ).distinct().all()
+
+        for (instrument,) in sorted(instruments):
+            try:
+                seal_instrument(db, instrument, until.date(), until)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"[H-ROLLUP] Failed to seal {instrument} up to IST {until}: {e}")
+    finally:
+        db.close()